@@ -0,0 +1,467 @@
+"""
+Times the main paths of the project on synthetic networks and saves the results as JSON, e.g.
+python -m benchmarks.run_benchmarks --profile bsub --scale 0.5 1 2 --output benchmarks/results/current.json
+python -m benchmarks.run_benchmarks --compare benchmarks/results/before.json benchmarks/results/current.json
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+from pathlib import Path
+import argparse
+import io
+import json
+import multiprocessing
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARKS = [
+    "create_ppi_network",
+    "pickle_load",
+    "predict",
+    "sample_data",
+    "run_metrics",
+    "run_workflow",
+]
+RESULTS_FORMAT_VERSION = 1
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.run_benchmarks",
+        description="time graph construction, graph loading, the algorithms and the workflow on synthetic networks",
+    )
+    parser.add_argument("--profile", nargs="+", default=["bsub"])
+    parser.add_argument("--scale", nargs="+", type=float, default=[0.5, 1.0, 2.0])
+    parser.add_argument(
+        "--benchmark", nargs="+", default=BENCHMARKS, choices=BENCHMARKS
+    )
+    parser.add_argument(
+        "--sample-size",
+        type=int,
+        default=1000,
+        help="size of the positive and of the negative dataset of a replicate",
+    )
+    parser.add_argument(
+        "--repeats",
+        type=int,
+        default=3,
+        help="number of timed runs of each benchmark, the fastest one is reported",
+    )
+    parser.add_argument(
+        "--replicates", type=int, default=2, help="replicates of the run_workflow benchmark"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path)
+    parser.add_argument(
+        "--compare",
+        nargs=2,
+        type=Path,
+        metavar=("BASELINE", "CURRENT"),
+        help="compare two result files instead of running the benchmarks",
+    )
+    args = parser.parse_args()
+
+    if args.compare is not None:
+        print(compare_results(*[read_results(path) for path in args.compare]))
+        return
+
+    results = run_benchmarks(
+        args.profile,
+        args.scale,
+        args.benchmark,
+        args.sample_size,
+        args.repeats,
+        args.replicates,
+        args.seed,
+    )
+    print(format_results(results["results"]))
+    if args.output is not None:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=4)
+        print("results written to " + str(args.output))
+
+
+def run_benchmarks(
+    profiles, scales, benchmarks, sample_size, repeats, replicates, seed
+):
+    """
+    Run every benchmark on a synthetic network of every profile and scale. Each (profile, scale, benchmark) case
+    runs in a new process, so the peak RSS reported for it is that of the case alone.
+
+    Parameters:
+    profiles {list} : names of the network profiles, see benchmarks.synthetic.PROFILE_FILES
+    scales {list} : sizes of the synthetic networks relative to the profile
+    benchmarks {list} : names of the benchmarks to run, see BENCHMARKS
+    sample_size {int} : size of the positive and of the negative dataset of a replicate
+    repeats {int} : number of timed runs of each benchmark
+    replicates {int} : number of replicates of the run_workflow benchmark
+    seed {int} : seed of the synthetic networks and of the sampled datasets
+
+    Returns:
+    results {dict} : the environment the benchmarks ran in and one entry per measurement
+    """
+    from benchmarks.synthetic import available_profiles
+
+    results = []
+    available = available_profiles()
+    for profile in profiles:
+        if profile not in available:
+            print(f"skipping profile {profile}, its network files are not in the network directory")
+            continue
+        for scale in scales:
+            for benchmark in benchmarks:
+                print(f"{profile} x{scale}: {benchmark}")
+                # spawn so the measured process does not inherit the memory of this one
+                with ProcessPoolExecutor(
+                    max_workers=1, mp_context=multiprocessing.get_context("spawn")
+                ) as executor:
+                    results.extend(
+                        executor.submit(
+                            run_case,
+                            benchmark,
+                            profile,
+                            scale,
+                            sample_size,
+                            repeats,
+                            replicates,
+                            seed,
+                        ).result()
+                    )
+    return {
+        "version": RESULTS_FORMAT_VERSION,
+        "commit": _git_commit(),
+        "created": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "sample_size": sample_size,
+        "repeats": repeats,
+        "results": results,
+    }
+
+
+def run_case(benchmark, profile_name, scale, sample_size, repeats, replicates, seed):
+    """
+    Set up and time one benchmark on one synthetic network, runs in its own process
+
+    Returns:
+    results {list} : one dict per measurement with its name, number of items, seconds, throughput and peak RSS
+    """
+    import matplotlib
+
+    matplotlib.use("Agg")
+    from benchmarks.synthetic import generate_network, load_profile
+
+    interactome, go_protein_pairs = generate_network(
+        load_profile(profile_name), scale, seed
+    )
+    with tempfile.TemporaryDirectory() as directory, redirect_stdout(io.StringIO()):
+        cases = CASE_SETUPS[benchmark](
+            Path(directory),
+            interactome,
+            go_protein_pairs,
+            sample_size=sample_size,
+            replicates=replicates,
+            seed=seed,
+        )
+        results = []
+        for name, items, unit, function in cases:
+            seconds = [_time(function) for _ in range(repeats)]
+            results.append(
+                {
+                    "benchmark": name,
+                    "profile": profile_name,
+                    "scale": scale,
+                    "proteins": _protein_count(interactome, go_protein_pairs),
+                    "interactions": len(interactome),
+                    "annotations": len(go_protein_pairs),
+                    "items": items,
+                    "unit": unit,
+                    "seconds": min(seconds),
+                    "mean_seconds": sum(seconds) / len(seconds),
+                    "throughput": items / min(seconds) if min(seconds) > 0 else None,
+                    "peak_rss_mb": _peak_rss_mb(),
+                }
+            )
+    return results
+
+
+def setup_create_ppi_network(directory, interactome, go_protein_pairs, **kwargs):
+    from tools.helper import create_ppi_network
+
+    edges = len(interactome) + len(go_protein_pairs)
+    return [
+        (
+            "create_ppi_network",
+            edges,
+            "edges",
+            lambda: create_ppi_network(interactome, go_protein_pairs),
+        )
+    ]
+
+
+def setup_pickle_load(directory, interactome, go_protein_pairs, **kwargs):
+    from tools.helper import (
+        create_ppi_network,
+        export_graph_to_pickle,
+        import_graph_from_pickle,
+    )
+
+    G, _ = create_ppi_network(interactome, go_protein_pairs)
+    graph_file_path = Path(directory, "graph.pickle")
+    export_graph_to_pickle(G, graph_file_path)
+    return [
+        (
+            "pickle_load",
+            G.number_of_edges(),
+            "edges",
+            lambda: import_graph_from_pickle(graph_file_path),
+        )
+    ]
+
+
+def setup_predict(directory, interactome, go_protein_pairs, sample_size, seed, **kwargs):
+    """
+    Two cases per algorithm. predict:<algorithm>:cold runs on a graph nothing has run on yet, so it pays for the
+    structures and pair features the algorithm computes on first use. predict:<algorithm>:warm runs on a graph
+    every algorithm has already run on, so these are cached.
+    """
+    from classes.registry import get_algorithm_classes
+    from tools.graph import GraphContext
+
+    G, protein_list, dataset = _sampled_dataset(
+        interactome, go_protein_pairs, sample_size, seed
+    )
+    csr_graph = GraphContext(graph=G).csr_graph
+    warm_graph = GraphContext(graph=_uncached_copy(csr_graph))
+    algorithm_classes = get_algorithm_classes()
+    for algorithm_class in algorithm_classes.values():
+        algorithm_class().predict(
+            directory, None, directory, 0, "", graph=warm_graph, dataset=dataset
+        )
+
+    cases = []
+    for algorithm_name, algorithm_class in algorithm_classes.items():
+
+        def cold(algorithm_class=algorithm_class):
+            # a new graph context on the same arrays, without the structures earlier runs computed
+            graph = GraphContext(graph=_uncached_copy(csr_graph))
+            algorithm_class().predict(
+                directory, None, directory, 0, "", graph=graph, dataset=dataset
+            )
+
+        def warm(algorithm_class=algorithm_class):
+            algorithm_class().predict(
+                directory, None, directory, 0, "", graph=warm_graph, dataset=dataset
+            )
+
+        cases.append(
+            ("predict:" + algorithm_name + ":cold", len(dataset.proteins), "pairs", cold)
+        )
+        cases.append(
+            ("predict:" + algorithm_name + ":warm", len(dataset.proteins), "pairs", warm)
+        )
+    return cases
+
+
+def setup_sample_data(directory, interactome, go_protein_pairs, sample_size, seed, **kwargs):
+    from tools.helper import create_ppi_network
+    from tools.workflow import sample_data
+
+    G, protein_list = create_ppi_network(interactome, go_protein_pairs)
+    return [
+        (
+            "sample_data",
+            2 * sample_size,
+            "pairs",
+            lambda: sample_data(
+                go_protein_pairs, sample_size, protein_list, G, directory, 0, "", seed
+            ),
+        )
+    ]
+
+
+def setup_run_metrics(directory, interactome, go_protein_pairs, sample_size, seed, **kwargs):
+    from classes.overlapping_neighbors_class import OverlappingNeighbors
+    from tools.graph import GraphContext
+    from tools.workflow import run_algorithm, run_metrics
+
+    G, protein_list, dataset = _sampled_dataset(
+        interactome, go_protein_pairs, sample_size, seed
+    )
+    current = run_algorithm(
+        OverlappingNeighbors, directory, None, directory, 0, "", GraphContext(graph=G), dataset
+    )
+    return [
+        (
+            "run_metrics",
+            len(current["y_true"]),
+            "pairs",
+            lambda: run_metrics(dict(current)),
+        )
+    ]
+
+
+def setup_run_workflow(
+    directory, interactome, go_protein_pairs, sample_size, replicates, seed, **kwargs
+):
+    from classes.registry import get_algorithm_classes
+    from tools.helper import create_ppi_network, export_graph_to_pickle
+    from tools.workflow import run_workflow
+
+    G, protein_list = create_ppi_network(interactome, go_protein_pairs)
+    graph_file_path = Path(directory, "graph.pickle")
+    export_graph_to_pickle(G, graph_file_path)
+    for subdirectory in ["dataset", "data", "images"]:
+        Path(directory, subdirectory).mkdir()
+    algorithm_classes = get_algorithm_classes()
+
+    def workflow():
+        run_workflow(
+            algorithm_classes,
+            go_protein_pairs,
+            sample_size,
+            protein_list,
+            graph_file_path,
+            Path(directory, "dataset"),
+            Path(directory, "data"),
+            Path(directory, "images"),
+            replicates,
+            True,
+            "",
+            False,
+            seed=seed,
+        )
+
+    pairs = 2 * sample_size * replicates * len(algorithm_classes)
+    return [("run_workflow", pairs, "pairs", workflow)]
+
+
+CASE_SETUPS = {
+    "create_ppi_network": setup_create_ppi_network,
+    "pickle_load": setup_pickle_load,
+    "predict": setup_predict,
+    "sample_data": setup_sample_data,
+    "run_metrics": setup_run_metrics,
+    "run_workflow": setup_run_workflow,
+}
+
+
+def read_results(path):
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def format_results(results):
+    lines = [
+        f"{'benchmark':<42}{'profile':<8}{'scale':>6}{'seconds':>11}{'throughput':>20}{'peak RSS':>12}"
+    ]
+    for result in results:
+        throughput = result["throughput"]
+        throughput = "-" if throughput is None else f"{throughput:,.0f} {result['unit']}/s"
+        lines.append(
+            f"{result['benchmark']:<42}{result['profile']:<8}{result['scale']:>6}"
+            f"{result['seconds']:>11.4f}{throughput:>20}{result['peak_rss_mb']:>9.1f} MB"
+        )
+    return "\n".join(lines)
+
+
+def compare_results(baseline, current):
+    """
+    Table of the time ratio current / baseline of every measurement found in both result files, a ratio above
+    1 is a slowdown
+    """
+
+    def key(result):
+        return (result["benchmark"], result["profile"], result["scale"])
+
+    baseline_seconds = {key(result): result["seconds"] for result in baseline["results"]}
+    lines = [
+        f"baseline {baseline.get('commit')}, current {current.get('commit')}",
+        f"{'benchmark':<42}{'profile':<8}{'scale':>6}{'baseline':>11}{'current':>11}{'ratio':>8}",
+    ]
+    for result in current["results"]:
+        before = baseline_seconds.get(key(result))
+        if before is None:
+            continue
+        ratio = result["seconds"] / before if before > 0 else float("nan")
+        lines.append(
+            f"{result['benchmark']:<42}{result['profile']:<8}{result['scale']:>6}"
+            f"{before:>11.4f}{result['seconds']:>11.4f}{ratio:>8.2f}"
+        )
+    return "\n".join(lines)
+
+
+def _sampled_dataset(interactome, go_protein_pairs, sample_size, seed):
+    from tools.dataset import ReplicateDataset
+    from tools.helper import create_ppi_network
+    from tools.sampling import PairSampler
+
+    G, protein_list = create_ppi_network(interactome, go_protein_pairs)
+    [(positive_dataset, negative_dataset)] = PairSampler(
+        go_protein_pairs, protein_list
+    ).sample(sample_size, seed, [0])
+    return G, protein_list, ReplicateDataset(positive_dataset, negative_dataset)
+
+
+def _uncached_copy(graph):
+    # the graph's arrays and statistics without any of the structures computed from them on first use, the state
+    # a graph is in when a workflow loads it
+    from tools.graph import CSRGraph
+
+    return CSRGraph(
+        graph.protein_ids,
+        graph.go_ids,
+        graph.ppi_indptr,
+        graph.ppi_indices,
+        graph.pg_indptr,
+        graph.pg_indices,
+        graph.gp_indptr,
+        graph.gp_indices,
+        protein_order=graph._protein_order,
+        go_order=graph._go_order,
+        stats=graph.stats,
+    )
+
+
+def _time(function):
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on linux
+    if sys.platform == "darwin":
+        return peak / 2**20
+    return peak / 2**10
+
+
+def _protein_count(interactome, go_protein_pairs):
+    return len(
+        {row[0] for row in interactome}
+        | {row[1] for row in interactome}
+        | {row[0] for row in go_protein_pairs}
+    )
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == "__main__":
+    main()
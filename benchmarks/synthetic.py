@@ -0,0 +1,127 @@
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+NETWORK_DIRECTORY = Path(__file__).resolve().parent.parent / "network"
+NAMESPACES = ["molecular_function", "biological_process", "cellular_component"]
+
+# interactome and go association files each profile's degree distributions are taken from. The zfish go
+# associations are not in the repository, zfish uses the bsub annotation distributions. The fly files are only
+# used when they have been downloaded to the network directory.
+PROFILE_FILES = {
+    "bsub": ("bsub_propro.csv", "bsub_proGo.csv"),
+    "zfish": ("zfish_propro.csv", "bsub_proGo.csv"),
+    "fly": ("fly_propro.csv", "fly_proGo.csv"),
+}
+
+
+class NetworkProfile:
+    """
+    Degree distributions of a real network that synthetic networks are generated to match
+
+    name {str} : name of the network
+    ppi_degree {np.ndarray} : number of protein neighbors of each protein of the interactome
+    protein_go_degree {np.ndarray} : number of go terms each annotated protein is annotated with
+    go_protein_degree {np.ndarray} : number of proteins each go term is annotated to
+    """
+
+    def __init__(self, name, ppi_degree, protein_go_degree, go_protein_degree):
+        self.name = name
+        self.ppi_degree = np.asarray(ppi_degree, dtype=np.int64)
+        self.protein_go_degree = np.asarray(protein_go_degree, dtype=np.int64)
+        self.go_protein_degree = np.asarray(go_protein_degree, dtype=np.int64)
+
+    @property
+    def protein_count(self):
+        return len(self.ppi_degree)
+
+    @property
+    def go_count(self):
+        return len(self.go_protein_degree)
+
+    @classmethod
+    def from_files(cls, name, interactome_path, go_association_path):
+        """
+        Degree distributions of the network in an interactome file (protein1, protein2) and a go association file
+        (protein, relationship_type, go_term, ...)
+        """
+        interactome = pd.read_csv(interactome_path, usecols=[0, 1], dtype=str)
+        ppi_degree = pd.concat(
+            [interactome.iloc[:, 0], interactome.iloc[:, 1]]
+        ).value_counts()
+        annotations = pd.read_csv(go_association_path, usecols=[0, 2], dtype=str)
+        return cls(
+            name,
+            ppi_degree.to_numpy(),
+            annotations.iloc[:, 0].value_counts().to_numpy(),
+            annotations.iloc[:, 1].value_counts().to_numpy(),
+        )
+
+
+def available_profiles():
+    """
+    Names of the profiles whose network files are in the network directory
+    """
+    return [
+        name
+        for name, files in PROFILE_FILES.items()
+        if all(Path(NETWORK_DIRECTORY, file).exists() for file in files)
+    ]
+
+
+def load_profile(name):
+    interactome_file, go_association_file = PROFILE_FILES[name]
+    return NetworkProfile.from_files(
+        name,
+        Path(NETWORK_DIRECTORY, interactome_file),
+        Path(NETWORK_DIRECTORY, go_association_file),
+    )
+
+
+def generate_network(profile, scale=1.0, seed=0):
+    """
+    Generate a random network with the degree distributions of a profile. The network has scale times as many
+    proteins as the profile. Each protein draws its protein degree from the profile and the edges are wired
+    between proteins with probability proportional to their degree (a Chung-Lu graph). Annotated proteins draw
+    their number of go terms from the profile and go terms are picked with probability proportional to a go term
+    size drawn from the profile.
+
+    Parameters:
+    profile {NetworkProfile} : the degree distributions to match
+    scale {float} : size of the network relative to the profile
+    seed {int} : seed of the random generator, the same seed gives the same network
+
+    Returns:
+    interactome {list} : rows of [protein, protein] as returned by read_specific_columns
+    go_protein_pairs {list} : rows of [protein, go term, namespace] as returned by read_pro_go_data
+    """
+    rng = np.random.default_rng(seed)
+    protein_count = max(int(round(profile.protein_count * scale)), 2)
+    go_count = max(int(round(profile.go_count * scale)), 1)
+    protein_ids = np.array([f"P{i}" for i in range(protein_count)], dtype=object)
+    go_ids = np.array([f"GO:{i:07d}" for i in range(go_count)], dtype=object)
+
+    degree = rng.choice(profile.ppi_degree, protein_count)
+    edge_count = int(degree.sum()) // 2
+    weight = degree / degree.sum()
+    source = rng.choice(protein_count, edge_count, p=weight)
+    target = rng.choice(protein_count, edge_count, p=weight)
+    interactome = np.stack([protein_ids[source], protein_ids[target]], axis=1)
+
+    # the same share of proteins is annotated as in the profile
+    annotated_count = max(
+        int(round(protein_count * len(profile.protein_go_degree) / profile.protein_count)), 1
+    )
+    annotated = rng.choice(protein_count, min(annotated_count, protein_count), replace=False)
+    go_degree = np.minimum(rng.choice(profile.protein_go_degree, len(annotated)), go_count)
+    go_size = rng.choice(profile.go_protein_degree, go_count)
+    pair_protein = np.repeat(annotated, go_degree)
+    pair_go = rng.choice(go_count, len(pair_protein), p=go_size / go_size.sum())
+    # a protein is annotated with a go term once
+    pairs = np.unique(np.stack([pair_protein, pair_go], axis=1), axis=0)
+    namespace = rng.choice(np.array(NAMESPACES, dtype=object), go_count)
+
+    go_protein_pairs = np.stack(
+        [protein_ids[pairs[:, 0]], go_ids[pairs[:, 1]], namespace[pairs[:, 1]]], axis=1
+    )
+    return interactome.tolist(), go_protein_pairs.tolist()
@@ -1,9 +1,14 @@
 from abc import ABC, abstractmethod
 from typing import Any
+import numpy as np
 
 
 # this is the class that all algorithms need to inherit
 class BaseAlgorithm(ABC):
+    # graph structures the algorithm reads, names from tools.graph.GRAPH_STRUCTURES. The workflow computes the
+    # structures of all algorithms of a run once, before any of them runs, and shares them between the algorithms
+    requires = ()
+
     # two attributes that each algorithm must have
     def __init__(self):
         self.y_true = None
@@ -13,3 +18,40 @@ class BaseAlgorithm(ABC):
     @abstractmethod
     def predict(self):
         pass
+
+    # a batch scoring method, algorithms that implement it can score any number of protein and go term
+    # pairs with array operations instead of one pair at a time
+    def score_pairs(self, graph, proteins, go_terms):
+        """
+        Score protein and go term pairs in one batch. proteins and go_terms broadcast against each other, a
+        column of proteins (shape (n, 1)) and a row of go terms (shape (1, m)) score every combination.
+
+        Parameters:
+        graph {CSRGraph} : CSR index of the interactome and go term connections
+        proteins {array} : protein ids of the pairs
+        go_terms {array} : go term ids of the pairs
+
+        Returns:
+        scores {np.ndarray} : one score per pair
+        """
+        raise NotImplementedError(
+            f"{type(self).__name__} does not implement batch scoring"
+        )
+
+    # full proteome prediction, scores every protein against every go term instead of sampled pairs
+    def score_matrix(self, graph, proteins, go_terms):
+        """
+        Score every protein against every go term
+
+        Parameters:
+        graph {CSRGraph} : CSR index of the interactome and go term connections
+        proteins {array} : protein ids
+        go_terms {array} : go term ids
+
+        Returns:
+        scores {np.ndarray} : matrix of shape (len(proteins), len(go_terms))
+        """
+        proteins = np.asarray(proteins, dtype=object).reshape(-1, 1)
+        go_terms = np.asarray(go_terms, dtype=object).reshape(1, -1)
+        scores = self.score_pairs(graph, proteins, go_terms)
+        return np.broadcast_to(scores, (proteins.shape[0], go_terms.shape[1]))
@@ -1,18 +1,31 @@
 from classes.base_algorithm_class import BaseAlgorithm
-import networkx as nx
-import pandas as pd
+import numpy as np
 from colorama import init as colorama_init
 from colorama import Fore, Back, Style
 from pathlib import Path
-import math
-from tools.helper import print_progress, normalize, import_graph_from_pickle
-from tools.workflow import get_datasets
+from tools.helper import normalize
+from tools.features import extract_pair_features
+from tools.hypergeometric import hypergeometric_score
+from tools.graph import get_csr_graph
+from tools.dataset import get_replicate_dataset
+from tools.instrumentation import stage
+from tools.output import write_scores
 
 
 class HypergeometricDistributionV2(BaseAlgorithm):
-    def __init__(self):
+    requires = (
+        "degrees",
+        "go_adjacency",
+        "annotated_neighbor_counts",
+        "hypergeometric_stats",
+    )
+
+    # mode "pmf" scores a pair by the probability of exactly the observed overlap, "sf" by the probability of
+    # at least the observed overlap (upper tail p-value)
+    def __init__(self, mode="pmf"):
         self.y_score = []
         self.y_true = []
+        self.mode = mode
 
     def get_y_score(self):
         return self.y_score
@@ -33,6 +46,8 @@ class HypergeometricDistributionV2(BaseAlgorithm):
         output_path,
         rep_num,
         name,
+        graph=None,
+        dataset=None,
     ):
         """
         Uses a Hypergeometric distribution to calculate a confidence value for the relationship between a protein of 
@@ -45,128 +60,60 @@ class HypergeometricDistributionV2(BaseAlgorithm):
         # 50% of the data are proteins that are annotated to a GO term
         # 50% of the data are proteins that are not annotated to a GO term
 
-        data = {
-            "protein": [],
-            "go_term": [],
-            "pro_pro_neighbor": [],
-            "go_neighbor": [],
-            "go_annotated_pro_pro_neighbors": [],
-            "score": [],
-            "norm_score": [],
-            "true_label": [],
-        }
+        with stage("load_dataset"):
+            dataset = get_replicate_dataset(dataset, input_directory_path, rep_num, name)
+        with stage("load_graph"):
+            graph = get_csr_graph(graph, graph_file_path)
 
-        positive_dataset, negative_dataset = get_datasets(input_directory_path, rep_num, name)
-        G = import_graph_from_pickle(graph_file_path)
-
-        i = 1
-        for positive_protein, positive_go, negative_protein, negative_go in zip(
-            positive_dataset["protein"],
-            positive_dataset["go"],
-            negative_dataset["protein"],
-            negative_dataset["go"],
-        ):
-
-            # calculate the score for the positive set
-            positive_pro_pro_neighbor = get_neighbors(
-                G, positive_protein, "protein_protein"
-            )
-            positive_go_neighbor = get_neighbors(G, positive_go, "protein_go_term")
-            positive_go_annotated_pro_pro_neighbor_count = (
-                get_go_annotated_pro_pro_neighbor_count(
-                    G, positive_pro_pro_neighbor, positive_go
-                )
-            )
-
-            c = 1
-            if G.has_edge(positive_protein, positive_protein):
-                c = 0
-                
-            N = len([x for x,y in G.nodes(data=True) if y['type']=="protein"]) #Total number of protein nodes in the entire graph
-            pos_n = len(positive_pro_pro_neighbor) + c #Number of protein neighbors the protein of interest has (includes the protein of interest)
-            K = len(positive_go_neighbor) #Number of protein neighbors the GO term of interest has, same for pos & neg
-            pos_k = positive_go_annotated_pro_pro_neighbor_count + c #The overlap between the GO protein neighbors and protein neighbors of the protein of interest (includes the protein of interest)
-
-            #The hypergeometric function using variables above, math.comb(n,k) is an n choose k function
-            positive_score = 1 - ((math.comb(K,pos_k)*math.comb(N-K,pos_n-pos_k))/math.comb(N,pos_n))
-
-            # calculate the score for the negative set
-            negative_pro_pro_neighbor = get_neighbors(
-                G, negative_protein, "protein_protein"
-            )
-            negative_go_neighbor = get_neighbors(G, negative_go, "protein_go_term")
-            negative_go_annotated_protein_neighbor_count = (
-                get_go_annotated_pro_pro_neighbor_count(
-                    G, negative_pro_pro_neighbor, negative_go
-                )
-            )
-
-            c = 1
-            if G.has_edge(negative_protein, negative_protein):
-                c = 0
-                
-            neg_n = len(negative_pro_pro_neighbor) + c #Negative protein of interest neighbors (includes self)
-            neg_k = negative_go_annotated_protein_neighbor_count #Overlap betweesn go neighbors and protein neighbors (should be fewer for neg than pos)
-
-            negative_score = 1 - ((math.comb(K,neg_k)*math.comb(N-K,neg_n-neg_k))/math.comb(N,neg_n))
-
-            # input positive and negative score to data
-            data["protein"].append(positive_protein)
-            data["go_term"].append(positive_go)
-            data["pro_pro_neighbor"].append(len(positive_pro_pro_neighbor))
-            data["go_neighbor"].append(len(positive_go_neighbor))
-            data["go_annotated_pro_pro_neighbors"].append(
-                positive_go_annotated_pro_pro_neighbor_count
-            )
-            data["score"].append(positive_score)
-            data["true_label"].append(1)
-
-            data["protein"].append(negative_protein)
-            data["go_term"].append(negative_go)
-            data["pro_pro_neighbor"].append(len(negative_pro_pro_neighbor))
-            data["go_neighbor"].append(len(negative_go_neighbor))
-            data["go_annotated_pro_pro_neighbors"].append(
-                negative_go_annotated_protein_neighbor_count
-            )
-            data["score"].append(negative_score)
-            data["true_label"].append(0)
-
-            print_progress(i, len(positive_dataset["protein"]))
-            i += 1
-
-        normalized_data = normalize(data["score"])
-        for item in normalized_data:
-            data["norm_score"].append(item)
-
-        df = pd.DataFrame(data)
-        df = df.sort_values(by="norm_score", ascending=False)
-
-        df.to_csv(
-            Path(output_path, "hypergeometric_distribution_V2.csv"),
-            index=False,
-            sep="\t",
+        # score the positive and negative pairs in one batch
+        proteins, go_terms, true_label = (
+            dataset.proteins,
+            dataset.go_terms,
+            dataset.true_label,
         )
+        # the features of the replicate's pairs are gathered once and shared by the neighbor based algorithms
+        with stage("features"):
+            features = graph.pair_features(dataset)
+        with stage("score"):
+            data = self._get_feature_data(graph, proteins, go_terms, features)
+            data["norm_score"] = normalize(data["score"])
+        data["true_label"] = true_label
 
-        y_score = df["norm_score"].to_list()
-        y_true = df["true_label"].to_list()
-
-        return y_score, y_true
+        # the output file is written as set by the output policy, by the background writer during a workflow run
+        with stage("write_output"):
+            write_scores(Path(output_path, "hypergeometric_distribution_V2.csv"), data)
 
+        y_score = np.asarray(data["norm_score"])
+        y_true = np.asarray(true_label)
 
-def get_neighbors(G: nx.Graph, node, edgeType):
-    res = G.edges(node, data=True)
-    neighbors = []
-    for edge in res:
-        if edge[2]["type"] == edgeType:
-            neighborNode = [edge[1], edge[2]]
-            neighbors.append(neighborNode)
-
-    return neighbors
+        return y_score, y_true
 
+    def score_pairs(self, graph, proteins, go_terms):
+        """
+        Score protein and go term pairs in one batch with the hypergeometric distribution, including the protein of interest
+        """
+        return self._get_pair_data(graph, proteins, go_terms)["score"]
 
-def get_go_annotated_pro_pro_neighbor_count(G: nx.Graph, nodeList, goTerm):
-    count = 0
-    for element in nodeList:
-        if G.has_edge(element[0], goTerm):
-            count += 1
-    return count
\ No newline at end of file
+    def _get_pair_data(self, graph, proteins, go_terms):
+        features = extract_pair_features(
+            graph, graph.get_protein_codes(proteins), graph.get_go_codes(go_terms)
+        )
+        return self._get_feature_data(graph, proteins, go_terms, features)
+
+    def _get_feature_data(self, graph, proteins, go_terms, features):
+        # N comes from the graph statistics computed when the graph was built, the rest from the pair features
+        N = graph.stats.protein_count #Total number of protein nodes in the entire graph
+        n = features.pro_pro_neighbor - features.self_loop + 1 #Number of protein neighbors the protein of interest has (includes the protein of interest)
+        K = features.go_neighbor #Number of protein neighbors the GO term of interest has
+        k = features.go_annotated_pro_pro_neighbors - (features.self_loop & features.annotated) + features.annotated #The overlap between the GO protein neighbors and protein neighbors of the protein of interest (includes the protein of interest if it is annotated)
+
+        score = hypergeometric_score(N, K, n, k, self.mode, graph.log_factorial)
+
+        return {
+            "protein": proteins,
+            "go_term": go_terms,
+            "pro_pro_neighbor": features.pro_pro_neighbor,
+            "go_neighbor": features.go_neighbor,
+            "go_annotated_pro_pro_neighbors": features.go_annotated_pro_pro_neighbors,
+            "score": score,
+        }
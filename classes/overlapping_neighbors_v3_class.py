@@ -1,12 +1,21 @@
 from classes.base_algorithm_class import BaseAlgorithm
-import networkx as nx
-import pandas as pd
-from tools.helper import normalize, print_progress, import_graph_from_pickle
+import numpy as np
+from tools.helper import normalize
+from tools.graph import get_csr_graph
+from tools.features import extract_pair_features
+from tools.overlapping_neighbors import (
+    overlapping_neighbors_feature_data,
+    overlapping_neighbors_score_matrix,
+)
 from pathlib import Path
-from tools.workflow import get_datasets
+from tools.dataset import get_replicate_dataset
+from tools.instrumentation import stage
+from tools.output import write_scores
 
 
 class OverlappingNeighborsV3(BaseAlgorithm):
+    requires = ("degrees", "go_adjacency", "annotated_neighbor_counts")
+
     def __init__(self):
         self.y_score = []
         self.y_true = []
@@ -30,6 +39,8 @@ class OverlappingNeighborsV3(BaseAlgorithm):
         output_path,
         rep_num,
         name,
+        graph=None,
+        dataset=None,
     ):
         """
         evaluate overlapping neighbors method on a protein protein interaction network with go term annotation.
@@ -41,114 +52,57 @@ class OverlappingNeighborsV3(BaseAlgorithm):
         # 50% of the data are proteins that are not annotated to a GO term
         # score equation (1 + number of ProProNeighbor that are annotated to the go term) / (number of ProProNeighbor + number of GoNeighbor)
 
-        data = {
-            "protein": [],
-            "go_term": [],
-            "pro_pro_neighbor": [],
-            "go_neighbor": [],
-            "go_annotated_pro_pro_neighbors": [],
-            "score": [],
-            "norm_score": [],
-            "true_label": [],
-        }
-        i = 1
-
-        positive_dataset, negative_dataset = get_datasets(input_directory_path, rep_num, name)
-        G = import_graph_from_pickle(graph_file_path)
-
-        for positive_protein, positive_go, negative_protein, negative_go in zip(
-            positive_dataset["protein"],
-            positive_dataset["go"],
-            negative_dataset["protein"],
-            negative_dataset["go"],
-        ):
-            c = 0
-            if G.has_edge(positive_protein, positive_protein):
-                c = 1
-            # calculate the score for the positive set
-            positive_pro_pro_neighbor = get_neighbors(
-                G, positive_protein, "protein_protein"
-            )
-            positive_go_neighbor = get_neighbors(G, positive_go, "protein_go_term")
-            positive_go_annotated_pro_pro_neighbor_count = (
-                get_go_annotated_pro_pro_neighbor_count(
-                    G, positive_pro_pro_neighbor, positive_go
-                )
-            ) - c
-            positive_score = positive_go_annotated_pro_pro_neighbor_count + (
-                1 + positive_go_annotated_pro_pro_neighbor_count
-            ) / (len(positive_go_neighbor))
-
-            # calculate the score for the negative set
-            negative_pro_pro_neighbor = get_neighbors(
-                G, negative_protein, "protein_protein"
-            )
-            negative_go_neighbor = get_neighbors(G, negative_go, "protein_go_term")
-            negative_go_annotated_pro_pro_neighbor_count = (
-                get_go_annotated_pro_pro_neighbor_count(
-                    G, negative_pro_pro_neighbor, negative_go
-                )
-            ) 
-            negative_score = negative_go_annotated_pro_pro_neighbor_count + (
-                1 + negative_go_annotated_pro_pro_neighbor_count
-            ) / (len(negative_go_neighbor))
-
-            # input positive and negative score to data
-            data["protein"].append(positive_protein)
-            data["go_term"].append(positive_go)
-            data["pro_pro_neighbor"].append(len(positive_pro_pro_neighbor))
-            data["go_neighbor"].append(len(positive_go_neighbor))
-            data["go_annotated_pro_pro_neighbors"].append(
-                positive_go_annotated_pro_pro_neighbor_count
-            )
-            data["score"].append(positive_score)
-            data["true_label"].append(1)
-
-            data["protein"].append(negative_protein)
-            data["go_term"].append(negative_go)
-            data["pro_pro_neighbor"].append(len(negative_pro_pro_neighbor))
-            data["go_neighbor"].append(len(negative_go_neighbor))
-            data["go_annotated_pro_pro_neighbors"].append(
-                negative_go_annotated_pro_pro_neighbor_count
-            )
-            data["score"].append(negative_score)
-            data["true_label"].append(0)
-
-            print_progress(i, len(positive_dataset["protein"]))
-            i += 1
-
-        normalized_data = normalize(data["score"])
-        for item in normalized_data:
-            data["norm_score"].append(item)
-
-        df = pd.DataFrame(data)
-        df = df.sort_values(by="norm_score", ascending=False)
-
-        df.to_csv(
-            Path(output_path, "overlapping_neighbor_v3_data.csv"),
-            index=False,
-            sep="\t",
+        with stage("load_dataset"):
+            dataset = get_replicate_dataset(dataset, input_directory_path, rep_num, name)
+        with stage("load_graph"):
+            graph = get_csr_graph(graph, graph_file_path)
+
+        # score the positive and negative pairs in one batch
+        proteins, go_terms, true_label = (
+            dataset.proteins,
+            dataset.go_terms,
+            dataset.true_label,
         )
+        # the features of the replicate's pairs are gathered once and shared by the neighbor based algorithms
+        with stage("features"):
+            features = graph.pair_features(dataset)
+        with stage("score"):
+            data = self._get_feature_data(graph, proteins, go_terms, features)
+            data["norm_score"] = normalize(data["score"])
+        data["true_label"] = true_label
+
+        # the output file is written as set by the output policy, by the background writer during a workflow run
+        with stage("write_output"):
+            write_scores(Path(output_path, "overlapping_neighbor_v3_data.csv"), data)
 
-        y_score = df["norm_score"].to_list()
-        y_true = df["true_label"].to_list()
+        y_score = np.asarray(data["norm_score"])
+        y_true = np.asarray(true_label)
 
         return y_score, y_true
 
-def get_neighbors(G: nx.Graph, node, edgeType):
-    res = G.edges(node, data=True)
-    neighbors = []
-    for edge in res:
-        if edge[2]["type"] == edgeType:
-            neighborNode = [edge[1], edge[2]]
-            neighbors.append(neighborNode)
+    def score_pairs(self, graph, proteins, go_terms):
+        """
+        Score protein and go term pairs in one batch with the overlapping neighbors v3 score equation
+        """
+        return self._get_pair_data(graph, proteins, go_terms)["score"]
 
-    return neighbors
+    def score_matrix(self, graph, proteins, go_terms):
+        """
+        Score every protein against every go term with the overlapping neighbors v3 score equation
+        """
+        return overlapping_neighbors_score_matrix(
+            graph,
+            graph.get_protein_codes(proteins),
+            graph.get_go_codes(go_terms),
+            version="v3",
+        )
 
+    def _get_pair_data(self, graph, proteins, go_terms):
+        features = extract_pair_features(
+            graph, graph.get_protein_codes(proteins), graph.get_go_codes(go_terms)
+        )
+        return self._get_feature_data(graph, proteins, go_terms, features)
 
-def get_go_annotated_pro_pro_neighbor_count(G: nx.Graph, nodeList, goTerm):
-    count = 0
-    for element in nodeList:
-        if G.has_edge(element[0], goTerm):
-            count += 1
-    return count
+    def _get_feature_data(self, graph, proteins, go_terms, features):
+        data = overlapping_neighbors_feature_data(features, version="v3")
+        return {"protein": proteins, "go_term": go_terms, **data}
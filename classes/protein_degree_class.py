@@ -1,15 +1,18 @@
 from classes.base_algorithm_class import BaseAlgorithm
-import networkx as nx
-import pandas as pd
 import numpy as np
 from colorama import init as colorama_init
 from colorama import Fore, Back, Style
 from pathlib import Path
-from tools.helper import print_progress, normalize, import_graph_from_pickle
-from tools.workflow import get_datasets
+from tools.helper import normalize
+from tools.graph import get_csr_graph
+from tools.dataset import get_replicate_dataset
+from tools.instrumentation import stage
+from tools.output import write_scores
 
 
 class ProteinDegree(BaseAlgorithm):
+    requires = ("degrees",)
+
     def __init__(self):
         self.y_score = []
         self.y_true = []
@@ -33,63 +36,55 @@ class ProteinDegree(BaseAlgorithm):
         output_path,
         rep_num,
         name,
+        graph=None,
+        dataset=None,
     ):
         colorama_init()
-        data = {
-            "protein": [],
-            "go_term": [],
-            "degree": [],
-            "norm_score": [],
-            "true_label": [],
-        }
-
-        positive_dataset, negative_dataset = get_datasets(input_directory_path, rep_num, name)
-        G = import_graph_from_pickle(graph_file_path)
-
-        i = 1
-        for positive_protein, positive_go, negative_protein, negative_go in zip(
-            positive_dataset["protein"],
-            positive_dataset["go"],
-            negative_dataset["protein"],
-            negative_dataset["go"],
-        ):
-
-            c = 0 
-            if G.has_edge(positive_protein, positive_protein):
-                c = 1
-            data["protein"].append(positive_protein)
-            data["go_term"].append(positive_go)
-            data["degree"].append(G.degree(positive_protein) - c)
-            data["true_label"].append(1)
-
-            c = 0
-            if G.has_edge(negative_protein, negative_protein):
-                c = 1
-            data["protein"].append(negative_protein)
-            data["go_term"].append(negative_go)
-            data["degree"].append(G.degree(negative_protein) - c)
-            data["true_label"].append(0)
-            print_progress(i, len(positive_dataset["protein"]))
-            i += 1
-
-        normalized_data = normalize(data["degree"])
-        for item in normalized_data:
-            data["norm_score"].append(item)
-
-        df = pd.DataFrame(data)
-        df = df.sort_values(by="norm_score", ascending=False)
-
-        df.to_csv(
-            Path(output_path, "protein_degree_data.csv"),
-            index=False,
-            sep="\t",
+        with stage("load_dataset"):
+            dataset = get_replicate_dataset(dataset, input_directory_path, rep_num, name)
+        with stage("load_graph"):
+            graph = get_csr_graph(graph, graph_file_path)
+
+        # score the positive and negative pairs in one batch
+        proteins, go_terms, true_label = (
+            dataset.proteins,
+            dataset.go_terms,
+            dataset.true_label,
         )
+        with stage("score"):
+            data = self._get_pair_data(graph, proteins, go_terms)
+            data["norm_score"] = normalize(data["degree"])
+        data["true_label"] = true_label
 
-        y_score = df["norm_score"].to_list()
-        y_true = df["true_label"].to_list()
+        # the output file is written as set by the output policy, by the background writer during a workflow run
+        with stage("write_output"):
+            write_scores(Path(output_path, "protein_degree_data.csv"), data)
+
+        y_score = np.asarray(data["norm_score"])
+        y_true = np.asarray(true_label)
 
         return y_score, y_true
 
+    def score_pairs(self, graph, proteins, go_terms):
+        """
+        Score protein and go term pairs in one batch with the degree of the protein
+        """
+        return self._get_pair_data(graph, proteins, go_terms)["degree"]
+
+    def _get_pair_data(self, graph, proteins, go_terms):
+        protein_codes = graph.get_protein_codes(proteins)
+
+        # c is 1 for proteins with an edge to themselves
+        c = graph.self_loop[protein_codes].astype(int)
+        degree = graph.degree(protein_codes) - c
+
+        return {
+            "protein": proteins,
+            "go_term": go_terms,
+            "degree": degree,
+        }
+
+
 def normalize(data):
     data = np.array(data)
     min_val = data.min()
@@ -99,4 +94,4 @@ def normalize(data):
         return np.zeros_like(data)
 
     normalized_data = (data - min_val) / (max_val - min_val)
-    return normalized_data.tolist()
+    return normalized_data
@@ -0,0 +1,85 @@
+from importlib import import_module
+
+# algorithm name -> "module:class", a class is only imported when it is asked for, so a run loads the dependencies
+# of the algorithms it uses and nothing else
+ALGORITHMS = {
+    "OverlappingNeighbors": "classes.overlapping_neighbors_class:OverlappingNeighbors",
+    "OverlappingNeighborsV2": "classes.overlapping_neighbors_v2_class:OverlappingNeighborsV2",
+    "OverlappingNeighborsV3": "classes.overlapping_neighbors_v3_class:OverlappingNeighborsV3",
+    "ProteinDegree": "classes.protein_degree_class:ProteinDegree",
+    "ProteinDegreeV2": "classes.protein_degree_v2_class:ProteinDegreeV2",
+    "ProteinDegreeV3": "classes.protein_degree_v3_class:ProteinDegreeV3",
+    "SampleAlgorithm": "classes.sample_algorithm:SampleAlgorithm",
+    "HypergeometricDistribution": "classes.hypergeometric_distribution_class:HypergeometricDistribution",
+    "HypergeometricDistributionV2": "classes.hypergeometric_distribution_class_V2:HypergeometricDistributionV2",
+}
+
+
+def register_algorithm(name, target):
+    """
+    Add an algorithm to the registry, e.g. one defined outside of the classes package
+
+    Parameters:
+    name {str} : name of the algorithm
+    target {str} : "module:class" of the algorithm's class, the module is imported when the algorithm is used
+    """
+    if ":" not in target:
+        raise ValueError(f"algorithm target {target} is not of the form module:class")
+    ALGORITHMS[name] = target
+
+
+def algorithm_names():
+    """
+    Names of all registered algorithms, without importing them
+    """
+    return list(ALGORITHMS.keys())
+
+
+def get_algorithm_class(name):
+    """
+    Import and return the class of a registered algorithm
+
+    Parameters:
+    name {str} : name of the algorithm, one of algorithm_names
+
+    Returns:
+    the algorithm's class
+    """
+    if name not in ALGORITHMS:
+        raise ValueError(f"unknown algorithm {name}, choose from {algorithm_names()}")
+    module_name, class_name = ALGORITHMS[name].split(":")
+    return getattr(import_module(module_name), class_name)
+
+
+def get_algorithm_classes(names=None):
+    """
+    The algorithm_classes dictionary run_workflow takes, of the given algorithms or of all registered ones
+
+    Parameters:
+    names {list} : names of the algorithms to import, all registered algorithms if None
+
+    Returns:
+    algorithm_classes {dict} : algorithm names as keys and their classes as values
+    """
+    if names is None:
+        names = algorithm_names()
+    return {name: get_algorithm_class(name) for name in names}
+
+
+def algorithm_requirements(algorithm_classes):
+    """
+    The graph structures the algorithms of a run declared in their requires attribute, each listed once in order
+    of first appearance
+
+    Parameters:
+    algorithm_classes {dict} : algorithm names as keys and their classes as values
+
+    Returns:
+    requirements {list} : names of structures in tools.graph.GRAPH_STRUCTURES
+    """
+    requirements = []
+    for algorithm_class in algorithm_classes.values():
+        for requirement in getattr(algorithm_class, "requires", ()):
+            if requirement not in requirements:
+                requirements.append(requirement)
+    return requirements
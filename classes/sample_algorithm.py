@@ -1,15 +1,18 @@
 from classes.base_algorithm_class import BaseAlgorithm
-import networkx as nx
-import pandas as pd
+import numpy as np
 from colorama import init as colorama_init
 from colorama import Fore, Back, Style
 from pathlib import Path
-from tools.helper import print_progress, normalize, import_graph_from_pickle
-import random
-from tools.workflow import get_datasets
+from tools.helper import normalize
+from tools.graph import get_csr_graph
+from tools.dataset import get_replicate_dataset
+from tools.instrumentation import stage
+from tools.output import write_scores
 
 
 class SampleAlgorithm(BaseAlgorithm):
+    requires = ()
+
     def __init__(self):
         self.y_score = []
         self.y_true = []
@@ -33,66 +36,51 @@ class SampleAlgorithm(BaseAlgorithm):
         output_data_directory,
         rep_num,
         name,
+        graph=None,
+        dataset=None,
     ):
         """
         evaluate a random approach method on a protein protein interaction network with go term annotation.
         """
-        # initialize an objext that will hold the prediction data
-        data = {
-            "protein": [],
-            "go_term": [],
-            "score": [],
-            "norm_score": [],
-            "true_label": [],
-        }
-
-        positive_dataset, negative_dataset = get_datasets(input_directory_path, rep_num, name)
-        G = import_graph_from_pickle(graph_file_path)
-
-        i = 1
-        # iterate through the positive and negative dataset and calculate the method's prediction score
-        for positive_protein, positive_go, negative_protein, negative_go in zip(
-            positive_dataset["protein"],
-            positive_dataset["go"],
-            negative_dataset["protein"],
-            negative_dataset["go"],
-        ):
-            # prediction logic for the positive and negative data set entry
-            positive_score = random.random()
-            negative_score = random.random()
-
-            # input the positive data
-            data["protein"].append(positive_protein)
-            data["go_term"].append(positive_go)
-            data["score"].append(positive_score)
-            data["true_label"].append(1)
-
-            # input the negative data
-            data["protein"].append(negative_protein)
-            data["go_term"].append(negative_go)
-            data["score"].append(negative_score)
-            data["true_label"].append(0)
-            print_progress(i, len(positive_dataset["protein"]))
-            i += 1
-
-        # need to normalise the data
-        normalized_data = normalize(data["score"])
-        for item in normalized_data:
-            data["norm_score"].append(item)
+        with stage("load_dataset"):
+            dataset = get_replicate_dataset(dataset, input_directory_path, rep_num, name)
+        # use the graph the workflow already loaded, graph_file_path is only read when predict runs on its own
+        with stage("load_graph"):
+            graph = get_csr_graph(graph, graph_file_path)
+
+        # combine the positive and negative dataset into arrays of pairs and calculate the method's prediction
+        # score for all of them in one batch
+        proteins, go_terms, true_label = (
+            dataset.proteins,
+            dataset.go_terms,
+            dataset.true_label,
+        )
+        with stage("score"):
+            data = {
+                "protein": proteins,
+                "go_term": go_terms,
+                "score": self.score_pairs(graph, proteins, go_terms),
+            }
 
-        # convert the data to a pandas dataframe and sort by highest norm_score to lowest
-        df = pd.DataFrame(data)
-        df = df.sort_values(by="norm_score", ascending=False)
+            # need to normalise the data
+            data["norm_score"] = normalize(data["score"])
+        data["true_label"] = true_label
 
-        # output the result data
-        df.to_csv(
-            Path(output_data_directory, "sample_algorithm_data.csv"),
-            index=False,
-            sep="\t",
-        )
+        # the output file is written as set by the output policy, by the background writer during a workflow run
+        with stage("write_output"):
+            write_scores(Path(output_data_directory, "sample_algorithm_data.csv"), data)
 
         # ALWAYS set the class attribute variables to the norm_score and true_label
-        y_score = df["norm_score"].to_list()
-        y_true = df["true_label"].to_list()
+        y_score = np.asarray(data["norm_score"])
+        y_true = np.asarray(true_label)
 
         return y_score, y_true
+
+    def score_pairs(self, graph, proteins, go_terms):
+        """
+        Score protein and go term pairs in one batch, returns a numpy array with one score per pair
+        """
+        # prediction logic for all pairs at once
+        return np.random.random(
+            np.broadcast(np.asarray(proteins), np.asarray(go_terms)).shape
+        )
@@ -1,32 +1,98 @@
-from classes.overlapping_neighbors_class import OverlappingNeighbors
-from classes.overlapping_neighbors_v2_class import OverlappingNeighborsV2
-from classes.overlapping_neighbors_v3_class import OverlappingNeighborsV3
-from classes.protein_degree_class import ProteinDegree
-from classes.protein_degree_v2_class import ProteinDegreeV2
-from classes.protein_degree_v3_class import ProteinDegreeV3
-from classes.sample_algorithm import SampleAlgorithm
-from classes.hypergeometric_distribution_class import HypergeometricDistribution
-from classes.hypergeometric_distribution_class_V2 import HypergeometricDistributionV2
-
-import matplotlib.pyplot as plt
-from random import sample
 from pathlib import Path
+import argparse
 import os
 import sys
-import pandas as pd
-import statistics as stat
-from colorama import init as colorama_init
-from tools.helper import (
-    create_ppi_network,
-    read_specific_columns,
-    export_graph_to_pickle,
-    read_pro_go_data,
-)
-from tools.workflow import run_workflow
-
-
-def main():
+from classes.registry import algorithm_names, get_algorithm_class, get_algorithm_classes
+
+# the heavy dependencies (pandas, networkx, matplotlib) are imported inside the mode that needs them, so e.g. a
+# predict run does not load matplotlib
+
+
+def get_namespace_name(go_term_type):
+    """
+    Short name of the chosen go term namespaces, part of the dataset file names
+    """
+    short_name = ""
+    if "molecular_function" in go_term_type:
+        short_name = short_name + "_mol"
+    if "biological_process" in go_term_type:
+        short_name = short_name + "_bio"
+    if "cellular_component" in go_term_type:
+        short_name = short_name + "_cel"
+    return short_name
+
+
+def build_graph(
+    interactome_path, go_association_path, go_term_type, graph_file_path, export_pickle=True
+):
+    """
+    Build the CSR index of the graph of an interactome and go association file and export it next to
+    graph_file_path, the directory every mode loads the graph from
+
+    Parameters:
+    export_pickle {bool} : True to also build the nx graph and save it as graph_file_path. Without it, a pickle
+        left at graph_file_path by an earlier build is removed, it would not match the export anymore.
+
+    Returns:
+    csr_graph {CSRGraph}, protein_list {list}, go_protein_pairs {np.ndarray}
+    """
+    from tools.helper import stream_ppi_network, export_graph_to_pickle
+    from tools.graph import export_csr_graph, csr_graph_directory
+
+    # the files are streamed into the CSR index a chunk of rows at a time
+    G, protein_list, go_protein_pairs, csr_graph = stream_ppi_network(
+        interactome_path, go_association_path, go_term_type, ",", networkx=export_pickle
+    )
+    if export_pickle:
+        export_graph_to_pickle(G, graph_file_path)
+    elif os.path.exists(graph_file_path):
+        os.remove(graph_file_path)
+    # memory mapped copy of the graph's CSR index, algorithms load it instead of unpickling graph.pickle
+    export_csr_graph(csr_graph, csr_graph_directory(graph_file_path))
+    return csr_graph, protein_list, go_protein_pairs
+
+
+def main(argv=None):
+    """
+    Evaluation mode, the default. Builds the graph, samples replicates and evaluates the algorithms on them, e.g.
+    python main.py evaluate --algorithms OverlappingNeighbors ProteinDegreeV2
+    """
+    from colorama import init as colorama_init
+    from tools.workflow import run_workflow
+
     colorama_init()
+    parser = argparse.ArgumentParser(
+        prog="main.py evaluate",
+        description="evaluate the algorithms on sampled replicates of the interactome and go term annotations",
+    )
+    parser.add_argument(
+        "--algorithms",
+        nargs="+",
+        default=None,
+        choices=algorithm_names(),
+        metavar="ALGORITHM",
+        help="algorithms to evaluate, all of them by default",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="+",
+        default=[],
+        choices=algorithm_names(),
+        metavar="ALGORITHM",
+        help="algorithms to profile, their .prof files and collapsed stacks are written to output/data/profiles",
+    )
+    parser.add_argument(
+        "--output",
+        default="csv",
+        choices=["none", "npz", "csv"],
+        help="score files every algorithm writes for every replicate, npz is compressed numpy arrays",
+    )
+    args = parser.parse_args(argv)
+    algorithm_classes = get_algorithm_classes(args.algorithms)
+    unknown = set(args.profile) - set(algorithm_classes)
+    if unknown:
+        parser.error(f"cannot profile {sorted(unknown)}, they are not evaluated")
+
     if not os.path.exists("output"):
         os.makedirs("output")
     if not os.path.exists("output/dataset"):
@@ -49,6 +115,16 @@ def main():
     graph_file_path = Path(dataset_directory_path, "graph.pickle")
     sample_size = 10
     repeats = 5
+    # number of processes the replicates are run on, None uses all cores
+    workers = 1
+    # seed of the sampled datasets, set it to reproduce a run, None draws a new one (printed when sampling)
+    seed = None
+    # the sampled replicates are saved in one replicate store file, True to also write them as csv files
+    export_csv = False
+    # True to time every stage of the run, the timings are written to output/data/stage_timings.csv
+    instrument = False
+    # number of bootstrap resamples of the scored pairs, adds AUC confidence intervals to the repeated auc values
+    bootstrap = 0
     new_random_lists = True
     print_graphs = True
 
@@ -60,41 +136,17 @@ def main():
     namespace = ["molecular_function", "biological_process", "cellular_component"]
     # change the go_term_type variable to include which go term namespace you want
     go_term_type = [namespace[0], namespace[1], namespace[2]]
-    short_name = ""
-    if namespace[0] in go_term_type:
-        short_name = short_name + "_mol"
-    if namespace[1] in go_term_type:
-        short_name = short_name + "_bio"
-    if namespace[2] in go_term_type:
-        short_name = short_name + "_cel"
+    short_name = get_namespace_name(go_term_type)
 
-    interactome_columns = [0, 1]
-    interactome = read_specific_columns(fly_interactome_path, interactome_columns, ",")
-
-    go_inferred_columns = [0, 2, 3]
-    go_protein_pairs = read_pro_go_data(
-        fly_go_association_path, go_inferred_columns, go_term_type, ","
+    # the evaluation only needs the CSR index, the nx graph is not built
+    graph, protein_list, go_protein_pairs = build_graph(
+        fly_interactome_path,
+        fly_go_association_path,
+        go_term_type,
+        graph_file_path,
+        export_pickle=False,
     )
 
-    protein_list = []
-
-    # if there is no graph.pickle file in the output/dataset directory, uncomment the following lines
-    G, protein_list = create_ppi_network(interactome, go_protein_pairs)
-    export_graph_to_pickle(G, graph_file_path)
-
-    # Define algorithm classes and their names
-    algorithm_classes = {
-        "OverlappingNeighbors": OverlappingNeighbors,
-        "OverlappingNeighborsV2": OverlappingNeighborsV2,
-        "OverlappingNeighborsV3": OverlappingNeighborsV3,
-        "ProteinDegree": ProteinDegree,
-        "ProteinDegreeV2": ProteinDegreeV2,
-        "ProteinDegreeV3": ProteinDegreeV3,
-        "SampleAlgorithm": SampleAlgorithm,
-        "HypergeometricDistribution": HypergeometricDistribution,
-        "HypergeometricDistributionV2": HypergeometricDistributionV2,
-    }
-
     run_workflow(
         algorithm_classes,
         go_protein_pairs,
@@ -108,10 +160,158 @@ def main():
         new_random_lists,
         short_name,
         print_graphs,
+        graph,
+        workers,
+        seed,
+        export_csv,
+        instrument,
+        args.profile,
+        bootstrap,
+        output=args.output,
     )
 
     sys.exit()
 
 
+def predict(argv=None):
+    """
+    Full proteome prediction mode, also called score. Ranks every protein of the graph built by main for each given
+    go term and writes the top k candidates to a csv file, e.g.
+    python main.py predict --algorithm OverlappingNeighbors --top-k 20 GO:0003676 GO:0043167
+    """
+    from tools.graph import load_csr_graph
+    from tools.prediction import rank_proteins
+
+    parser = argparse.ArgumentParser(
+        prog="main.py predict",
+        description="rank every protein for the given go terms and output the top k candidates",
+    )
+    parser.add_argument("go_terms", nargs="*", help="go terms to rank proteins for")
+    parser.add_argument(
+        "--go-term-file", type=Path, help="file with one go term per line, added to go_terms"
+    )
+    parser.add_argument(
+        "--algorithm",
+        default="HypergeometricDistributionV2",
+        choices=algorithm_names(),
+    )
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument(
+        "--include-annotated",
+        action="store_true",
+        help="also rank proteins already annotated with the go term",
+    )
+    parser.add_argument(
+        "--graph", type=Path, default=Path("./output/dataset/graph.pickle")
+    )
+    parser.add_argument(
+        "--output", type=Path, default=Path("./output/data/top_k_predictions.csv")
+    )
+    args = parser.parse_args(argv)
+
+    go_terms = list(args.go_terms)
+    if args.go_term_file is not None:
+        with open(args.go_term_file, "r") as file:
+            go_terms.extend(line.strip() for line in file if line.strip())
+    if not go_terms:
+        parser.error("no go terms given")
+
+    graph = load_csr_graph(args.graph)
+    # only the chosen algorithm's module is imported
+    algorithm = get_algorithm_class(args.algorithm)()
+    predictions = rank_proteins(
+        algorithm,
+        graph,
+        go_terms,
+        top_k=args.top_k,
+        exclude_annotated=not args.include_annotated,
+    )
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    predictions.to_csv(args.output, index=False, sep="\t")
+    print(predictions)
+    print("top " + str(args.top_k) + " predictions written to " + str(args.output))
+
+
+def update(argv=None):
+    """
+    Incremental graph update mode. Applies a delta file of added and removed edges to the graph built by main
+    instead of rebuilding it, e.g.
+    python main.py update network/bsub_delta.csv
+    """
+    parser = argparse.ArgumentParser(
+        prog="main.py update",
+        description="apply a delta file of added and removed edges to the persisted graph",
+    )
+    parser.add_argument(
+        "delta_file",
+        type=Path,
+        help="tab separated file with action, edge type and the two nodes of each edge",
+    )
+    parser.add_argument(
+        "--graph", type=Path, default=Path("./output/dataset/graph.pickle")
+    )
+    args = parser.parse_args(argv)
+
+    from tools.graph_update import read_graph_delta, update_graph
+
+    delta = read_graph_delta(args.delta_file)
+    graph = update_graph(args.graph, delta)
+    print("applied " + str(len(delta)) + " edge changes to " + str(args.graph))
+    print("protein node count: ", graph.protein_count)
+    print("go node count: ", graph.go_count)
+    print("graph version: ", graph.version)
+
+
+def build(argv=None):
+    """
+    Graph building mode. Builds the graph of an interactome and go association file and exports it and its CSR
+    index for the other modes, e.g.
+    python main.py build-graph --interactome network/bsub_propro.csv --go-association network/bsub_proGo.csv
+    """
+    parser = argparse.ArgumentParser(
+        prog="main.py build-graph",
+        description="build the graph of an interactome and go association file and export it",
+    )
+    parser.add_argument(
+        "--interactome", type=Path, default=Path("./network/fly_propro.csv")
+    )
+    parser.add_argument(
+        "--go-association", type=Path, default=Path("./network/fly_proGo.csv")
+    )
+    parser.add_argument(
+        "--namespaces",
+        nargs="+",
+        default=["molecular_function", "biological_process", "cellular_component"],
+        choices=["molecular_function", "biological_process", "cellular_component"],
+        help="go term namespaces to keep",
+    )
+    parser.add_argument(
+        "--graph", type=Path, default=Path("./output/dataset/graph.pickle")
+    )
+    args = parser.parse_args(argv)
+
+    args.graph.parent.mkdir(parents=True, exist_ok=True)
+    graph, protein_list, go_protein_pairs = build_graph(
+        args.interactome, args.go_association, args.namespaces, args.graph
+    )
+    print("")
+    print("graph written to " + str(args.graph))
+    print("protein node count: ", graph.protein_count)
+    print("go node count: ", graph.go_count)
+
+
+# subcommand -> mode, main.py without a subcommand evaluates
+MODES = {
+    "evaluate": main,
+    "predict": predict,
+    "score": predict,
+    "build-graph": build,
+    "update": update,
+}
+
+
 if __name__ == "__main__":
-    main()
+    if len(sys.argv) > 1 and sys.argv[1] in MODES:
+        MODES[sys.argv[1]](sys.argv[2:])
+    else:
+        main(sys.argv[1:])
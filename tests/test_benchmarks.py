@@ -0,0 +1,41 @@
+from benchmarks.run_benchmarks import _uncached_copy, setup_predict
+from benchmarks.synthetic import NetworkProfile, generate_network
+from tools.graph import CSRGraph
+from tools.helper import create_ppi_network
+from tools.sampling import PairSampler
+import numpy as np
+
+
+def test_generate_network():
+    profile = NetworkProfile("test", [1, 2, 2, 3, 8], [1, 2, 4], [1, 1, 3, 5])
+    interactome, go_protein_pairs = generate_network(profile, scale=20, seed=1)
+
+    assert (interactome, go_protein_pairs) == generate_network(profile, scale=20, seed=1)
+    assert all(len(row) == 2 for row in interactome)
+    assert all(len(row) == 3 for row in go_protein_pairs)
+    # the generated edges follow the profile's mean degree
+    assert abs(2 * len(interactome) / 100 - np.mean(profile.ppi_degree)) < 1.5
+    assert len({tuple(row[:2]) for row in go_protein_pairs}) == len(go_protein_pairs)
+
+    G, protein_list = create_ppi_network(interactome, go_protein_pairs)
+    PairSampler(go_protein_pairs, protein_list).sample(10, 0, [0])
+
+
+def test_setup_predict_times_cold_and_warm_runs(tmp_path):
+    profile = NetworkProfile("test", [1, 2, 2, 3, 8], [1, 2, 4], [1, 1, 3, 5])
+    interactome, go_protein_pairs = generate_network(profile, scale=20, seed=1)
+    cases = setup_predict(tmp_path, interactome, go_protein_pairs, sample_size=10, seed=0)
+
+    names = [name for name, _, _, _ in cases]
+    assert "predict:OverlappingNeighbors:cold" in names
+    assert "predict:OverlappingNeighbors:warm" in names
+    for _, _, _, function in cases:
+        function()
+
+    G, _ = create_ppi_network(interactome, go_protein_pairs)
+    graph = CSRGraph.from_networkx(G)
+    graph.annotated_neighbor_matrix
+    # the copy a cold run gets computes everything again
+    copy = _uncached_copy(graph)
+    assert "annotated_neighbor_matrix" not in vars(copy)
+    assert np.array_equal(copy.ppi_indices, graph.ppi_indices)
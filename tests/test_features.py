@@ -0,0 +1,67 @@
+from classes.hypergeometric_distribution_class_V2 import HypergeometricDistributionV2
+from classes.overlapping_neighbors_class import OverlappingNeighbors
+from tools.dataset import ReplicateDataset
+from tools.features import PAIR_FEATURE_COLUMNS, extract_pair_features
+from tools.graph import CSRGraph
+from tests.test_graph import build_test_network
+import numpy as np
+import pytest
+
+
+def test_extract_pair_features():
+    G, _ = build_test_network()
+    graph = CSRGraph.from_networkx(G)
+    protein_codes = np.repeat(np.arange(graph.protein_count), graph.go_count)
+    go_codes = np.tile(np.arange(graph.go_count), graph.protein_count)
+
+    features = extract_pair_features(graph, protein_codes, go_codes)
+    assert len(features) == len(protein_codes)
+    assert list(features.to_dict()) == PAIR_FEATURE_COLUMNS
+    for i, (p, g) in enumerate(zip(protein_codes, go_codes)):
+        assert features.pro_pro_neighbor[i] == graph.ppi_degree[p]
+        assert features.go_neighbor[i] == graph.go_protein_degree[g]
+        assert features.go_annotated_pro_pro_neighbors[i] == graph.annotated_neighbor_count(p, g)
+        assert features.self_loop[i] == graph.has_self_loop(p)
+        assert features.annotated[i] == graph.has_annotation(p, g)
+    assert np.array_equal(
+        features.go_annotated_neighbors_excluding_self,
+        graph.annotated_neighbor_counts(protein_codes, go_codes, include_self=False),
+    )
+
+    # the outer product of a column of proteins and a row of go terms gives the same features
+    outer = extract_pair_features(
+        graph, np.arange(graph.protein_count)[:, None], np.arange(graph.go_count)[None, :]
+    )
+    for column in PAIR_FEATURE_COLUMNS:
+        assert np.array_equal(
+            np.broadcast_to(outer[column], (graph.protein_count, graph.go_count)).ravel(),
+            features[column],
+        )
+
+    with pytest.raises(AttributeError):
+        features.annotated = None
+    assert not features.annotated.flags.writeable
+
+
+def test_pair_features_shared_per_dataset():
+    G, _ = build_test_network()
+    graph = CSRGraph.from_networkx(G)
+    dataset = ReplicateDataset(
+        {"protein": ["P1", "P2"], "go": ["GO:1", "GO:1"]},
+        {"protein": ["P4", "P4"], "go": ["GO:1", "GO:2"]},
+    )
+    features = graph.pair_features(dataset)
+    assert graph.pair_features(dataset) is features
+    other = ReplicateDataset(
+        {"protein": ["P1"], "go": ["GO:1"]}, {"protein": ["P4"], "go": ["GO:2"]}
+    )
+    assert graph.pair_features(other) is not features
+
+    # scoring from the shared features is the same as scoring the pairs on their own
+    for algorithm in [OverlappingNeighbors(), HypergeometricDistributionV2()]:
+        assert np.array_equal(
+            algorithm.score_pairs(graph, dataset.proteins, dataset.go_terms),
+            algorithm._get_feature_data(
+                graph, dataset.proteins, dataset.go_terms, features
+            )["score"],
+        )
@@ -0,0 +1,283 @@
+from classes.overlapping_neighbors_class import OverlappingNeighbors
+from classes.protein_degree_v2_class import ProteinDegreeV2
+from main import build_graph
+from tools.graph import (
+    CSRGraph,
+    GraphContext,
+    export_csr_graph,
+    import_csr_graph,
+    load_csr_graph,
+)
+from tools.helper import (
+    create_ppi_network,
+    get_neighbors,
+    read_pro_go_data,
+    read_specific_columns,
+    stream_ppi_network,
+)
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def build_test_network():
+    interactome = [
+        ["P1", "P2"],
+        ["P1", "P3"],
+        ["P2", "P3"],
+        ["P3", "P4"],
+        ["P3", "P3"],
+        ["P2", "P1"],
+    ]
+    go_protein_pairs = [
+        ["P1", "GO:1"],
+        ["P2", "GO:1"],
+        ["P3", "GO:1"],
+        ["P3", "GO:2"],
+        ["P5", "GO:2"],
+    ]
+    return create_ppi_network(interactome, go_protein_pairs)
+
+
+def test_create_ppi_network():
+    G, protein_list = build_test_network()
+
+    assert [protein["id"] for protein in protein_list] == ["P1", "P2", "P3", "P4", "P5"]
+    assert list(G.nodes) == ["P1", "P2", "P3", "P4", "GO:1", "GO:2", "P5"]
+    assert G.nodes["GO:1"] == {"type": "go_term"}
+    assert G.nodes["P5"] == {"name": "P5", "type": "protein"}
+    assert G.number_of_edges() == 10
+    assert G.edges["P3", "P3"]["type"] == "protein_protein"
+    assert G.edges["GO:2", "P5"]["type"] == "protein_go_term"
+
+
+def assert_same_csr_graph(graph, expected):
+    assert list(graph.protein_ids) == list(expected.protein_ids)
+    assert list(graph.go_ids) == list(expected.go_ids)
+    for array_name in ["ppi_indptr", "ppi_indices", "pg_indptr", "pg_indices", "gp_indptr", "gp_indices"]:
+        assert np.array_equal(getattr(graph, array_name), getattr(expected, array_name))
+
+
+def write_network_files(tmp_path):
+    interactome_path = Path(tmp_path, "propro.csv")
+    interactome_path.write_text(
+        '"protein1","protein2"\n"P1","P2"\n"P1","P3"\n"P2","P3"\n"P3","P4"\n"P3","P3"\n"P2","P1"\n'
+    )
+    go_association_path = Path(tmp_path, "proGo.csv")
+    go_association_path.write_text(
+        '"protein","relationship_type","go_term","namespace"\n'
+        '"P1","inferred","GO:1","molecular_function"\n'
+        '"P2","inferred","GO:1","molecular_function"\n'
+        '"P6","inferred","GO:3","cellular_component"\n'
+        '"P3","inferred","GO:1","molecular_function"\n'
+        '"P3","inferred","GO:2","biological_process"\n'
+        '"P5","inferred","GO:2","biological_process"\n'
+    )
+    return interactome_path, go_association_path
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 100])
+def test_stream_ppi_network(tmp_path, chunk_size):
+    interactome_path, go_association_path = write_network_files(tmp_path)
+    G, protein_list, go_protein_pairs, graph = stream_ppi_network(
+        interactome_path,
+        go_association_path,
+        ["molecular_function", "biological_process"],
+        chunk_size=chunk_size,
+    )
+
+    # the same graph as create_ppi_network builds from the rows, nodes and edges in the same order
+    expected_G, expected_protein_list = build_test_network()
+    assert list(G.nodes(data=True)) == list(expected_G.nodes(data=True))
+    assert list(G.edges(data=True)) == list(expected_G.edges(data=True))
+    assert protein_list == expected_protein_list
+    assert go_protein_pairs.tolist() == [
+        ["P1", "GO:1"],
+        ["P2", "GO:1"],
+        ["P3", "GO:1"],
+        ["P3", "GO:2"],
+        ["P5", "GO:2"],
+    ]
+    assert_same_csr_graph(graph, CSRGraph.from_networkx(expected_G))
+
+    # the CSR index does not need the nx graph
+    no_G, _, _, csr_only = stream_ppi_network(
+        interactome_path,
+        go_association_path,
+        ["molecular_function", "biological_process"],
+        chunk_size=chunk_size,
+        networkx=False,
+    )
+    assert no_G is None
+    assert_same_csr_graph(csr_only, graph)
+
+
+def test_build_graph(tmp_path):
+    interactome_path, go_association_path = write_network_files(tmp_path)
+    graph_file_path = Path(tmp_path, "graph.pickle")
+    namespace = ["molecular_function", "biological_process"]
+
+    graph, protein_list, _ = build_graph(
+        interactome_path, go_association_path, namespace, graph_file_path
+    )
+    assert graph_file_path.exists()
+    assert_same_csr_graph(import_csr_graph(Path(tmp_path, "graph")), graph)
+
+    # without the pickle the stale one is removed, the export is what every mode loads
+    graph, _, _ = build_graph(
+        interactome_path, go_association_path, namespace, graph_file_path, export_pickle=False
+    )
+    assert not graph_file_path.exists()
+    assert_same_csr_graph(load_csr_graph(graph_file_path), graph)
+    assert [protein["id"] for protein in protein_list] == list(graph.protein_ids)
+
+
+def test_stream_ppi_network_bsub():
+    network_path = Path(__file__).resolve().parent.parent / "network"
+    interactome_path = Path(network_path, "bsub_propro.csv")
+    go_association_path = Path(network_path, "bsub_proGo.csv")
+    if not interactome_path.exists() or not go_association_path.exists():
+        pytest.skip("bsub network files are not available")
+    namespace = ["molecular_function", "biological_process"]
+    G, protein_list, go_protein_pairs, graph = stream_ppi_network(
+        interactome_path, go_association_path, namespace, chunk_size=1000
+    )
+
+    expected_go_protein_pairs = read_pro_go_data(go_association_path, [0, 2, 3], namespace, ",")
+    expected_G, expected_protein_list = create_ppi_network(
+        read_specific_columns(interactome_path, [0, 1], ","), expected_go_protein_pairs
+    )
+    assert list(G.nodes(data=True)) == list(expected_G.nodes(data=True))
+    assert list(G.edges(data=True)) == list(expected_G.edges(data=True))
+    assert protein_list == expected_protein_list
+    assert go_protein_pairs.tolist() == [pair[:2] for pair in expected_go_protein_pairs]
+    assert_same_csr_graph(graph, CSRGraph.from_networkx(expected_G))
+
+
+def test_csr_graph_matches_networkx():
+    G, protein_list = build_test_network()
+    graph = CSRGraph.from_networkx(G)
+
+    assert graph.protein_count == len(protein_list)
+    assert list(graph.protein_ids) == [protein["id"] for protein in protein_list]
+
+    for protein in protein_list:
+        code = graph.get_protein_code(protein["id"])
+        pro_pro_neighbors = get_neighbors(G, protein["id"], "protein_protein")
+        assert sorted(graph.protein_ids[graph.protein_neighbors(code)]) == sorted(
+            neighbor[0] for neighbor in pro_pro_neighbors
+        )
+        assert graph.has_self_loop(code) == G.has_edge(protein["id"], protein["id"])
+        assert graph.degree(code) == G.degree(protein["id"])
+
+        for go_term in graph.go_ids:
+            go_code = graph.get_go_code(go_term)
+            assert graph.has_annotation(code, go_code) == G.has_edge(protein["id"], go_term)
+            expected = sum(
+                G.has_edge(neighbor[0], go_term) for neighbor in pro_pro_neighbors
+            )
+            assert graph.annotated_neighbor_count(code, go_code) == expected
+
+    for go_term in graph.go_ids:
+        go_neighbors = get_neighbors(G, go_term, "protein_go_term")
+        assert len(graph.go_proteins(graph.get_go_code(go_term))) == len(go_neighbors)
+
+
+def test_csr_graph_unknown_id():
+    G, _ = build_test_network()
+    graph = CSRGraph.from_networkx(G)
+
+    assert np.array_equal(graph.get_protein_codes(["P3", "P1"]), [2, 0])
+    with pytest.raises(KeyError):
+        graph.get_protein_code("P9")
+    with pytest.raises(KeyError):
+        graph.get_go_code("GO:9")
+
+
+def test_annotated_neighbor_counts_batch():
+    G, _ = build_test_network()
+    graph = CSRGraph.from_networkx(G)
+    protein_codes = np.repeat(np.arange(graph.protein_count), graph.go_count)
+    go_codes = np.tile(np.arange(graph.go_count), graph.protein_count)
+
+    counts = graph.annotated_neighbor_counts(protein_codes, go_codes)
+    for p, g, count in zip(protein_codes, go_codes, counts):
+        assert count == graph.annotated_neighbor_count(p, g)
+        assert graph.has_annotations([p], [g])[0] == graph.has_annotation(p, g)
+
+    # P3 has a self edge and is annotated with GO:1, it is not its own neighbor without include_self
+    p3, go1 = graph.get_protein_code("P3"), graph.get_go_code("GO:1")
+    assert graph.annotated_neighbor_counts([p3], [go1], include_self=False)[0] == 2
+
+
+def test_prepare():
+    G, _ = build_test_network()
+    graph = CSRGraph.from_networkx(G)
+    graph.prepare(["annotated_neighbor_counts", "hypergeometric_stats"])
+    assert "annotated_neighbor_matrix" in vars(graph)
+    assert len(graph.log_factorial) == graph.protein_count + 1
+    # structures that were not asked for are still computed the first time they are used
+    assert "gp_matrix" not in vars(graph)
+    with pytest.raises(ValueError):
+        graph.prepare(["unknown"])
+
+
+def test_score_pairs():
+    G, _ = build_test_network()
+    graph = CSRGraph.from_networkx(G)
+    proteins = ["P1", "P3", "P5", "P4"]
+    go_terms = ["GO:1", "GO:1", "GO:1", "GO:2"]
+
+    scores = OverlappingNeighbors().score_pairs(graph, proteins, go_terms)
+    assert np.allclose(scores, [3 / 5, 3 / 6, 0, 2 / 3])
+
+    degrees = ProteinDegreeV2().score_pairs(graph, proteins, go_terms)
+    assert np.array_equal(degrees, [2, 3, 0, 1])
+
+
+def test_predict_with_in_memory_graph(tmp_path):
+    G, _ = build_test_network()
+    pd.DataFrame({"protein": ["P1", "P3"], "go": ["GO:1", "GO:2"]}).to_csv(
+        Path(tmp_path, "rep_0_positive_protein_go_term_pairs_test.csv"), index=False, sep="\t"
+    )
+    pd.DataFrame({"protein": ["P4", "P1"], "go": ["GO:1", "GO:2"]}).to_csv(
+        Path(tmp_path, "rep_0_negative_protein_go_term_pairs_test.csv"), index=False, sep="\t"
+    )
+
+    # no graph file exists, the algorithm has to use the graph it is given
+    context = GraphContext(graph=G)
+    y_score, y_true = OverlappingNeighbors().predict(
+        tmp_path, None, tmp_path, 0, "_test", graph=context
+    )
+    assert len(y_score) == 4
+    assert sorted(y_true) == [0, 0, 1, 1]
+
+    # a CSRGraph is used as it is, an nx graph is indexed once
+    assert GraphContext(graph=context.csr_graph).csr_graph is context.csr_graph
+    assert not hasattr(context, "nx_graph")
+
+
+def test_export_import_csr_graph(tmp_path):
+    G, _ = build_test_network()
+    graph = CSRGraph.from_networkx(G)
+    export_csr_graph(graph, Path(tmp_path, "graph"))
+
+    loaded = import_csr_graph(Path(tmp_path, "graph"))
+    assert isinstance(loaded.ppi_indices, np.memmap)
+    assert list(loaded.protein_ids) == list(graph.protein_ids)
+    assert list(loaded.go_ids) == list(graph.go_ids)
+    assert np.array_equal(loaded.ppi_indptr, graph.ppi_indptr)
+    assert np.array_equal(loaded.ppi_indices, graph.ppi_indices)
+    assert np.array_equal(loaded.gp_indices, graph.gp_indices)
+    assert np.array_equal(loaded.self_loop, graph.self_loop)
+    assert isinstance(loaded.stats.go_protein_degree, np.memmap)
+    assert loaded.stats.protein_count == 5
+    assert list(loaded.stats.go_protein_degree) == [3, 2]
+    assert list(loaded.stats.ppi_degree) == [2, 2, 4, 1, 0]
+
+    proteins, go_terms = ["P1", "P3", "P4"], ["GO:1", "GO:1", "GO:2"]
+    assert np.array_equal(
+        OverlappingNeighbors().score_pairs(loaded, proteins, go_terms),
+        OverlappingNeighbors().score_pairs(graph, proteins, go_terms),
+    )
@@ -0,0 +1,103 @@
+from tools.graph import CSRGraph, export_csr_graph, load_csr_graph
+from tools.graph_update import GraphDelta, read_graph_delta, update_graph
+from tools.helper import (
+    create_ppi_network,
+    export_graph_to_pickle,
+    import_graph_from_pickle,
+)
+from tests.test_graph import build_test_network
+from pathlib import Path
+import numpy as np
+import pytest
+
+
+def build_delta():
+    return GraphDelta(
+        added_ppi=[["P4", "P5"], ["P6", "P1"], ["P1", "P2"], ["P4", "P4"]],
+        removed_ppi=[["P3", "P3"], ["P2", "P3"], ["P1", "P9"]],
+        added_annotations=[["P6", "GO:3"], ["P4", "GO:1"]],
+        removed_annotations=[["P3", "GO:2"], ["P4", "GO:2"]],
+    )
+
+
+def assert_same_graph(graph, expected):
+    assert sorted(graph.protein_ids) == sorted(expected.protein_ids)
+    assert sorted(graph.go_ids) == sorted(expected.go_ids)
+    for protein in expected.protein_ids:
+        code = graph.get_protein_code(protein)
+        expected_code = expected.get_protein_code(protein)
+        assert sorted(graph.protein_ids[graph.protein_neighbors(code)]) == sorted(
+            expected.protein_ids[expected.protein_neighbors(expected_code)]
+        )
+        assert sorted(graph.go_ids[graph.protein_go_terms(code)]) == sorted(
+            expected.go_ids[expected.protein_go_terms(expected_code)]
+        )
+        assert graph.ppi_degree[code] == expected.ppi_degree[expected_code]
+        assert graph.protein_go_degree[code] == expected.protein_go_degree[expected_code]
+        assert graph.self_loop[code] == expected.self_loop[expected_code]
+    for go_term in expected.go_ids:
+        code = graph.get_go_code(go_term)
+        expected_code = expected.get_go_code(go_term)
+        assert sorted(graph.protein_ids[graph.go_proteins(code)]) == sorted(
+            expected.protein_ids[expected.go_proteins(expected_code)]
+        )
+        assert graph.go_protein_degree[code] == expected.go_protein_degree[expected_code]
+    assert graph.stats.protein_count == expected.stats.protein_count
+
+
+def test_apply_delta_matches_rebuild():
+    G, _ = build_test_network()
+    graph = CSRGraph.from_networkx(G).apply_delta(build_delta())
+
+    interactome = [
+        ["P1", "P2"],
+        ["P1", "P3"],
+        ["P3", "P4"],
+        ["P4", "P5"],
+        ["P6", "P1"],
+        ["P4", "P4"],
+    ]
+    go_protein_pairs = [
+        ["P1", "GO:1"],
+        ["P2", "GO:1"],
+        ["P3", "GO:1"],
+        ["P5", "GO:2"],
+        ["P6", "GO:3"],
+        ["P4", "GO:1"],
+    ]
+    expected = CSRGraph.from_networkx(create_ppi_network(interactome, go_protein_pairs)[0])
+
+    assert_same_graph(graph, expected)
+    assert graph.version == 1
+    # codes of the nodes that were already in the graph do not change
+    assert list(graph.protein_ids[:5]) == ["P1", "P2", "P3", "P4", "P5"]
+
+
+def test_update_graph(tmp_path):
+    G, _ = build_test_network()
+    graph_file_path = Path(tmp_path, "graph.pickle")
+    export_graph_to_pickle(G, graph_file_path)
+    export_csr_graph(CSRGraph.from_networkx(G), Path(tmp_path, "graph"))
+
+    delta_file = Path(tmp_path, "delta.csv")
+    delta_file.write_text(
+        "action\ttype\tsource\ttarget\n"
+        "add\tprotein_protein\tP4\tP5\n"
+        "add\tprotein_go_term\tP6\tGO:3\n"
+        "remove\tprotein_protein\tP3\tP3\n"
+    )
+    graph = update_graph(graph_file_path, read_graph_delta(delta_file))
+    assert graph.version == 1
+
+    loaded = load_csr_graph(graph_file_path)
+    assert loaded.version == 1
+    assert loaded.protein_count == 6
+    assert not loaded.self_loop[loaded.get_protein_code("P3")]
+    # the pickled graph got the same changes
+    assert_same_graph(
+        loaded, CSRGraph.from_networkx(import_graph_from_pickle(graph_file_path))
+    )
+
+    delta_file.write_text("action\ttype\tsource\ttarget\nmove\tprotein_protein\tP4\tP5\n")
+    with pytest.raises(ValueError):
+        read_graph_delta(delta_file)
@@ -0,0 +1,61 @@
+from tools.hypergeometric import hypergeometric_score
+from scipy.special import gammaln
+from scipy.stats import hypergeom
+from fractions import Fraction
+from math import comb
+import numpy as np
+import pytest
+
+
+def test_hypergeometric_score_pmf():
+    N = 60
+    K, n, k = np.meshgrid(np.arange(0, 20), np.arange(0, 20), np.arange(0, 20))
+    K, n, k = K.ravel(), n.ravel(), k.ravel()
+
+    scores = hypergeometric_score(N, K, n, k)
+    expected = [
+        1 - (comb(K_, k_) * comb(N - K_, n_ - k_) / comb(N, n_) if k_ <= min(K_, n_) else 0)
+        for K_, n_, k_ in zip(K, n, k)
+    ]
+    assert np.allclose(scores, expected, rtol=0, atol=1e-9)
+
+    # looking the log factorials up in a table gives exactly the same scores
+    log_factorial = gammaln(np.arange(N + 1) + 1)
+    assert np.array_equal(hypergeometric_score(N, K, n, k, log_factorial=log_factorial), scores)
+
+
+def test_hypergeometric_score_symmetric_ties():
+    # these combinations have exactly the same probability and have to stay tied when ranked
+    N, K, n, k = 1394, 1159, 1, 0
+    scores = hypergeometric_score(
+        N, [K, N - K, n, K], [n, n, K, N - n], [k, n - k, k, K - k]
+    )
+    assert len(set(scores)) == 1
+
+
+def test_hypergeometric_score_exact_ties():
+    # k = 1 and k = 2 have exactly the same probability without being symmetric
+    N, K, n = 1394, 348, 7
+    assert comb(K, 1) * comb(N - K, n - 1) == comb(K, 2) * comb(N - K, n - 2)
+    log_factorial = gammaln(np.arange(N + 1) + 1)
+    for table in (None, log_factorial):
+        scores = hypergeometric_score(N, K, n, [1, 2], log_factorial=table)
+        assert scores[0] == scores[1]
+
+    # the scores rank the combinations exactly like their exact probabilities do
+    n, k = np.meshgrid(np.arange(0, 16), np.arange(0, 16))
+    n, k = n[k <= n], k[k <= n]
+    scores = hypergeometric_score(N, K, n, k)
+    exact = [Fraction(comb(K, k_) * comb(N - K, n_ - k_), comb(N, n_)) for n_, k_ in zip(n, k)]
+    _, exact_ranks = np.unique(np.array(exact, dtype=object), return_inverse=True)
+    _, ranks = np.unique(-scores, return_inverse=True)
+    assert np.array_equal(ranks, exact_ranks)
+
+
+def test_hypergeometric_score_sf():
+    scores = hypergeometric_score(100, [10, 30], [5, 20], [2, 7], mode="sf")
+    expected = 1 - hypergeom.sf([1, 6], 100, [10, 30], [5, 20])
+    assert np.allclose(scores, expected)
+
+    with pytest.raises(ValueError):
+        hypergeometric_score(100, 10, 5, 2, mode="cdf")
@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+from sklearn.metrics import (
+    auc,
+    f1_score,
+    precision_recall_curve,
+    roc_auc_score,
+    roc_curve,
+)
+from tools.metrics import (
+    bootstrap_auc,
+    compute_metrics,
+    confidence_interval,
+    max_f1_threshold,
+)
+
+
+def test_compute_metrics_matches_sklearn():
+    rng = np.random.default_rng(0)
+    # rounded scores so that every row has ties
+    y_score = np.round(rng.random((5, 60)), 1)
+    y_true = rng.integers(0, 2, 60)
+
+    metrics = compute_metrics(y_score, y_true)
+    assert len(metrics) == 5
+    for score, current in zip(y_score, metrics):
+        fpr, tpr, thresholds = roc_curve(y_true, score)
+        precision, recall, pr_thresholds = precision_recall_curve(y_true, score)
+        np.testing.assert_array_equal(current["fpr"], fpr)
+        np.testing.assert_array_equal(current["tpr"], tpr)
+        np.testing.assert_array_equal(current["thresholds"], thresholds)
+        np.testing.assert_array_equal(current["precision"], precision)
+        np.testing.assert_array_equal(current["recall"], recall)
+        np.testing.assert_array_equal(current["pr_thresholds"], pr_thresholds)
+        assert current["roc_auc"] == auc(fpr, tpr)
+        assert current["pr_auc"] == auc(recall, precision)
+
+
+def test_compute_metrics_per_row_labels():
+    y_score = np.array([[0.9, 0.8, 0.3, 0.1], [0.2, 0.4, 0.6, 0.8]])
+    y_true = np.array([[1, 1, 0, 0], [1, 1, 0, 0]])
+
+    first, second = compute_metrics(y_score, y_true)
+    assert first["roc_auc"] == 1.0
+    assert second["roc_auc"] == 0.0
+    assert compute_metrics(y_score[0], y_true[0])[0]["roc_auc"] == 1.0
+
+
+def test_max_f1_threshold_matches_f1_score():
+    rng = np.random.default_rng(1)
+    y_score = np.round(rng.random(80), 1)
+    y_true = rng.integers(0, 2, 80)
+
+    current = compute_metrics(y_score, y_true)[0]
+    threshold, f1 = max_f1_threshold(
+        current["precision"], current["recall"], current["pr_thresholds"]
+    )
+    # the slow search this replaces, scoring the pairs again for every threshold
+    f1_scores = [
+        f1_score(y_true, (y_score >= t).astype(int)) for t in np.unique(y_score)[::-1]
+    ]
+    assert f1 == pytest.approx(max(f1_scores))
+    assert threshold == np.unique(y_score)[::-1][np.argmax(f1_scores)]
+
+
+def test_bootstrap_auc():
+    rng = np.random.default_rng(2)
+    y_score = np.round(rng.random((2, 40)), 1)
+    y_true = rng.integers(0, 2, 40)
+
+    roc_auc, pr_auc = bootstrap_auc(y_score, y_true, resamples=30, seed=4, batch_size=7)
+    assert roc_auc.shape == pr_auc.shape == (2, 30)
+    # batching does not change the resamples
+    np.testing.assert_array_equal(
+        roc_auc, bootstrap_auc(y_score, y_true, resamples=30, seed=4)[0]
+    )
+
+    # each resample is the AUC of the pairs it drew, drawn the same way as bootstrap_auc
+    rng = np.random.default_rng(4)
+    positive = np.flatnonzero(y_true == 1)
+    negative = np.flatnonzero(y_true == 0)
+    uniform = rng.random((7, 40))
+    drawn = np.concatenate(
+        [
+            positive[(uniform[:, : len(positive)] * len(positive)).astype(int)],
+            negative[(uniform[:, len(positive) :] * len(negative)).astype(int)],
+        ],
+        axis=1,
+    )
+    for k in range(7):
+        for i in range(2):
+            score, label = y_score[i][drawn[k]], y_true[drawn[k]]
+            precision, recall, _ = precision_recall_curve(label, score)
+            assert roc_auc[i, k] == pytest.approx(roc_auc_score(label, score))
+            assert pr_auc[i, k] == pytest.approx(auc(recall, precision))
+
+    lower, upper = confidence_interval(roc_auc)
+    assert (lower <= np.median(roc_auc, axis=1)).all()
+    assert (np.median(roc_auc, axis=1) <= upper).all()
@@ -0,0 +1,57 @@
+from classes.overlapping_neighbors_class import OverlappingNeighbors
+from classes.overlapping_neighbors_v2_class import OverlappingNeighborsV2
+from classes.overlapping_neighbors_v3_class import OverlappingNeighborsV3
+from tools.graph import CSRGraph
+from tools.overlapping_neighbors import (
+    overlapping_neighbors_pair_data,
+    overlapping_neighbors_score_matrix,
+)
+from tests.test_graph import build_test_network
+import numpy as np
+import pytest
+
+
+def test_annotated_neighbor_matrix():
+    G, _ = build_test_network()
+    graph = CSRGraph.from_networkx(G)
+
+    counts = graph.annotated_neighbor_matrix.toarray()
+    assert counts.shape == (graph.protein_count, graph.go_count)
+    for p in range(graph.protein_count):
+        for g in range(graph.go_count):
+            assert counts[p, g] == graph.annotated_neighbor_count(p, g)
+
+
+def test_score_matrix_matches_pairs():
+    G, _ = build_test_network()
+    graph = CSRGraph.from_networkx(G)
+    protein_codes = np.repeat(np.arange(graph.protein_count), graph.go_count)
+    go_codes = np.tile(np.arange(graph.go_count), graph.protein_count)
+
+    for version in ["v1", "v2", "v3"]:
+        matrix = overlapping_neighbors_score_matrix(graph, version=version)
+        assert matrix.shape == (graph.protein_count, graph.go_count)
+        data = overlapping_neighbors_pair_data(graph, protein_codes, go_codes, version)
+        assert np.allclose(matrix.ravel(), data["score"])
+
+    # P3 has a self edge, it is neither its own neighbor nor its own annotated neighbor
+    p3, go1 = graph.get_protein_code("P3"), graph.get_go_code("GO:1")
+    data = overlapping_neighbors_pair_data(graph, [p3], [go1], "v2")
+    assert data["go_annotated_pro_pro_neighbors"][0] == 2
+    assert np.isclose(data["score"][0], 2 + (1 + 3 * 2) / (3 / 2))
+
+    with pytest.raises(ValueError):
+        overlapping_neighbors_score_matrix(graph, version="v4")
+
+
+def test_algorithm_score_matrix():
+    G, _ = build_test_network()
+    graph = CSRGraph.from_networkx(G)
+    proteins, go_terms = ["P4", "P1"], ["GO:2", "GO:1"]
+
+    for algorithm in [OverlappingNeighbors(), OverlappingNeighborsV2(), OverlappingNeighborsV3()]:
+        matrix = algorithm.score_matrix(graph, proteins, go_terms)
+        assert np.allclose(
+            matrix.ravel(),
+            algorithm.score_pairs(graph, np.repeat(proteins, 2), np.tile(go_terms, 2)),
+        )
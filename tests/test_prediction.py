@@ -0,0 +1,43 @@
+from classes.overlapping_neighbors_class import OverlappingNeighbors
+from classes.hypergeometric_distribution_class_V2 import HypergeometricDistributionV2
+from classes.protein_degree_v2_class import ProteinDegreeV2
+from tools.graph import CSRGraph
+from tools.prediction import rank_go_terms, rank_proteins
+from tests.test_graph import build_test_network
+import numpy as np
+
+
+def test_score_matrix_matches_score_pairs():
+    G, _ = build_test_network()
+    graph = CSRGraph.from_networkx(G)
+    proteins = np.repeat(graph.protein_ids, graph.go_count)
+    go_terms = np.tile(graph.go_ids, graph.protein_count)
+
+    for algorithm in [OverlappingNeighbors(), HypergeometricDistributionV2(), ProteinDegreeV2()]:
+        matrix = algorithm.score_matrix(graph, graph.protein_ids, graph.go_ids)
+        assert matrix.shape == (graph.protein_count, graph.go_count)
+        assert np.allclose(
+            matrix.ravel(), algorithm.score_pairs(graph, proteins, go_terms)
+        )
+
+
+def test_rank_proteins():
+    G, _ = build_test_network()
+    graph = CSRGraph.from_networkx(G)
+
+    # P1, P2 and P3 are annotated with GO:1, P4 neighbors P3 and scores above P5
+    predictions = rank_proteins(OverlappingNeighbors(), graph, ["GO:1", "GO:2"], top_k=2)
+    assert list(predictions.columns) == ["go_term", "rank", "protein", "score"]
+    go1 = predictions[predictions["go_term"] == "GO:1"]
+    assert list(go1["protein"]) == ["P4", "P5"]
+    assert list(go1["rank"]) == [1, 2]
+
+    predictions = rank_proteins(
+        OverlappingNeighbors(), graph, ["GO:1"], top_k=10, exclude_annotated=False
+    )
+    assert len(predictions) == graph.protein_count
+    assert predictions["score"].is_monotonic_decreasing
+
+    predictions = rank_go_terms(ProteinDegreeV2(), graph, ["P1", "P5"], top_k=5)
+    assert list(predictions["protein"]) == ["P1", "P5"]
+    assert list(predictions["go_term"]) == ["GO:2", "GO:1"]
@@ -0,0 +1,50 @@
+from tools.reader import IdCodebook, iter_column_chunks, read_columns
+from tools.helper import read_pro_go_data, read_specific_columns
+from pathlib import Path
+import numpy as np
+import pytest
+
+
+def write_go_file(tmp_path):
+    file_path = Path(tmp_path, "pro_go.csv")
+    file_path.write_text(
+        '"protein","relationship_type","go_term","namespace"\n'
+        '"P1","inferred","GO:1","molecular_function"\n'
+        '"P2","inferred","GO:2","biological_process"\n'
+        '"P,3","inferred","GO:1","molecular_function"\n'
+        '"P1","inferred","GO:3","cellular_component"\n'
+    )
+    return file_path
+
+
+def test_read_pro_go_data(tmp_path):
+    file_path = write_go_file(tmp_path)
+
+    data = read_pro_go_data(file_path, [0, 2, 3], ["molecular_function"], ",")
+    assert data == [
+        ["P1", "GO:1", "molecular_function"],
+        ["P,3", "GO:1", "molecular_function"],
+    ]
+    assert len(read_specific_columns(file_path, [0, 2], ",")) == 4
+
+
+def test_iter_column_chunks(tmp_path):
+    file_path = write_go_file(tmp_path)
+    proteins = IdCodebook()
+
+    chunks = list(iter_column_chunks(file_path, [0, 2], chunk_size=3, codebooks=[proteins, None]))
+    assert [len(chunk[0]) for chunk in chunks] == [3, 1]
+    assert np.array_equal(np.concatenate([chunk[0] for chunk in chunks]), [0, 1, 2, 0])
+    assert list(proteins.ids) == ["P1", "P2", "P,3"]
+
+    go_terms, = read_columns(file_path, [2], namespace_column=3, namespace=["biological_process"])
+    assert list(go_terms) == ["GO:2"]
+
+
+def test_iter_column_chunks_errors(tmp_path):
+    file_path = Path(tmp_path, "short.csv")
+    file_path.write_text("protein1,protein2\nP1,P2\nP3\n")
+    with pytest.raises(ValueError, match="line 3"):
+        read_specific_columns(file_path, [0, 1], ",")
+    with pytest.raises(FileNotFoundError):
+        read_specific_columns(Path(tmp_path, "missing.csv"), [0, 1], ",")
@@ -0,0 +1,89 @@
+from classes.registry import (
+    ALGORITHMS,
+    algorithm_names,
+    algorithm_requirements,
+    get_algorithm_class,
+    get_algorithm_classes,
+    register_algorithm,
+)
+from tools.graph import GRAPH_STRUCTURES
+from classes.base_algorithm_class import BaseAlgorithm
+from pathlib import Path
+import subprocess
+import sys
+import pytest
+
+
+def test_get_algorithm_classes():
+    algorithm_classes = get_algorithm_classes()
+    assert list(algorithm_classes) == algorithm_names()
+    for name, algorithm_class in algorithm_classes.items():
+        assert algorithm_class.__name__ == name
+        assert issubclass(algorithm_class, BaseAlgorithm)
+    assert list(get_algorithm_classes(["ProteinDegree"])) == ["ProteinDegree"]
+    with pytest.raises(ValueError):
+        get_algorithm_class("Unknown")
+
+
+def test_scoring_imports_are_light():
+    # scoring with an algorithm must not load the plotting, evaluation, table or graph building dependencies
+    heavy = ["matplotlib", "sklearn", "networkx", "pandas", "scipy.stats"]
+    code = (
+        "import sys\n"
+        "from classes.registry import get_algorithm_classes\n"
+        "get_algorithm_classes()\n"
+        "import tools.prediction\n"
+        f"print(','.join(m for m in {heavy!r} if m in sys.modules))\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=Path(__file__).resolve().parent.parent,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert output.stdout.strip() == ""
+
+
+def test_algorithms_import_without_resource():
+    # resource is unix only, the algorithms and their instrumentation have to import without it
+    code = (
+        "import sys\n"
+        "sys.modules['resource'] = None\n"
+        "from classes.registry import get_algorithm_classes\n"
+        "from tools.instrumentation import enable_instrumentation, stage\n"
+        "get_algorithm_classes()\n"
+        "registry = enable_instrumentation()\n"
+        "with stage('score'):\n"
+        "    pass\n"
+        "print(registry.to_frame()['peak_rss_mb'].isna().all())\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=Path(__file__).resolve().parent.parent,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert output.stdout.strip() == "True"
+
+
+def test_algorithm_requirements():
+    algorithm_classes = get_algorithm_classes()
+    for algorithm_class in algorithm_classes.values():
+        assert set(algorithm_class.requires) <= set(GRAPH_STRUCTURES)
+    assert algorithm_requirements(
+        get_algorithm_classes(["ProteinDegree", "OverlappingNeighbors", "HypergeometricDistributionV2"])
+    ) == ["degrees", "go_adjacency", "annotated_neighbor_counts", "hypergeometric_stats"]
+    assert algorithm_requirements(get_algorithm_classes(["SampleAlgorithm"])) == []
+
+
+def test_register_algorithm():
+    register_algorithm("Plugin", "classes.protein_degree_class:ProteinDegree")
+    try:
+        assert "Plugin" in algorithm_names()
+        assert get_algorithm_class("Plugin").__name__ == "ProteinDegree"
+    finally:
+        del ALGORITHMS["Plugin"]
+    with pytest.raises(ValueError):
+        register_algorithm("Plugin", "classes.protein_degree_class")
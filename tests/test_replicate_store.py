@@ -0,0 +1,76 @@
+from tools.replicate_store import (
+    ReplicateStore,
+    current_replicate_store,
+    replicate_store_path,
+    write_replicate_store,
+)
+from tools.sampling import PairSampler
+from tools.workflow import get_datasets, remove_samples, use_existing_samples, write_datasets
+from tests.test_graph import build_test_network
+from pathlib import Path
+import numpy as np
+import os
+import pytest
+
+
+def test_replicate_store(tmp_path):
+    _, protein_list = build_test_network()
+    go_protein_pairs = [["P1", "GO:1"], ["P2", "GO:1"], ["P3", "GO:1"], ["P3", "GO:2"], ["P5", "GO:2"]]
+    sampler = PairSampler(go_protein_pairs, protein_list)
+    store_path = replicate_store_path(tmp_path, "_test")
+
+    write_replicate_store(
+        store_path, sampler.protein_ids, sampler.go_ids, sampler.sample_codes(3, 5, range(4))
+    )
+    store = ReplicateStore(store_path)
+    assert len(store) == 4
+    assert use_existing_samples(tmp_path, "_test") == 4
+    for rep_num, datasets in enumerate(sampler.sample(3, 5, range(4))):
+        assert store.get_datasets(rep_num) == datasets
+        assert get_datasets(tmp_path, rep_num, "_test") == datasets
+    assert store.get_codes(2)[0].shape == (2, 3)
+    with pytest.raises(KeyError):
+        store.get_codes(4)
+
+    # exported csv files read back the same
+    write_datasets(*store.get_datasets(1), tmp_path, 1, "_csv")
+    assert get_datasets(tmp_path, 1, "_csv") == store.get_datasets(1)
+
+    remove_samples(4, tmp_path)
+    assert not store_path.exists()
+
+
+def test_stale_replicate_store(tmp_path):
+    _, protein_list = build_test_network()
+    go_protein_pairs = [["P1", "GO:1"], ["P2", "GO:1"], ["P3", "GO:1"], ["P3", "GO:2"], ["P5", "GO:2"]]
+    sampler = PairSampler(go_protein_pairs, protein_list)
+    store_path = replicate_store_path(tmp_path, "_test")
+    datasets = sampler.sample(3, 5, range(2))
+
+    # csv files written before the store are older copies of it, the store is used
+    for rep_num, (positive_dataset, negative_dataset) in enumerate(datasets):
+        write_datasets(positive_dataset, negative_dataset, tmp_path, rep_num, "_test")
+    write_replicate_store(
+        store_path, sampler.protein_ids, sampler.go_ids, sampler.sample_codes(3, 5, range(4))
+    )
+    store_time = os.path.getmtime(store_path)
+    for file_path in tmp_path.glob("rep_*.csv"):
+        os.utime(file_path, (store_time - 10, store_time - 10))
+    assert current_replicate_store(tmp_path, "_test") == store_path
+    assert use_existing_samples(tmp_path, "_test") == 4
+
+    # a csv file written after the store, e.g. edited by hand, makes the csv files the replicates
+    edited = ({"protein": ["P5"], "go": ["GO:2"]}, {"protein": ["P4"], "go": ["GO:2"]})
+    write_datasets(*edited, tmp_path, 1, "_test")
+    os.utime(Path(tmp_path, "rep_1_positive_protein_go_term_pairs_test.csv"), (store_time + 10, store_time + 10))
+    assert current_replicate_store(tmp_path, "_test") is None
+    assert use_existing_samples(tmp_path, "_test") == 2
+    assert get_datasets(tmp_path, 1, "_test") == edited
+    assert get_datasets(tmp_path, 0, "_test") == datasets[0]
+
+    # the csv files of other experiments do not matter
+    assert current_replicate_store(tmp_path, "_other") is None
+    write_replicate_store(
+        replicate_store_path(tmp_path, "_other"), sampler.protein_ids, sampler.go_ids, []
+    )
+    assert current_replicate_store(tmp_path, "_other") == replicate_store_path(tmp_path, "_other")
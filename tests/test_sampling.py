@@ -0,0 +1,46 @@
+from tools.sampling import PairSampler
+from tools.workflow import sample_data, get_datasets
+from tests.test_graph import build_test_network
+import numpy as np
+import pytest
+
+
+def test_pair_sampler():
+    G, protein_list = build_test_network()
+    go_protein_pairs = [["P1", "GO:1"], ["P2", "GO:1"], ["P3", "GO:1"], ["P3", "GO:2"], ["P5", "GO:2"]]
+    sampler = PairSampler(go_protein_pairs, protein_list)
+
+    datasets = sampler.sample(3, 7, range(20))
+    assert sampler.sample(3, 7, [13])[0] == datasets[13]
+    assert datasets != sampler.sample(3, 8, range(20))
+    for positive_dataset, negative_dataset in datasets:
+        assert negative_dataset["go"] == positive_dataset["go"]
+        for protein, go_term in zip(positive_dataset["protein"], positive_dataset["go"]):
+            assert G.has_edge(protein, go_term)
+        for protein, go_term in zip(negative_dataset["protein"], negative_dataset["go"]):
+            assert not G.has_edge(protein, go_term)
+
+    # GO:1 is annotated to P1, P2 and P3, its negatives are drawn from P4 and P5 only
+    go_codes = np.zeros(1000, dtype=np.int64)
+    negatives = sampler.sample_negatives(go_codes, np.random.default_rng(0).random(1000))
+    assert sorted(set(sampler.protein_ids[negatives])) == ["P4", "P5"]
+
+
+def test_pair_sampler_full_go_term():
+    _, protein_list = build_test_network()
+    go_protein_pairs = [[protein["id"], "GO:1"] for protein in protein_list]
+    with pytest.raises(ValueError):
+        PairSampler(go_protein_pairs, protein_list).sample(1, 0, [0])
+
+
+def test_sample_data(tmp_path):
+    G, protein_list = build_test_network()
+    go_protein_pairs = [["P1", "GO:1"], ["P2", "GO:1"], ["P3", "GO:1"], ["P3", "GO:2"], ["P5", "GO:2"]]
+
+    positive_dataset, negative_dataset = sample_data(
+        go_protein_pairs, 4, protein_list, G, tmp_path, 0, "_test", seed=1
+    )
+    assert get_datasets(tmp_path, 0, "_test") == (positive_dataset, negative_dataset)
+    assert sample_data(
+        go_protein_pairs, 4, protein_list, G, tmp_path, 0, "_test", seed=1
+    ) == (positive_dataset, negative_dataset)
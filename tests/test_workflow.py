@@ -0,0 +1,555 @@
+from classes.overlapping_neighbors_class import OverlappingNeighbors
+from classes.protein_degree_v2_class import ProteinDegreeV2
+from classes.hypergeometric_distribution_class import HypergeometricDistribution
+from tools.dataset import ReplicateDataset
+from tools.helper import export_graph_to_pickle
+import tools.graph as graph_module
+import tools.workflow as workflow_module
+from tools.graph import CSRGraph, csr_graph_directory, export_csr_graph
+from tools.graph_update import GraphDelta
+from tools.instrumentation import is_instrumented
+from tools.output import get_output_policy, set_output_policy
+import tools.output as output_module
+from tools.profiling import StackSampler, get_profiling
+from tools.metrics import bootstrap_auc
+from tools.workflow import run_bootstrap, run_workflow
+from tests.test_graph import build_test_network
+from pathlib import Path
+import numpy as np
+import os
+import pandas as pd
+import pickle
+import pstats
+import time
+import pytest
+
+
+def write_replicates(dataset_path):
+    positive = [
+        {"protein": ["P1", "P3"], "go": ["GO:1", "GO:2"]},
+        {"protein": ["P2", "P5"], "go": ["GO:1", "GO:2"]},
+    ]
+    negative = [
+        {"protein": ["P4", "P1"], "go": ["GO:1", "GO:2"]},
+        {"protein": ["P5", "P2"], "go": ["GO:1", "GO:2"]},
+    ]
+    for rep_num in range(2):
+        pd.DataFrame(positive[rep_num]).to_csv(
+            Path(dataset_path, f"rep_{rep_num}_positive_protein_go_term_pairs_test.csv"),
+            index=False,
+            sep="\t",
+        )
+        pd.DataFrame(negative[rep_num]).to_csv(
+            Path(dataset_path, f"rep_{rep_num}_negative_protein_go_term_pairs_test.csv"),
+            index=False,
+            sep="\t",
+        )
+
+
+def test_parallel_workflow_matches_serial(tmp_path):
+    G, protein_list = build_test_network()
+    algorithm_classes = {
+        "OverlappingNeighbors": OverlappingNeighbors,
+        "ProteinDegreeV2": ProteinDegreeV2,
+        "HypergeometricDistribution": HypergeometricDistribution,
+    }
+    dataset_path = Path(tmp_path, "dataset")
+    dataset_path.mkdir()
+    write_replicates(dataset_path)
+
+    for workers in [1, 2]:
+        output_path = Path(tmp_path, f"output_{workers}")
+        output_path.mkdir()
+        run_workflow(
+            algorithm_classes,
+            [],
+            2,
+            protein_list,
+            Path(dataset_path, "graph.pickle"),
+            dataset_path,
+            output_path,
+            output_path,
+            2,
+            False,
+            "_test",
+            False,
+            G,
+            workers,
+        )
+
+    serial_files = sorted(f.name for f in Path(tmp_path, "output_1").iterdir())
+    parallel_files = sorted(f.name for f in Path(tmp_path, "output_2").iterdir())
+    assert serial_files == parallel_files
+    for file_name in serial_files:
+        assert (
+            Path(tmp_path, "output_1", file_name).read_text()
+            == Path(tmp_path, "output_2", file_name).read_text()
+        )
+
+
+def test_parallel_workflow_reads_the_pickle_once(tmp_path, monkeypatch):
+    G, protein_list = build_test_network()
+    algorithm_classes = {
+        "OverlappingNeighbors": OverlappingNeighbors,
+        "HypergeometricDistribution": HypergeometricDistribution,
+    }
+    dataset_path = Path(tmp_path, "dataset")
+    dataset_path.mkdir()
+    write_replicates(dataset_path)
+    graph_file_path = Path(dataset_path, "graph.pickle")
+    export_graph_to_pickle(G, graph_file_path)
+
+    # only this process may read the pickle, the workers memory map the graph it exported
+    pid = os.getpid()
+    import_graph_from_pickle = graph_module.import_graph_from_pickle
+
+    def read_pickle(file_path):
+        assert os.getpid() == pid
+        return import_graph_from_pickle(file_path)
+
+    monkeypatch.setattr(graph_module, "import_graph_from_pickle", read_pickle)
+
+    for workers, graph in [(1, G), (2, None)]:
+        output_path = Path(tmp_path, f"output_{workers}")
+        output_path.mkdir()
+        run_workflow(
+            algorithm_classes,
+            [],
+            2,
+            protein_list,
+            graph_file_path,
+            dataset_path,
+            output_path,
+            output_path,
+            2,
+            False,
+            "_test",
+            False,
+            graph,
+            workers,
+        )
+
+    # the export is made in a scratch directory, nothing is left next to the pickle
+    assert sorted(f.name for f in dataset_path.iterdir() if f.is_dir()) == []
+    serial_files = sorted(f.name for f in Path(tmp_path, "output_1").iterdir())
+    assert serial_files == sorted(f.name for f in Path(tmp_path, "output_2").iterdir())
+    for file_name in serial_files:
+        assert (
+            Path(tmp_path, "output_1", file_name).read_text()
+            == Path(tmp_path, "output_2", file_name).read_text()
+        )
+
+
+def test_parallel_workflow_reuses_the_csr_export(tmp_path, monkeypatch):
+    G, protein_list = build_test_network()
+    graph = CSRGraph.from_networkx(G)
+    algorithm_classes = {"OverlappingNeighbors": OverlappingNeighbors}
+    dataset_path = Path(tmp_path, "dataset")
+    dataset_path.mkdir()
+    write_replicates(dataset_path)
+    graph_file_path = Path(dataset_path, "graph.pickle")
+    export_csr_graph(graph, csr_graph_directory(graph_file_path))
+
+    exported = []
+    monkeypatch.setattr(
+        workflow_module,
+        "export_csr_graph",
+        lambda graph, directory: exported.append(directory) or export_csr_graph(graph, directory),
+    )
+
+    def run(graph, output_path):
+        output_path.mkdir()
+        run_workflow(
+            algorithm_classes,
+            [],
+            2,
+            protein_list,
+            graph_file_path,
+            dataset_path,
+            output_path,
+            output_path,
+            2,
+            False,
+            "_test",
+            False,
+            graph,
+            2,
+        )
+
+    # the in-memory graph is the exported one, the workers memory map the export build_graph wrote
+    run(graph, Path(tmp_path, "output_export"))
+    assert exported == []
+
+    # a graph that differs from the export is exported to the scratch directory
+    changed = graph.apply_delta(GraphDelta(added_ppi=[("P4", "P5")]))
+    run(changed, Path(tmp_path, "output_changed"))
+    assert len(exported) == 1
+    assert (
+        Path(tmp_path, "output_export", "overlapping_neighbor_data.csv").read_text()
+        != Path(tmp_path, "output_changed", "overlapping_neighbor_data.csv").read_text()
+    )
+
+
+def test_replicate_dataset_is_shared_read_only(tmp_path):
+    G, _ = build_test_network()
+    dataset = ReplicateDataset(
+        {"protein": ["P1", "P3"], "go": ["GO:1", "GO:2"]},
+        {"protein": ["P4", "P1"], "go": ["GO:1", "GO:2"]},
+    )
+    assert list(dataset.proteins) == ["P1", "P4", "P3", "P1"]
+    assert list(dataset.true_label) == [1, 0, 1, 0]
+    with pytest.raises(AttributeError):
+        dataset.proteins = None
+    with pytest.raises(ValueError):
+        dataset.go_terms[0] = "GO:2"
+
+    copy = pickle.loads(pickle.dumps(dataset))
+    assert list(copy.go_terms) == list(dataset.go_terms)
+    assert not copy.go_terms.flags.writeable
+
+    # no dataset files exist, predict has to score the dataset it is given
+    y_score, y_true = OverlappingNeighbors().predict(
+        tmp_path, None, tmp_path, 0, "_test", graph=G, dataset=dataset
+    )
+    assert sorted(y_true) == [0, 0, 1, 1]
+
+
+def test_instrumented_workflow(tmp_path):
+    G, protein_list = build_test_network()
+    algorithm_classes = {
+        "OverlappingNeighbors": OverlappingNeighbors,
+        "ProteinDegreeV2": ProteinDegreeV2,
+    }
+    dataset_path = Path(tmp_path, "dataset")
+    dataset_path.mkdir()
+    write_replicates(dataset_path)
+
+    for workers in [1, 2]:
+        output_path = Path(tmp_path, f"output_{workers}")
+        output_path.mkdir()
+        run_workflow(
+            algorithm_classes,
+            [],
+            2,
+            protein_list,
+            Path(dataset_path, "graph.pickle"),
+            dataset_path,
+            output_path,
+            output_path,
+            2,
+            False,
+            "_test",
+            False,
+            G,
+            workers,
+            instrument=True,
+        )
+        assert not is_instrumented()
+
+        timings = pd.read_csv(Path(output_path, "stage_timings.csv"), sep="\t")
+        for stage in ["predict", "score", "write_output"]:
+            rows = timings[timings["stage"] == stage]
+            assert len(rows) == 4
+            assert set(rows["algorithm"]) == set(algorithm_classes)
+            assert set(rows["replicate"]) == {0, 1}
+        # a serial run computes the metrics of all algorithms of a replicate in one batch
+        rows = timings[timings["stage"] == "metrics"]
+        assert len(rows) == (2 if workers == 1 else 4)
+        assert set(rows["replicate"]) == {0, 1}
+        assert list(timings[timings["stage"] == "pairs"]["count"]) == [4, 4, 4, 4]
+        assert len(timings[timings["stage"] == "thresholds"]) == 2
+
+
+def test_profiled_workflow(tmp_path):
+    G, protein_list = build_test_network()
+    algorithm_classes = {
+        "OverlappingNeighbors": OverlappingNeighbors,
+        "ProteinDegreeV2": ProteinDegreeV2,
+    }
+    dataset_path = Path(tmp_path, "dataset")
+    dataset_path.mkdir()
+    write_replicates(dataset_path)
+
+    for workers in [1, 2]:
+        output_path = Path(tmp_path, f"output_{workers}")
+        output_path.mkdir()
+        run_workflow(
+            algorithm_classes,
+            [],
+            2,
+            protein_list,
+            Path(dataset_path, "graph.pickle"),
+            dataset_path,
+            output_path,
+            output_path,
+            2,
+            False,
+            "_test",
+            False,
+            G,
+            workers,
+            profile=["OverlappingNeighbors"],
+        )
+        assert get_profiling() is None
+
+        # only the selected algorithm is profiled, once per replicate
+        assert sorted(f.name for f in Path(output_path, "profiles").iterdir()) == [
+            "OverlappingNeighbors_rep_0.prof",
+            "OverlappingNeighbors_rep_0_collapsed.txt",
+            "OverlappingNeighbors_rep_1.prof",
+            "OverlappingNeighbors_rep_1_collapsed.txt",
+        ]
+        stats = pstats.Stats(str(Path(output_path, "profiles", "OverlappingNeighbors_rep_0.prof")))
+        assert any(function[2] == "predict" for function in stats.stats)
+
+    with pytest.raises(ValueError):
+        run_workflow(
+            algorithm_classes,
+            [],
+            2,
+            protein_list,
+            Path(dataset_path, "graph.pickle"),
+            dataset_path,
+            output_path,
+            output_path,
+            2,
+            False,
+            "_test",
+            False,
+            G,
+            profile=["Unknown"],
+        )
+
+
+def busy_loop(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        sum(range(1000))
+
+
+def test_stack_sampler(tmp_path):
+    sampler = StackSampler(interval=0.0005)
+    sampler.start()
+    busy_loop(0.05)
+    sampler.stop()
+    sampler.write_collapsed(Path(tmp_path, "stacks.txt"))
+
+    lines = Path(tmp_path, "stacks.txt").read_text().splitlines()
+    assert lines
+    # the frames above the one the sampler was started from are left out
+    assert lines[0].startswith("busy_loop (test_workflow.py:")
+    assert all(int(line.rsplit(" ", 1)[1]) > 0 for line in lines)
+
+
+def test_bootstrap_workflow(tmp_path):
+    G, protein_list = build_test_network()
+    algorithm_classes = {
+        "OverlappingNeighbors": OverlappingNeighbors,
+        "ProteinDegreeV2": ProteinDegreeV2,
+    }
+    dataset_path = Path(tmp_path, "dataset")
+    dataset_path.mkdir()
+    write_replicates(dataset_path)
+
+    tables = []
+    for workers in [1, 2]:
+        output_path = Path(tmp_path, f"output_{workers}")
+        output_path.mkdir()
+        run_workflow(
+            algorithm_classes,
+            None,
+            2,
+            protein_list,
+            Path(dataset_path, "graph.pickle"),
+            dataset_path,
+            output_path,
+            output_path,
+            2,
+            False,
+            "_test",
+            False,
+            G,
+            workers,
+            seed=3,
+            bootstrap=200,
+        )
+        tables.append(
+            pd.read_csv(Path(output_path, "2_repeated_auc_values.csv"), sep="\t", index_col=0)
+        )
+
+    df = tables[0]
+    assert list(df.index) == list(algorithm_classes)
+    for curve in ["ROC", "Precision/Recall"]:
+        lower = df[f"{curve} 95% CI lower"]
+        upper = df[f"{curve} 95% CI upper"]
+        assert (lower <= upper).all()
+        assert ((lower >= 0) & (upper <= 1)).all()
+    # the resamples only depend on the seed
+    pd.testing.assert_frame_equal(tables[0], tables[1])
+
+
+def test_bootstrap_single_replicate(tmp_path):
+    G, protein_list = build_test_network()
+    algorithm_classes = {
+        "OverlappingNeighbors": OverlappingNeighbors,
+        "ProteinDegreeV2": ProteinDegreeV2,
+    }
+    dataset_path = Path(tmp_path, "dataset")
+    dataset_path.mkdir()
+    write_replicates(dataset_path)
+    for file_path in dataset_path.glob("rep_1_*"):
+        file_path.unlink()
+
+    run_workflow(
+        algorithm_classes,
+        None,
+        2,
+        protein_list,
+        Path(dataset_path, "graph.pickle"),
+        dataset_path,
+        tmp_path,
+        tmp_path,
+        1,
+        False,
+        "_test",
+        False,
+        G,
+        seed=3,
+        bootstrap=200,
+    )
+    # the interval of the only replicate is written next to its AUC
+    for file_name in ["roc_auc_results.csv", "pr_auc_results.csv"]:
+        df = pd.read_csv(Path(tmp_path, file_name), sep="\t", index_col=0)
+        assert list(df.columns) == ["AUC", "95% CI lower", "95% CI upper"]
+        assert (df["95% CI lower"] <= df["95% CI upper"]).all()
+
+
+def test_run_bootstrap_uses_each_algorithms_labels():
+    seed = np.random.SeedSequence(5)
+    y_true = np.array([1, 1, 1, 0, 0, 0, 1, 0])
+    y_score = np.array([0.9, 0.4, 0.7, 0.3, 0.5, 0.1, 0.6, 0.2])
+    results = {
+        "A": {"y_true": y_true, "y_score": y_score},
+        # the same pairs in another order
+        "B": {"y_true": y_true[::-1], "y_score": y_score[::-1]},
+        "C": {"y_true": y_true, "y_score": 1 - y_score},
+    }
+    roc_auc, pr_auc = run_bootstrap(results, dict.fromkeys(results), 50, seed)
+
+    # A and C share their labels and are resampled together, B against its own labels
+    expected = bootstrap_auc([y_score, 1 - y_score], y_true, 50, seed)
+    assert np.array_equal(roc_auc[[0, 2]], expected[0])
+    assert np.array_equal(pr_auc[[0, 2]], expected[1])
+    expected = bootstrap_auc(y_score[::-1], y_true[::-1], 50, seed)
+    assert np.array_equal(roc_auc[[1]], expected[0])
+    assert np.array_equal(pr_auc[[1]], expected[1])
+
+
+def test_output_policies(tmp_path):
+    G, protein_list = build_test_network()
+    algorithm_classes = {
+        "OverlappingNeighbors": OverlappingNeighbors,
+        "ProteinDegreeV2": ProteinDegreeV2,
+    }
+    dataset_path = Path(tmp_path, "dataset")
+    dataset_path.mkdir()
+    write_replicates(dataset_path)
+
+    for output in ["csv", "npz", "none"]:
+        output_path = Path(tmp_path, f"output_{output}")
+        output_path.mkdir()
+        run_workflow(
+            algorithm_classes,
+            None,
+            2,
+            protein_list,
+            Path(dataset_path, "graph.pickle"),
+            dataset_path,
+            output_path,
+            output_path,
+            2,
+            False,
+            "_test",
+            False,
+            G,
+            output=output,
+        )
+        # every file is written by the time run_workflow returns
+        score_files = sorted(
+            f.name for f in output_path.iterdir() if f.stem.endswith("_data")
+        )
+        if output == "none":
+            assert score_files == []
+        else:
+            assert score_files == [
+                f"overlapping_neighbor_data.{output}",
+                f"protein_degree_v2_data.{output}",
+            ]
+
+    csv = pd.read_csv(Path(tmp_path, "output_csv", "overlapping_neighbor_data.csv"), sep="\t")
+    npz = np.load(Path(tmp_path, "output_npz", "overlapping_neighbor_data.npz"))
+    assert list(csv["norm_score"]) == sorted(csv["norm_score"], reverse=True)
+    assert sorted(npz["norm_score"]) == sorted(csv["norm_score"])
+    assert set(npz["protein"]) == set(csv["protein"])
+
+    with pytest.raises(ValueError):
+        run_workflow(
+            algorithm_classes,
+            None,
+            2,
+            protein_list,
+            None,
+            dataset_path,
+            tmp_path,
+            tmp_path,
+            2,
+            False,
+            "_test",
+            False,
+            G,
+            output="parquet",
+        )
+
+
+class FailingAlgorithm:
+    requires = ()
+
+    def predict(self, *args, **kwargs):
+        raise RuntimeError("failed")
+
+
+def test_failed_workflow_restores_output_policy(tmp_path):
+    G, protein_list = build_test_network()
+    dataset_path = Path(tmp_path, "dataset")
+    dataset_path.mkdir()
+    write_replicates(dataset_path)
+
+    set_output_policy("npz")
+    try:
+        with pytest.raises(RuntimeError):
+            run_workflow(
+                {"OverlappingNeighbors": OverlappingNeighbors, "Failing": FailingAlgorithm},
+                None,
+                2,
+                protein_list,
+                Path(dataset_path, "graph.pickle"),
+                dataset_path,
+                tmp_path,
+                tmp_path,
+                2,
+                False,
+                "_test",
+                False,
+                G,
+                instrument=True,
+                profile=["Failing"],
+                output="none",
+            )
+        # the caller's policy is back, the background writer is stopped and nothing is recorded anymore
+        assert get_output_policy() == "npz"
+        assert output_module._writer is None
+        assert not is_instrumented()
+        assert get_profiling() is None
+        assert not Path(tmp_path, "stage_timings.csv").exists()
+    finally:
+        set_output_policy("csv")
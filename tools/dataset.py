@@ -0,0 +1,134 @@
+from pathlib import Path
+import sys
+import numpy as np
+from colorama import Fore
+from tools.replicate_store import ReplicateStore, current_replicate_store
+
+
+class ReplicateDataset:
+    """
+    The protein-go term pairs of one replicate, read once by run_experiement and shared by every algorithm. Each
+    positive pair is followed by its negative pair. The dataset is immutable and its arrays are read-only, so no
+    algorithm can change the pairs the next algorithm scores.
+
+    Parameters:
+    positive_dataset {dict} : positive protein and go term lists as returned by get_datasets
+    negative_dataset {dict} : negative protein and go term lists as returned by get_datasets
+    """
+
+    __slots__ = ("proteins", "go_terms", "true_label")
+
+    def __init__(self, positive_dataset, negative_dataset):
+        arrays = interleave_datasets(positive_dataset, negative_dataset)
+        for attribute, array in zip(self.__slots__, arrays):
+            array.setflags(write=False)
+            object.__setattr__(self, attribute, array)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    # pickling support, datasets are sent to process pool workers
+    def __getstate__(self):
+        return tuple(getattr(self, attribute) for attribute in self.__slots__)
+
+    def __setstate__(self, state):
+        for attribute, array in zip(self.__slots__, state):
+            array.setflags(write=False)
+            object.__setattr__(self, attribute, array)
+
+    def __len__(self):
+        return len(self.proteins)
+
+
+def interleave_datasets(positive_dataset, negative_dataset):
+    """
+    Combine the positive and negative datasets into pair arrays, each positive pair is followed by its negative pair
+
+    Parameters:
+
+    positive_dataset {dict} : positive protein and go term lists as returned by get_datasets
+    negative_dataset {dict} : negative protein and go term lists as returned by get_datasets
+
+    Returns:
+    proteins {np.ndarray}, go_terms {np.ndarray}, true_label {np.ndarray}
+
+    """
+    size = min(len(positive_dataset["protein"]), len(negative_dataset["protein"]))
+    proteins = np.empty(2 * size, dtype=object)
+    go_terms = np.empty(2 * size, dtype=object)
+    proteins[0::2] = positive_dataset["protein"][:size]
+    proteins[1::2] = negative_dataset["protein"][:size]
+    go_terms[0::2] = positive_dataset["go"][:size]
+    go_terms[1::2] = negative_dataset["go"][:size]
+    true_label = np.tile([1, 0], size)
+
+    return proteins, go_terms, true_label
+
+
+def get_datasets(input_directory_path, rep_num, name):
+    """
+    get the positive and negative datasets as lists, from the replicate store of the experiment if there is an up
+    to date one, otherwise by reading their csv files
+
+    Parameters:
+
+    input_directory_path {Path} : Path to directory of the datasets
+    rep_num {int} : Replicate number to specify which positive and negative list to use
+    name {str} : string of namespaces contained in the .csv file name
+
+    Returns:
+    positive_dataset, negative_dataset
+
+    """
+    store_path = current_replicate_store(input_directory_path, name)
+    if store_path is not None:
+        return ReplicateStore(store_path).get_datasets(rep_num)
+
+    positive_dataset = {"protein": [], "go": []}
+    negative_dataset = {"protein": [], "go": []}
+    try:
+        with open(
+            Path(input_directory_path, "rep_" + str(rep_num) + "_positive_protein_go_term_pairs" + name + ".csv"), "r"
+        ) as file:
+            next(file)
+            for line in file:
+                parts = line.strip().split("\t")
+                # print(parts[0])
+                positive_dataset["protein"].append(parts[0])
+                positive_dataset["go"].append(parts[1])
+    except:
+        print(Fore.RED + "\nFile not found: ensure given namespaces match positive and negative file namespaces\n")
+        sys.exit(1)
+
+    with open(
+        Path(input_directory_path, "rep_" + str(rep_num) + "_negative_protein_go_term_pairs" + name + ".csv"), "r"
+    ) as file:
+        next(file)
+        for line in file:
+            parts = line.strip().split("\t")
+            # print(parts[0])
+            negative_dataset["protein"].append(parts[0])
+            negative_dataset["go"].append(parts[1])
+
+    return positive_dataset, negative_dataset
+
+
+def get_replicate_dataset(dataset, input_directory_path, rep_num, name):
+    """
+    Get the pairs an algorithm should score. The dataset run_experiement passes to predict is used when there is
+    one, otherwise the replicate is read from input_directory_path.
+
+    Parameters:
+
+    dataset {ReplicateDataset or None} : the dataset passed to predict
+    input_directory_path {Path} : Path to directory of the datasets
+    rep_num {int} : Replicate number to specify which positive and negative list to use
+    name {str} : string of namespaces contained in the .csv file name
+
+    Returns:
+    ReplicateDataset
+
+    """
+    if dataset is None:
+        dataset = ReplicateDataset(*get_datasets(input_directory_path, rep_num, name))
+    return dataset
@@ -0,0 +1,85 @@
+import numpy as np
+
+PAIR_FEATURE_COLUMNS = [
+    "protein_code",
+    "go_code",
+    "pro_pro_neighbor",
+    "go_neighbor",
+    "go_annotated_pro_pro_neighbors",
+    "self_loop",
+    "annotated",
+]
+
+
+class PairFeatures:
+    """
+    Graph features of a batch of protein and go term pairs as a columnar table of read-only arrays, one entry per
+    pair. The neighbor based algorithms are formulas over these columns, so the features of a replicate's pairs
+    are gathered from the graph once and shared by all of them.
+
+    protein_code {np.ndarray} : protein codes of the pairs
+    go_code {np.ndarray} : go term codes of the pairs
+    pro_pro_neighbor {np.ndarray} : number of protein neighbors of the protein, a self edge counts once
+    go_neighbor {np.ndarray} : number of proteins annotated with the go term
+    go_annotated_pro_pro_neighbors {np.ndarray} : number of protein neighbors annotated with the go term, a
+        protein with a self edge that is annotated counts itself
+    self_loop {np.ndarray} : 1 for proteins with an edge to themselves
+    annotated {np.ndarray} : 1 for pairs whose protein is annotated with the go term
+    """
+
+    __slots__ = tuple(PAIR_FEATURE_COLUMNS)
+
+    def __init__(self, **columns):
+        for column in PAIR_FEATURE_COLUMNS:
+            array = np.asarray(columns[column])
+            array.setflags(write=False)
+            object.__setattr__(self, column, array)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __getitem__(self, column):
+        if column not in PAIR_FEATURE_COLUMNS:
+            raise KeyError(column)
+        return getattr(self, column)
+
+    def __len__(self):
+        return self.protein_code.size
+
+    @property
+    def go_annotated_neighbors_excluding_self(self):
+        """
+        go_annotated_pro_pro_neighbors without the protein itself, a self edge is not a real neighbor
+        """
+        return self.go_annotated_pro_pro_neighbors - (self.self_loop & self.annotated)
+
+    def to_dict(self):
+        return {column: getattr(self, column) for column in PAIR_FEATURE_COLUMNS}
+
+
+def extract_pair_features(graph, protein_codes, go_codes):
+    """
+    Gather the features of a batch of protein and go term code pairs from the graph. A column of protein codes
+    (shape (n, 1)) and a row of go term codes (shape (1, m)) give features of shape (n, m) for every combination.
+
+    Parameters:
+    graph {CSRGraph} : CSR index of the interactome and go term connections
+    protein_codes {np.ndarray} : protein codes of the pairs
+    go_codes {np.ndarray} : go term codes of the pairs
+
+    Returns:
+    PairFeatures
+    """
+    protein_codes = np.asarray(protein_codes)
+    go_codes = np.asarray(go_codes)
+    return PairFeatures(
+        protein_code=protein_codes,
+        go_code=go_codes,
+        pro_pro_neighbor=graph.ppi_degree[protein_codes],
+        go_neighbor=graph.go_protein_degree[go_codes],
+        go_annotated_pro_pro_neighbors=graph.annotated_neighbor_counts(
+            protein_codes, go_codes
+        ),
+        self_loop=graph.self_loop[protein_codes].astype(int),
+        annotated=graph.has_annotations(protein_codes, go_codes).astype(int),
+    )
@@ -0,0 +1,877 @@
+from functools import cached_property
+from pathlib import Path
+import json
+import os
+import numpy as np
+from scipy import sparse
+from scipy.special import gammaln
+from tools.features import extract_pair_features
+from tools.helper import import_graph_from_pickle
+
+
+class CSRGraph:
+    """
+    Compressed sparse row (CSR) index of a protein protein interaction network with go term annotations.
+
+    Proteins and go terms are each given their own integer codes. Three adjacency structures are kept:
+    protein -> protein (physical interactions), protein -> go term and go term -> protein (annotations).
+    The neighbors of a node are the slice indices[indptr[code]:indptr[code + 1]] of the respective arrays,
+    sorted by code. A protein with a self edge lists itself once among its protein neighbors, the same way
+    networkx does.
+    """
+
+    def __init__(
+        self,
+        protein_ids,
+        go_ids,
+        ppi_indptr,
+        ppi_indices,
+        pg_indptr,
+        pg_indices,
+        gp_indptr,
+        gp_indices,
+        protein_order=None,
+        go_order=None,
+        stats=None,
+        version=0,
+    ):
+        self.protein_ids = np.asarray(protein_ids, dtype=str)
+        self.go_ids = np.asarray(go_ids, dtype=str)
+        self.ppi_indptr = ppi_indptr
+        self.ppi_indices = ppi_indices
+        self.pg_indptr = pg_indptr
+        self.pg_indices = pg_indices
+        self.gp_indptr = gp_indptr
+        self.gp_indices = gp_indices
+
+        # sorted views of the id tables, used to map ids to codes with a binary search
+        if protein_order is None:
+            protein_order = np.argsort(self.protein_ids, kind="stable")
+        if go_order is None:
+            go_order = np.argsort(self.go_ids, kind="stable")
+        self._protein_order = protein_order
+        self._go_order = go_order
+
+        if stats is None:
+            stats = GraphStats.from_csr(
+                ppi_indptr, ppi_indices, pg_indptr, gp_indptr
+            )
+        self.stats = stats
+        self.ppi_degree = stats.ppi_degree
+        self.protein_go_degree = stats.protein_go_degree
+        self.go_protein_degree = stats.go_protein_degree
+        self.self_loop = stats.self_loop
+        # number of deltas applied to the graph since it was built
+        self.version = int(version)
+        # (dataset, features) of the last dataset pair_features was called with
+        self._pair_features = None
+
+    @property
+    def protein_count(self):
+        return len(self.protein_ids)
+
+    @property
+    def go_count(self):
+        return len(self.go_ids)
+
+    @classmethod
+    def from_edges(cls, protein_ids, go_ids, ppi_edges, go_edges):
+        """
+        Build the CSR index from integer coded edge lists
+
+        Parameters:
+        protein_ids {array} : protein id of each protein code
+        go_ids {array} : go term id of each go term code
+        ppi_edges {tuple} : two arrays of protein codes, one undirected protein-protein edge per position
+        go_edges {tuple} : an array of protein codes and an array of go term codes, one annotation per position
+
+        Returns:
+        CSRGraph
+        """
+        protein_count = len(protein_ids)
+        go_count = len(go_ids)
+
+        source = np.asarray(ppi_edges[0], dtype=np.int64)
+        target = np.asarray(ppi_edges[1], dtype=np.int64)
+        ppi_indptr, ppi_indices = _build_csr(
+            np.concatenate([source, target]),
+            np.concatenate([target, source]),
+            protein_count,
+            protein_count,
+        )
+
+        protein = np.asarray(go_edges[0], dtype=np.int64)
+        go = np.asarray(go_edges[1], dtype=np.int64)
+        pg_indptr, pg_indices = _build_csr(protein, go, protein_count, go_count)
+        gp_indptr, gp_indices = _build_csr(go, protein, go_count, protein_count)
+
+        return cls(
+            protein_ids,
+            go_ids,
+            ppi_indptr,
+            ppi_indices,
+            pg_indptr,
+            pg_indices,
+            gp_indptr,
+            gp_indices,
+        )
+
+    @classmethod
+    def from_networkx(cls, G: "nx.Graph"):
+        """
+        Build the CSR index from the graph returned by create_ppi_network
+
+        Parameters:
+        G {nx.Graph} : graph that represents the interactome and go term connections
+
+        Returns:
+        CSRGraph
+        """
+        protein_ids = []
+        go_ids = []
+        for node, attributes in G.nodes(data=True):
+            if attributes["type"] == "protein":
+                protein_ids.append(node)
+            else:
+                go_ids.append(node)
+        protein_code = {protein: i for i, protein in enumerate(protein_ids)}
+        go_code = {go: i for i, go in enumerate(go_ids)}
+
+        ppi_edges = ([], [])
+        go_edges = ([], [])
+        for u, v, attributes in G.edges(data=True):
+            if attributes["type"] == "protein_protein":
+                ppi_edges[0].append(protein_code[u])
+                ppi_edges[1].append(protein_code[v])
+            elif u in go_code:
+                go_edges[0].append(protein_code[v])
+                go_edges[1].append(go_code[u])
+            else:
+                go_edges[0].append(protein_code[u])
+                go_edges[1].append(go_code[v])
+
+        return cls.from_edges(protein_ids, go_ids, ppi_edges, go_edges)
+
+    def apply_delta(self, delta):
+        """
+        Apply added and removed edges to the graph without rebuilding it from the interactome. Proteins and go terms
+        new to the graph are appended to the id tables, so the codes of existing nodes do not change. The graph
+        statistics are updated from the edges that actually changed instead of being derived again. Removals are
+        applied after additions, removing an edge that is not in the graph does nothing.
+
+        Parameters:
+        delta {GraphDelta} : the added and removed protein-protein and protein-go term edges
+
+        Returns:
+        CSRGraph : the updated graph, its version is one more than this graph's
+        """
+        added_ppi = np.asarray(delta.added_ppi, dtype=str).reshape(-1, 2)
+        removed_ppi = np.asarray(delta.removed_ppi, dtype=str).reshape(-1, 2)
+        added_go = np.asarray(delta.added_annotations, dtype=str).reshape(-1, 2)
+        removed_go = np.asarray(delta.removed_annotations, dtype=str).reshape(-1, 2)
+
+        protein_ids = _extend_ids(
+            self.protein_ids,
+            self._protein_order,
+            np.concatenate([added_ppi.ravel(), added_go[:, 0]]),
+        )
+        go_ids = _extend_ids(self.go_ids, self._go_order, added_go[:, 1])
+        protein_order = np.argsort(protein_ids, kind="stable")
+        go_order = np.argsort(go_ids, kind="stable")
+        protein_count = len(protein_ids)
+        go_count = len(go_ids)
+
+        def encode(ids, order, values):
+            # removed edges may name nodes that are not in the graph, they are dropped
+            codes = _encode(ids, order, values)
+            return codes[np.all(codes >= 0, axis=1)]
+
+        added_ppi = encode(protein_ids, protein_order, added_ppi)
+        removed_ppi = encode(protein_ids, protein_order, removed_ppi)
+        ppi_indptr, ppi_indices, ppi_added, ppi_removed = _update_csr(
+            self.ppi_indptr,
+            self.ppi_indices,
+            protein_count,
+            protein_count,
+            _both_directions(added_ppi),
+            _both_directions(removed_ppi),
+        )
+
+        def encode_annotations(annotations):
+            return np.stack(
+                [
+                    _encode(protein_ids, protein_order, annotations[:, 0]),
+                    _encode(go_ids, go_order, annotations[:, 1]),
+                ],
+                axis=1,
+            ).reshape(-1, 2)
+
+        added_go = encode_annotations(added_go)
+        removed_go = encode_annotations(removed_go)
+        removed_go = removed_go[np.all(removed_go >= 0, axis=1)]
+        pg_indptr, pg_indices, go_added, go_removed = _update_csr(
+            self.pg_indptr, self.pg_indices, protein_count, go_count, added_go, removed_go
+        )
+        gp_indptr, gp_indices, _, _ = _update_csr(
+            self.gp_indptr,
+            self.gp_indices,
+            go_count,
+            protein_count,
+            added_go[:, ::-1],
+            removed_go[:, ::-1],
+        )
+
+        stats = self.stats.updated(
+            protein_count, go_count, ppi_added, ppi_removed, go_added, go_removed
+        )
+        return CSRGraph(
+            protein_ids,
+            go_ids,
+            ppi_indptr,
+            ppi_indices,
+            pg_indptr,
+            pg_indices,
+            gp_indptr,
+            gp_indices,
+            protein_order,
+            go_order,
+            stats,
+            self.version + 1,
+        )
+
+    def get_protein_codes(self, proteins):
+        """
+        Map protein ids to their integer codes, raises a KeyError for proteins not in the graph
+        """
+        return _lookup(self.protein_ids, self._protein_order, proteins, "protein")
+
+    def get_go_codes(self, go_terms):
+        """
+        Map go term ids to their integer codes, raises a KeyError for go terms not in the graph
+        """
+        return _lookup(self.go_ids, self._go_order, go_terms, "go term")
+
+    def get_protein_code(self, protein):
+        return int(self.get_protein_codes([protein])[0])
+
+    def get_go_code(self, go_term):
+        return int(self.get_go_codes([go_term])[0])
+
+    def protein_neighbors(self, protein_code):
+        """
+        Protein codes that physically interact with the given protein (includes itself if it has a self edge)
+        """
+        return self.ppi_indices[
+            self.ppi_indptr[protein_code] : self.ppi_indptr[protein_code + 1]
+        ]
+
+    def protein_go_terms(self, protein_code):
+        """
+        Go term codes the given protein is annotated with
+        """
+        return self.pg_indices[
+            self.pg_indptr[protein_code] : self.pg_indptr[protein_code + 1]
+        ]
+
+    def go_proteins(self, go_code):
+        """
+        Protein codes annotated with the given go term
+        """
+        return self.gp_indices[self.gp_indptr[go_code] : self.gp_indptr[go_code + 1]]
+
+    def has_annotation(self, protein_code, go_code):
+        go_terms = self.protein_go_terms(protein_code)
+        i = np.searchsorted(go_terms, go_code)
+        return bool(i < len(go_terms) and go_terms[i] == go_code)
+
+    def has_self_loop(self, protein_code):
+        return bool(self.self_loop[protein_code])
+
+    def annotated_neighbor_count(self, protein_code, go_code):
+        """
+        Number of protein neighbors of a protein that are annotated with a go term (includes the protein itself
+        if it has a self edge and is annotated)
+        """
+        neighbors = self.protein_neighbors(protein_code)
+        annotated = self.go_proteins(go_code)
+        return int(np.count_nonzero(np.isin(neighbors, annotated, assume_unique=True)))
+
+    def has_annotations(self, protein_codes, go_codes):
+        """
+        Vectorized has_annotation, returns a boolean array with one entry per protein and go term code pair. A
+        column of protein codes (shape (n, 1)) and a row of go term codes (shape (1, m)) give the full (n, m)
+        matrix, read from the sparse annotation matrix.
+        """
+        protein_codes = np.asarray(protein_codes)
+        go_codes = np.asarray(go_codes)
+        if _is_outer(protein_codes, go_codes):
+            return self.pg_matrix[protein_codes[:, 0]][:, go_codes[0]].toarray() > 0
+        keys = protein_codes * self.go_count + go_codes
+        if len(self._annotation_keys) == 0:
+            return np.zeros(keys.shape, dtype=bool)
+        position = np.searchsorted(self._annotation_keys, keys)
+        position = np.minimum(position, len(self._annotation_keys) - 1)
+        return self._annotation_keys[position] == keys
+
+    def annotated_neighbor_counts(self, protein_codes, go_codes, include_self=True):
+        """
+        Vectorized annotated_neighbor_count, one count per protein and go term code pair, gathered from
+        annotated_neighbor_matrix. A column of protein codes (shape (n, 1)) and a row of go term codes
+        (shape (1, m)) give the full (n, m) matrix of counts.
+
+        Parameters:
+        protein_codes {np.ndarray} : protein codes of the pairs
+        go_codes {np.ndarray} : go term codes of the pairs
+        include_self {bool} : False to not count a protein with a self edge as its own annotated neighbor
+
+        Returns:
+        counts {np.ndarray}
+        """
+        protein_codes = np.asarray(protein_codes)
+        go_codes = np.asarray(go_codes)
+        if _is_outer(protein_codes, go_codes):
+            counts = self.annotated_neighbor_matrix[protein_codes[:, 0]][
+                :, go_codes[0]
+            ].toarray()
+        else:
+            protein_codes, go_codes = np.broadcast_arrays(protein_codes, go_codes)
+            counts = np.asarray(
+                self.annotated_neighbor_matrix[protein_codes.ravel(), go_codes.ravel()]
+            ).reshape(protein_codes.shape)
+        counts = counts.astype(np.int64)
+        if not include_self:
+            counts -= self.self_loop[protein_codes] & self.has_annotations(
+                protein_codes, go_codes
+            )
+        return counts
+
+    def degree(self, protein_code):
+        """
+        Degree of a protein in the networkx sense, a self edge adds two to the degree. Accepts a single code
+        or an array of codes.
+        """
+        return (
+            self.ppi_degree[protein_code]
+            + self.protein_go_degree[protein_code]
+            + self.self_loop[protein_code]
+        )
+
+    @cached_property
+    def ppi_matrix(self):
+        """
+        Protein-protein adjacency as a scipy sparse matrix
+        """
+        return sparse.csr_matrix(
+            (np.ones(len(self.ppi_indices), dtype=np.int32), self.ppi_indices, self.ppi_indptr),
+            shape=(self.protein_count, self.protein_count),
+        )
+
+    @cached_property
+    def gp_matrix(self):
+        """
+        Go term-protein adjacency as a scipy sparse matrix
+        """
+        return sparse.csr_matrix(
+            (np.ones(len(self.gp_indices), dtype=np.int32), self.gp_indices, self.gp_indptr),
+            shape=(self.go_count, self.protein_count),
+        )
+
+    @cached_property
+    def pg_matrix(self):
+        """
+        Protein-go term adjacency as a scipy sparse matrix
+        """
+        return sparse.csr_matrix(
+            (np.ones(len(self.pg_indices), dtype=np.int32), self.pg_indices, self.pg_indptr),
+            shape=(self.protein_count, self.go_count),
+        )
+
+    @cached_property
+    def annotated_neighbor_matrix(self):
+        """
+        Number of protein neighbors of each protein annotated with each go term, the sparse (protein, go term)
+        matrix product of the protein-protein and protein-go term adjacency matrices. It is computed the first
+        time it is used, every batch of pairs after that is a gather from it.
+        """
+        counts = (self.ppi_matrix @ self.pg_matrix).tocsr()
+        counts.sort_indices()
+        return counts
+
+    @cached_property
+    def log_factorial(self):
+        """
+        log(n!) for every n up to the number of proteins, the hypergeometric algorithms look the binomial
+        coefficients of their pairs up in it instead of evaluating gammaln for every pair
+        """
+        return gammaln(np.arange(self.protein_count + 1) + 1)
+
+    def pair_features(self, dataset):
+        """
+        Features of the pairs of a replicate dataset, see tools.features. The features of the last dataset are
+        kept, so the algorithms scoring the same replicate on this graph gather them from the graph once.
+
+        Parameters:
+        dataset {ReplicateDataset} : the replicate's pairs
+
+        Returns:
+        PairFeatures
+        """
+        if self._pair_features is None or self._pair_features[0] is not dataset:
+            features = extract_pair_features(
+                self,
+                self.get_protein_codes(dataset.proteins),
+                self.get_go_codes(dataset.go_terms),
+            )
+            self._pair_features = (dataset, features)
+        return self._pair_features[1]
+
+    def prepare(self, requirements):
+        """
+        Compute the structures in requirements now instead of the first time an algorithm uses them. Each one is
+        computed once per graph and then shared by every algorithm that declared it.
+
+        Parameters:
+        requirements {list} : names of structures in GRAPH_STRUCTURES, e.g. the requires of the algorithms of a run
+        """
+        for requirement in requirements:
+            if requirement not in GRAPH_STRUCTURES:
+                raise ValueError(
+                    f"unknown graph structure {requirement}, expected one of {list(GRAPH_STRUCTURES)}"
+                )
+            GRAPH_STRUCTURES[requirement](self)
+
+    @cached_property
+    def _annotation_keys(self):
+        # protein code * go count + go code of every annotation, sorted because the rows and their indices are
+        rows = np.repeat(np.arange(self.protein_count), self.protein_go_degree)
+        return rows * self.go_count + self.pg_indices
+
+
+# structures algorithms declare in their requires attribute and how to compute them on a CSRGraph, the degree
+# vectors are computed with the graph, the others the first time they are used
+GRAPH_STRUCTURES = {
+    "degrees": lambda graph: graph.stats,
+    "ppi_adjacency": lambda graph: graph.ppi_matrix,
+    "go_adjacency": lambda graph: (graph.pg_matrix, graph.gp_matrix, graph._annotation_keys),
+    "annotated_neighbor_counts": lambda graph: graph.annotated_neighbor_matrix,
+    "hypergeometric_stats": lambda graph: graph.log_factorial,
+}
+
+
+class GraphStats:
+    """
+    Counts the scoring algorithms look up for every pair, computed once when the graph is built and exported
+    with it, so no algorithm has to derive them from the graph again.
+
+    protein_count {int} : number of protein nodes in the graph (N of the hypergeometric distribution)
+    ppi_degree {np.ndarray} : number of protein neighbors of each protein, a self edge counts once (n)
+    protein_go_degree {np.ndarray} : number of go terms annotated to each protein
+    go_protein_degree {np.ndarray} : number of proteins annotated with each go term (K)
+    self_loop {np.ndarray} : True for proteins with an edge to themselves
+    """
+
+    def __init__(
+        self, protein_count, ppi_degree, protein_go_degree, go_protein_degree, self_loop
+    ):
+        self.protein_count = int(protein_count)
+        self.ppi_degree = ppi_degree
+        self.protein_go_degree = protein_go_degree
+        self.go_protein_degree = go_protein_degree
+        self.self_loop = self_loop
+
+    def updated(
+        self, protein_count, go_count, ppi_added, ppi_removed, go_added, go_removed
+    ):
+        """
+        Statistics of the graph after a delta, computed from the edges that changed
+
+        Parameters:
+        protein_count {int} : number of proteins after the delta, new proteins follow the existing ones
+        go_count {int} : number of go terms after the delta, new go terms follow the existing ones
+        ppi_added {np.ndarray} : (protein, protein) codes of the added protein-protein edges, in both directions
+        ppi_removed {np.ndarray} : (protein, protein) codes of the removed protein-protein edges, in both directions
+        go_added {np.ndarray} : (protein, go term) codes of the added annotations
+        go_removed {np.ndarray} : (protein, go term) codes of the removed annotations
+
+        Returns:
+        GraphStats
+        """
+
+        def change(codes, count):
+            return np.bincount(codes, minlength=count).astype(np.int64)
+
+        def extend(array, count):
+            extended = np.zeros(count, dtype=np.int64)
+            extended[: len(array)] = array
+            return extended
+
+        ppi_degree = (
+            extend(self.ppi_degree, protein_count)
+            + change(ppi_added[:, 0], protein_count)
+            - change(ppi_removed[:, 0], protein_count)
+        )
+        protein_go_degree = (
+            extend(self.protein_go_degree, protein_count)
+            + change(go_added[:, 0], protein_count)
+            - change(go_removed[:, 0], protein_count)
+        )
+        go_protein_degree = (
+            extend(self.go_protein_degree, go_count)
+            + change(go_added[:, 1], go_count)
+            - change(go_removed[:, 1], go_count)
+        )
+        self_loop = np.zeros(protein_count, dtype=bool)
+        self_loop[: len(self.self_loop)] = self.self_loop
+        self_loop[ppi_added[ppi_added[:, 0] == ppi_added[:, 1], 0]] = True
+        self_loop[ppi_removed[ppi_removed[:, 0] == ppi_removed[:, 1], 0]] = False
+        return GraphStats(
+            protein_count, ppi_degree, protein_go_degree, go_protein_degree, self_loop
+        )
+
+    @classmethod
+    def from_csr(cls, ppi_indptr, ppi_indices, pg_indptr, gp_indptr):
+        """
+        Derive the statistics from the CSR arrays of a graph
+        """
+        ppi_degree = np.diff(ppi_indptr)
+        protein_count = len(ppi_degree)
+        rows = np.repeat(np.arange(protein_count), ppi_degree)
+        self_loop = np.zeros(protein_count, dtype=bool)
+        self_loop[rows[rows == ppi_indices]] = True
+        return cls(
+            protein_count,
+            ppi_degree,
+            np.diff(pg_indptr),
+            np.diff(gp_indptr),
+            self_loop,
+        )
+
+
+class GraphContext:
+    """
+    The graph of a workflow run. The graph is read from disk the first time it is needed and then shared by
+    the sampling step and every algorithm of every replicate.
+
+    Parameters:
+    graph_file_path {Path} : path of the exported nx graph or of a directory written by export_csr_graph
+    graph {CSRGraph or nx.Graph} : an already loaded graph, graph_file_path is not read if given. An nx graph is
+        indexed right away, pass the CSRGraph when there is one, e.g. the one main.build_graph returns.
+    """
+
+    def __init__(self, graph_file_path=None, graph=None):
+        self.graph_file_path = graph_file_path
+        self._in_memory = graph is not None
+        if graph is None or isinstance(graph, CSRGraph):
+            self._csr_graph = graph
+        else:
+            self._csr_graph = CSRGraph.from_networkx(graph)
+
+    @property
+    def in_memory(self):
+        """
+        True if the graph was given in memory instead of being read from graph_file_path
+        """
+        return self._in_memory
+
+    @property
+    def csr_graph(self):
+        if self._csr_graph is None:
+            self._csr_graph = load_csr_graph(self.graph_file_path)
+        return self._csr_graph
+
+
+def get_csr_graph(graph, graph_file_path):
+    """
+    Get the CSR index an algorithm should run on. An in-memory graph is used when one is given, otherwise the
+    graph is read from graph_file_path.
+
+    Parameters:
+    graph {GraphContext, CSRGraph, nx.Graph or None} : the in-memory graph passed to predict
+    graph_file_path {Path} : path of the exported nx graph, only read if graph is None
+
+    Returns:
+    CSRGraph
+    """
+    if graph is None:
+        return load_csr_graph(graph_file_path)
+    if isinstance(graph, GraphContext):
+        return graph.csr_graph
+    if isinstance(graph, CSRGraph):
+        return graph
+    return CSRGraph.from_networkx(graph)
+
+
+# version of the on-disk layout written by export_csr_graph, bump it whenever the set or meaning of the arrays changes
+CSR_GRAPH_FORMAT_VERSION = 2
+CSR_GRAPH_ARRAYS = [
+    "protein_ids",
+    "go_ids",
+    "protein_order",
+    "go_order",
+    "ppi_indptr",
+    "ppi_indices",
+    "pg_indptr",
+    "pg_indices",
+    "gp_indptr",
+    "gp_indices",
+]
+GRAPH_STATS_ARRAYS = [
+    "ppi_degree",
+    "protein_go_degree",
+    "go_protein_degree",
+    "self_loop",
+]
+
+
+def export_csr_graph(graph, directory):
+    """
+    Write a CSRGraph as a directory of .npy arrays and a manifest.json describing them
+
+    Parameters:
+    graph {CSRGraph} : the graph to export
+    directory {Path} : directory to write the graph to, created if it does not exist
+
+    Returns:
+    Null
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    arrays = {
+        "protein_ids": graph.protein_ids,
+        "go_ids": graph.go_ids,
+        "protein_order": graph._protein_order,
+        "go_order": graph._go_order,
+        "ppi_indptr": graph.ppi_indptr,
+        "ppi_indices": graph.ppi_indices,
+        "pg_indptr": graph.pg_indptr,
+        "pg_indices": graph.pg_indices,
+        "gp_indptr": graph.gp_indptr,
+        "gp_indices": graph.gp_indices,
+    }
+    # the graph statistics are exported with the graph so they are never derived again
+    for array_name in GRAPH_STATS_ARRAYS:
+        arrays[array_name] = getattr(graph.stats, array_name)
+    for array_name, array in arrays.items():
+        np.save(Path(directory, array_name + ".npy"), np.ascontiguousarray(array))
+
+    # the manifest is written last, a directory without one is an incomplete export
+    manifest = {
+        "format": "csr_graph",
+        "version": CSR_GRAPH_FORMAT_VERSION,
+        "protein_count": graph.protein_count,
+        "go_count": graph.go_count,
+        "graph_version": graph.version,
+        "arrays": list(arrays.keys()),
+    }
+    with open(Path(directory, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=4)
+
+
+def import_csr_graph(directory, mmap_mode="r"):
+    """
+    Open a graph written by export_csr_graph. With the default mmap_mode the arrays are memory mapped, nothing is
+    read until it is used and processes opening the same graph share its pages.
+
+    Parameters:
+    directory {Path} : directory the graph was exported to
+    mmap_mode {str} : mmap_mode passed to np.load, None to read the arrays into memory
+
+    Returns:
+    CSRGraph
+    """
+    manifest = read_csr_graph_manifest(directory)
+    if manifest is None:
+        raise FileNotFoundError(f"{directory} does not contain an exported graph")
+    if manifest.get("format") != "csr_graph" or manifest.get("version") != CSR_GRAPH_FORMAT_VERSION:
+        raise ValueError(
+            f"{directory} has graph format {manifest.get('format')} version {manifest.get('version')}, "
+            f"expected csr_graph version {CSR_GRAPH_FORMAT_VERSION}"
+        )
+
+    def load(array_name):
+        return np.load(Path(directory, array_name + ".npy"), mmap_mode=mmap_mode)
+
+    stats = GraphStats(
+        manifest["protein_count"],
+        *[load(array_name) for array_name in GRAPH_STATS_ARRAYS],
+    )
+    return CSRGraph(
+        **{array_name: load(array_name) for array_name in CSR_GRAPH_ARRAYS},
+        stats=stats,
+        version=manifest.get("graph_version", 0),
+    )
+
+
+def read_csr_graph_manifest(directory):
+    """
+    Read the manifest of a graph written by export_csr_graph, None if the directory does not contain one
+    """
+    if directory is None:
+        return None
+    manifest_path = Path(directory, "manifest.json")
+    if not manifest_path.exists():
+        return None
+    with open(manifest_path, "r") as f:
+        return json.load(f)
+
+
+def is_csr_graph_directory(path):
+    manifest = read_csr_graph_manifest(path)
+    return manifest is not None and manifest.get("version") == CSR_GRAPH_FORMAT_VERSION
+
+
+def csr_graph_directory(graph_file_path):
+    """
+    Directory the CSR export of a pickled graph is written to, e.g. output/dataset/graph for output/dataset/graph.pickle
+    """
+    graph_file_path = Path(graph_file_path)
+    return graph_file_path.with_suffix("")
+
+
+def load_csr_graph(graph_file_path):
+    """
+    Load the CSR index of a graph. A directory written by export_csr_graph is memory mapped. For a pickled nx graph,
+    its CSR export is memory mapped instead when one exists next to it and is not older than the pickle, otherwise
+    the pickle is read and indexed.
+
+    Parameters:
+    graph_file_path {Path} : path of the exported nx graph or of a directory written by export_csr_graph
+
+    Returns:
+    CSRGraph
+    """
+    directory = csr_export_path(graph_file_path)
+    if directory is not None:
+        return import_csr_graph(directory)
+    return CSRGraph.from_networkx(import_graph_from_pickle(graph_file_path))
+
+
+def csr_export_path(graph_file_path):
+    """
+    The CSR export load_csr_graph memory maps for graph_file_path, None if it has to read the pickle instead
+
+    Parameters:
+    graph_file_path {Path} : path of the exported nx graph or of a directory written by export_csr_graph
+
+    Returns:
+    directory {Path or None}
+    """
+    if graph_file_path is None:
+        return None
+    if Path(graph_file_path).is_dir():
+        return Path(graph_file_path)
+
+    directory = csr_graph_directory(graph_file_path)
+    if is_csr_graph_directory(directory) and (
+        not Path(graph_file_path).exists()
+        or os.path.getmtime(Path(directory, "manifest.json"))
+        >= os.path.getmtime(graph_file_path)
+    ):
+        return directory
+    return None
+
+
+def same_csr_graph(graph, other):
+    """
+    True if two CSR graphs have the same id tables and edges, e.g. an in-memory graph and an export of it
+    """
+    if not (
+        np.array_equal(graph.protein_ids, other.protein_ids)
+        and np.array_equal(graph.go_ids, other.go_ids)
+    ):
+        return False
+    return all(
+        np.array_equal(getattr(graph, array_name), getattr(other, array_name))
+        for array_name in [
+            "ppi_indptr",
+            "ppi_indices",
+            "pg_indptr",
+            "pg_indices",
+            "gp_indptr",
+            "gp_indices",
+        ]
+    )
+
+
+def _build_csr(rows, cols, row_count, col_count):
+    # deduplicate (row, col) pairs and sort them row major, the same pair added twice is a single edge
+    width = max(col_count, 1)
+    keys = np.unique(rows * width + cols)
+    row, indices = np.divmod(keys, width)
+    indptr = np.zeros(row_count + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum(np.bincount(row, minlength=row_count))
+    return indptr, indices
+
+
+def _update_csr(indptr, indices, row_count, col_count, added, removed):
+    # add and then remove (row, col) code pairs. Returns the new CSR arrays and the pairs that were actually added
+    # (not already present) and actually removed (present after the additions), as (n, 2) arrays
+    width = max(col_count, 1)
+    rows = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+    keys = rows * width + np.asarray(indices, dtype=np.int64)
+    added_keys = np.setdiff1d(added[:, 0] * width + added[:, 1], keys)
+    keys = np.union1d(keys, added_keys)
+    removed_keys = np.intersect1d(removed[:, 0] * width + removed[:, 1], keys)
+    keys = np.setdiff1d(keys, removed_keys, assume_unique=True)
+
+    row, indices = np.divmod(keys, width)
+    indptr = np.zeros(row_count + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum(np.bincount(row, minlength=row_count))
+    return (
+        indptr,
+        indices,
+        np.stack(np.divmod(added_keys, width), axis=1),
+        np.stack(np.divmod(removed_keys, width), axis=1),
+    )
+
+
+def _both_directions(edges):
+    # an undirected protein-protein edge is stored in the rows of both of its proteins
+    return np.concatenate([edges, edges[:, ::-1]]).astype(np.int64)
+
+
+def _extend_ids(ids, order, values):
+    # ids followed by the values that are not in ids yet, in order of first appearance
+    import pandas as pd
+
+    values = np.asarray(values, dtype=str)
+    new = pd.unique(values[_encode(ids, order, values) < 0])
+    if len(new) == 0:
+        return np.asarray(ids, dtype=str)
+    return np.concatenate([np.asarray(ids, dtype=str), np.asarray(new, dtype=str)])
+
+
+def _encode(ids, order, values):
+    # codes of values in ids, -1 for values that are not in ids
+    values = np.asarray(values, dtype=str)
+    if len(ids) == 0:
+        return np.full(values.shape, -1, dtype=np.int64)
+    position = np.searchsorted(ids, values, sorter=order)
+    position = np.minimum(position, len(ids) - 1)
+    codes = np.asarray(order[position], dtype=np.int64)
+    return np.where(ids[codes] == values, codes, -1)
+
+
+def _is_outer(protein_codes, go_codes):
+    # a column of protein codes against a row of go term codes asks for every combination
+    return (
+        protein_codes.ndim == 2
+        and go_codes.ndim == 2
+        and protein_codes.shape[1] == 1
+        and go_codes.shape[0] == 1
+    )
+
+
+def _lookup(ids, order, values, kind):
+    values = np.asarray(values, dtype=str)
+    if len(ids) == 0:
+        if values.size:
+            raise KeyError(f"{kind} {values.flat[0]} is not in the graph")
+        return np.zeros(values.shape, dtype=np.int64)
+    position = np.searchsorted(ids, values, sorter=order)
+    position = np.minimum(position, len(ids) - 1)
+    codes = order[position]
+    missing = ids[codes] != values
+    if np.any(missing):
+        raise KeyError(f"{kind} {values[missing].flat[0]} is not in the graph")
+    return codes
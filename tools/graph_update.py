@@ -0,0 +1,154 @@
+from pathlib import Path
+import networkx as nx
+import numpy as np
+from tools.graph import (
+    CSRGraph,
+    csr_graph_directory,
+    export_csr_graph,
+    import_csr_graph,
+    is_csr_graph_directory,
+)
+from tools.helper import export_graph_to_pickle, import_graph_from_pickle
+from tools.reader import read_columns
+
+DELTA_ACTIONS = ["add", "remove"]
+DELTA_EDGE_TYPES = ["protein_protein", "protein_go_term"]
+
+
+class GraphDelta:
+    """
+    Edges added to and removed from the interactome and the go term annotations since the graph was built
+
+    added_ppi {list} : [protein, protein] interactions to add
+    removed_ppi {list} : [protein, protein] interactions to remove
+    added_annotations {list} : [protein, go term] annotations to add
+    removed_annotations {list} : [protein, go term] annotations to remove
+    """
+
+    def __init__(
+        self, added_ppi=(), removed_ppi=(), added_annotations=(), removed_annotations=()
+    ):
+        # only the first two columns of each row are used, like create_ppi_network does
+        self.added_ppi = [[edge[0], edge[1]] for edge in added_ppi]
+        self.removed_ppi = [[edge[0], edge[1]] for edge in removed_ppi]
+        self.added_annotations = [[edge[0], edge[1]] for edge in added_annotations]
+        self.removed_annotations = [[edge[0], edge[1]] for edge in removed_annotations]
+
+    def __len__(self):
+        return (
+            len(self.added_ppi)
+            + len(self.removed_ppi)
+            + len(self.added_annotations)
+            + len(self.removed_annotations)
+        )
+
+
+def read_graph_delta(file_path, delimit="\t"):
+    """
+    Read a delta file. It has a header line and one edge per row with four columns: the action (add or remove),
+    the edge type (protein_protein or protein_go_term) and the two nodes of the edge, the protein first for
+    protein_go_term edges.
+
+    Parameters:
+    file_path {Path} : path of the delta file
+    delimit {str} : field delimiter
+
+    Returns:
+    GraphDelta
+    """
+    action, edge_type, source, target = read_columns(file_path, [0, 1, 2, 3], delimit)
+    for values, allowed, column in [
+        (action, DELTA_ACTIONS, "action"),
+        (edge_type, DELTA_EDGE_TYPES, "edge type"),
+    ]:
+        unknown = np.setdiff1d(values.astype(str), allowed)
+        if len(unknown):
+            raise ValueError(
+                f"{file_path}: unknown {column} {unknown[0]}, expected one of {allowed}"
+            )
+
+    def edges(action_name, edge_type_name):
+        keep = (action == action_name) & (edge_type == edge_type_name)
+        return list(zip(source[keep], target[keep]))
+
+    return GraphDelta(
+        edges("add", "protein_protein"),
+        edges("remove", "protein_protein"),
+        edges("add", "protein_go_term"),
+        edges("remove", "protein_go_term"),
+    )
+
+
+def apply_graph_delta(G: nx.Graph, delta):
+    """
+    Apply a delta to the graph returned by create_ppi_network in place. New nodes get the same attributes
+    create_ppi_network gives them, removals are applied after additions and edges that are not in the graph are
+    ignored.
+
+    Parameters:
+    G {nx.Graph} : graph that represents the interactome and go term connections
+    delta {GraphDelta} : the added and removed edges
+
+    Returns:
+    G {nx.Graph}
+    """
+    for protein_a, protein_b in delta.added_ppi:
+        _add_protein(G, protein_a)
+        _add_protein(G, protein_b)
+    for protein, go_term in delta.added_annotations:
+        _add_protein(G, protein)
+        if go_term not in G:
+            G.add_node(go_term, type="go_term")
+
+    G.add_edges_from(delta.added_ppi, type="protein_protein")
+    # annotations are stored go term first, the same way create_ppi_network adds them
+    G.add_edges_from(
+        [(go_term, protein) for protein, go_term in delta.added_annotations],
+        type="protein_go_term",
+    )
+    G.remove_edges_from(delta.removed_ppi)
+    G.remove_edges_from(delta.removed_annotations)
+    return G
+
+
+def update_graph(graph_file_path, delta):
+    """
+    Apply a delta to a persisted graph instead of rebuilding it from the interactome and annotation files. The
+    pickled nx graph is updated if there is one, and the CSR export next to it is updated from the delta, with its
+    graph statistics, and gets the next graph version. A CSR export that does not exist yet is built from the
+    updated nx graph.
+
+    Parameters:
+    graph_file_path {Path} : path of the exported nx graph or of a directory written by export_csr_graph
+    delta {GraphDelta} : the added and removed edges
+
+    Returns:
+    CSRGraph : the updated graph
+    """
+    graph_file_path = Path(graph_file_path)
+    if graph_file_path.is_dir():
+        directory = graph_file_path
+    else:
+        directory = csr_graph_directory(graph_file_path)
+
+    G = None
+    if not graph_file_path.is_dir() and graph_file_path.exists():
+        G = apply_graph_delta(import_graph_from_pickle(graph_file_path), delta)
+        export_graph_to_pickle(G, graph_file_path)
+
+    if is_csr_graph_directory(directory):
+        # read into memory, the arrays are written back to the same files
+        graph = import_csr_graph(directory, mmap_mode=None).apply_delta(delta)
+    elif G is not None:
+        graph = CSRGraph.from_networkx(G)
+    else:
+        raise FileNotFoundError(f"there is no graph at {graph_file_path}")
+
+    # the CSR export is written after the pickle so load_csr_graph keeps preferring it
+    export_csr_graph(graph, directory)
+    return graph
+
+
+def _add_protein(G, protein):
+    if protein not in G:
+        G.add_node(protein, name=protein, type="protein")
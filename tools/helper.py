@@ -1,8 +1,8 @@
 from colorama import Fore, Style
-import networkx as nx
 import random
 import numpy as np
 import pickle
+from tools.reader import DEFAULT_CHUNK_SIZE, IdCodebook, iter_column_chunks
 
 
 def print_progress(current, total, bar_length=65):
@@ -25,105 +25,223 @@ def print_progress(current, total, bar_length=65):
     print(f"\r{color}{progress_bar}{Style.RESET_ALL}", end="")
 
 
-def create_ppi_network(fly_interactome, fly_GO_term):
+def create_ppi_network(fly_interactome, fly_GO_term, progress_interval=100000):
+    """
+    Build the graph of protein-protein interactions and protein-go term annotations. Node ids are factorized in
+    one vectorized pass and nodes and edges are added in batches, in the same order as they appear in the input.
+
+    Parameters:
+    fly_interactome {list} : rows of [protein, protein] interactions
+    fly_GO_term {list} : rows of [protein, go term, ...] annotations
+    progress_interval {int} : number of edges added between progress bar updates
+
+    Returns:
+    G {nx.Graph} : graph that represents the interactome and go term connections
+    protein_list {list} : a list of all proteins in the graph, in order of first appearance
+    """
+    import pandas as pd
+
     print("Initializing network")
-    i = 1
-    total_progress = len(fly_interactome) + len(fly_GO_term)
+    interactome = _column_pairs(fly_interactome)
+    go_protein_pairs = _column_pairs(fly_GO_term)
+    ppi_count = len(interactome)
+    annotation_count = len(go_protein_pairs)
+    total_progress = ppi_count + annotation_count
+
+    # every node in order of first appearance, interactions first and then annotations (go term before protein)
+    ids = np.concatenate([interactome.ravel(), go_protein_pairs[:, ::-1].ravel()])
+    codes, uniques = pd.factorize(ids)
+    _, first_seen = np.unique(codes, return_index=True)
+    # a node takes the type of its first appearance, go terms sit at even positions of the annotation block
+    is_go_term = (first_seen >= 2 * ppi_count) & (first_seen % 2 == 0)
+
+    # networkx is only loaded by the runs that build the graph, the algorithms read the CSR index
+    import networkx as nx
+
     G = nx.Graph()
-    protein_protein_edge = 0
-    protein_go_edge = 0
-    protein_node = 0
-    go_node = 0
-    protein_list = []
-    go_term_list = []
-
-    # go through fly interactome, add a new node if it doesnt exists already, then add their physical interactions as edges
-    for line in fly_interactome:
-        if not G.has_node(line[0]):
-            G.add_node(line[0], name=line[0], type="protein")
-            protein_list.append({"id": line[0], "name": line[0]})
-            protein_node += 1
-
-        if not G.has_node(line[1]):
-            G.add_node(line[1], name=line[1], type="protein")
-            protein_list.append({"id": line[1], "name": line[1]})
-            protein_node += 1
-
-        G.add_edge(line[0], line[1], type="protein_protein")
-        protein_protein_edge += 1
-        print_progress(i, total_progress)
-        i += 1
-
-    # Proteins annotated with a GO term have an edge to a GO term node
-    for line in fly_GO_term:
-        if not G.has_node(line[1]):
-            G.add_node(line[1], type="go_term")
-            go_term_list.append(line[1])
-            go_node += 1
-
-        if not G.has_node(line[0]):
-            G.add_node(line[0], name=line[0], type="protein")
-            protein_list.append({"id": line[0], "name": line[0]})
-            protein_node += 1
-
-        G.add_edge(line[1], line[0], type="protein_go_term")
-        protein_go_edge += 1
-        print_progress(i, total_progress)
-        i += 1
+    G.add_nodes_from(
+        (node, {"type": "go_term"} if go_term else {"name": node, "type": "protein"})
+        for node, go_term in zip(uniques, is_go_term)
+    )
+    protein_list = [
+        {"id": node, "name": node}
+        for node, go_term in zip(uniques, is_go_term)
+        if not go_term
+    ]
+
+    edges = ids.reshape(-1, 2)
+    for start in range(0, total_progress, progress_interval):
+        stop = min(start + progress_interval, total_progress)
+        if start < ppi_count:
+            G.add_edges_from(
+                edges[start : min(stop, ppi_count)], type="protein_protein"
+            )
+        if stop > ppi_count:
+            G.add_edges_from(edges[max(start, ppi_count) : stop], type="protein_go_term")
+        print_progress(stop, total_progress)
 
     print("")
+    _print_network_summary(
+        ppi_count,
+        annotation_count,
+        len(protein_list),
+        int(is_go_term.sum()),
+        len(G.edges()),
+        len(G.nodes()),
+    )
+    return G, protein_list
+
+
+def stream_ppi_network(
+    interactome_path,
+    go_association_path,
+    namespace,
+    delimit=",",
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    networkx=True,
+):
+    """
+    Build the CSR index of the graph of create_ppi_network straight from the interactome and go association files,
+    and the nx graph itself if asked for. The files are streamed a chunk of rows at a time and node ids are encoded
+    through one IdCodebook, so the rows are never held as lists of strings. The CSR index is built from the integer
+    codes, the nx graph gets the edges of a chunk before the next chunk is read.
+
+    Parameters:
+    interactome_path {Path} : file of protein-protein interactions, proteins in the first two columns
+    go_association_path {Path} : file of go term annotations, protein, go term and namespace in columns 0, 2 and 3
+    namespace {list} : go term namespaces to keep
+    delimit {str} : field delimiter of both files
+    chunk_size {int} : number of rows read per chunk
+    networkx {bool} : True to also build the nx graph, e.g. to pickle it, False to only build the CSR index
+
+    Returns:
+    G {nx.Graph} : graph that represents the interactome and go term connections, None if networkx is False
+    protein_list {list} : a list of all proteins in the graph, in order of first appearance
+    go_protein_pairs {np.ndarray} : (n, 2) array of [protein, go term] annotations
+    csr_graph {CSRGraph} : CSR index of the graph
+    """
+    from tools.graph import CSRGraph
+
+    print("Initializing network")
+    G = None
+    if networkx:
+        import networkx as nx
+
+        G = nx.Graph()
+    codebook = IdCodebook()
+    # per chunk, whether each node first seen in the chunk is a go term, and the edges as (n, 2) arrays of codes
+    node_types = []
+    edge_codes = {"protein_protein": [], "protein_go_term": []}
+    sources = [
+        ("protein_protein", iter_column_chunks(interactome_path, [0, 1], delimit, chunk_size)),
+        # go term before protein, the order create_ppi_network adds the nodes of an annotation in
+        (
+            "protein_go_term",
+            iter_column_chunks(
+                go_association_path,
+                [2, 0],
+                delimit,
+                chunk_size,
+                namespace_column=3,
+                namespace=namespace,
+            ),
+        ),
+    ]
+    for edge_type, chunks in sources:
+        for chunk in chunks:
+            pairs = np.stack(chunk, axis=1)
+            known = len(codebook)
+            codes = codebook.encode(pairs.ravel())
+            # codes are assigned in order of first appearance, the new nodes are the highest codes
+            _, first_seen = np.unique(codes, return_index=True)
+            first_seen = first_seen[len(first_seen) - (len(codebook) - known) :]
+            is_go_term = (edge_type == "protein_go_term") & (first_seen % 2 == 0)
+            node_types.append(is_go_term)
+            if G is not None:
+                G.add_nodes_from(
+                    (node, {"type": "go_term"} if go_term else {"name": node, "type": "protein"})
+                    for node, go_term in zip(pairs.ravel()[first_seen], is_go_term)
+                )
+                G.add_edges_from(pairs, type=edge_type)
+            edge_codes[edge_type].append(codes.reshape(-1, 2))
+            print(f"\r{edge_type} edges read: {sum(len(c) for c in edge_codes[edge_type])}", end="")
+        print("")
+
+    ids = codebook.ids
+    is_go_term = np.concatenate(node_types) if node_types else np.zeros(0, dtype=bool)
+    ppi_edges, go_edges = (
+        np.concatenate(codes) if codes else np.zeros((0, 2), dtype=np.int64)
+        for codes in edge_codes.values()
+    )
+    # node code -> protein code and go term code, the position among the nodes of the same type
+    protein_code = np.cumsum(~is_go_term) - 1
+    go_code = np.cumsum(is_go_term) - 1
+    csr_graph = CSRGraph.from_edges(
+        ids[~is_go_term],
+        ids[is_go_term],
+        (protein_code[ppi_edges[:, 0]], protein_code[ppi_edges[:, 1]]),
+        (protein_code[go_edges[:, 1]], go_code[go_edges[:, 0]]),
+    )
+    protein_list = [{"id": node, "name": node} for node in ids[~is_go_term]]
+    go_protein_pairs = ids[go_edges[:, ::-1]]
+
+    print("")
+    _print_network_summary(
+        len(ppi_edges),
+        len(go_edges),
+        csr_graph.protein_count,
+        csr_graph.go_count,
+        # an undirected protein-protein edge is stored in the rows of both proteins, a self edge once
+        (len(csr_graph.ppi_indices) + int(csr_graph.self_loop.sum())) // 2 + len(csr_graph.pg_indices),
+        csr_graph.protein_count + csr_graph.go_count,
+    )
+    return G, protein_list, go_protein_pairs, csr_graph
+
+
+def _print_network_summary(
+    ppi_count, annotation_count, protein_count, go_count, edge_count, node_count
+):
     print("")
     print("network summary")
 
-    print("protein-protein edge count: ", protein_protein_edge)
-    print("protein-go edge count: ", protein_go_edge)
-    print("protein node count: ", protein_node)
-    print("go node count: ", go_node)
-    print("total edge count: ", len(G.edges()))
-    print("total node count: ", len(G.nodes()))
+    print("protein-protein edge count: ", ppi_count)
+    print("protein-go edge count: ", annotation_count)
+    print("protein node count: ", protein_count)
+    print("go node count: ", go_count)
+    print("total edge count: ", edge_count)
+    print("total node count: ", node_count)
 
-    return G, protein_list
+
+def _column_pairs(rows):
+    # first two columns of a list of rows as an (n, 2) object array of ids
+    pairs = np.empty((len(rows), 2), dtype=object)
+    pairs[:, 0] = [row[0] for row in rows]
+    pairs[:, 1] = [row[1] for row in rows]
+    return pairs
 
 
 def read_specific_columns(file_path, columns, delimit):
-    try:
-        with open(file_path, "r") as file:
-            next(file)
-            data = []
-            for line in file:
-                parts = line.strip().split(delimit)
-                selected_columns = []
-                for col in columns:
-                    selected_columns.append(parts[col].replace('"', ""))
-                data.append(selected_columns)
-            return data
-    except FileNotFoundError:
-        print(f"Error: File '{file_path}' not found.")
-        return None
-    except Exception as e:
-        print(f"An error occurred: {e}")
-        return None
+    """
+    Read selected columns of a delimited file with a header line, one list of values per row. Errors such as a
+    missing file or a malformed row are raised.
+    """
+    data = []
+    for chunk in iter_column_chunks(file_path, columns, delimit):
+        data.extend(map(list, zip(*chunk)))
+    return data
 
 
 def read_pro_go_data(file_path, columns, namespace, delimit):
-    try:
-        with open(file_path, "r") as file:
-            next(file)
-            data = []
-            for line in file:
-                parts = line.strip().split(delimit)
-                selected_columns = []
-                for col in columns:
-                    selected_columns.append(parts[col].replace('"', ""))
-                if selected_columns[2] in namespace:
-                    data.append(selected_columns)
-            return data
-    except FileNotFoundError:
-        print(f"Error: File '{file_path}' not found.")
-        return None
-    except Exception as e:
-        print(f"An error occurred: {e}")
-        return None
+    """
+    Read selected columns of a go term association file, keeping the rows whose third selected column (the go
+    term namespace) is in namespace. The filter is applied while scanning the file.
+    """
+    data = []
+    for chunk in iter_column_chunks(
+        file_path, columns, delimit, namespace_column=columns[2], namespace=namespace
+    ):
+        data.extend(map(list, zip(*chunk)))
+    return data
 
 
 def generate_random_colors(num_colors):
@@ -143,10 +261,10 @@ def normalize(data):
         return np.zeros_like(data)
 
     normalized_data = (data - min_val) / (max_val - min_val)
-    return normalized_data.tolist()
+    return normalized_data
 
 
-def get_neighbors(G: nx.Graph, node, edgeType):
+def get_neighbors(G: "nx.Graph", node, edgeType):
     res = G.edges(node, data=True)
     neighbors = []
     for edge in res:
@@ -0,0 +1,126 @@
+import numpy as np
+from scipy.special import gammaln
+
+HYPERGEOMETRIC_MODES = ["pmf", "sf"]
+# log probabilities closer than this are the same probability up to floating point error
+TIE_TOLERANCE = 1e-9
+
+
+def log_comb(n, k, log_factorial=None):
+    """
+    Natural log of n choose k for arrays of non-negative n and 0 <= k <= n. log_factorial is a table of log(i!),
+    e.g. CSRGraph.log_factorial, that is looked up instead of evaluating gammaln when it covers n.
+    """
+    if log_factorial is not None and np.max(n, initial=0) < len(log_factorial):
+        return log_factorial[n] - log_factorial[k] - log_factorial[n - k]
+    return gammaln(n + 1) - gammaln(k + 1) - gammaln(n - k + 1)
+
+
+def hypergeometric_log_pmf(N, K, n, k, log_factorial=None):
+    """
+    Log of the probability of drawing exactly k annotated proteins in n draws from N proteins, K of which are
+    annotated. Works on arrays and stays in log space, so large N never builds huge integers. Combinations outside
+    of the support have a log probability of -inf.
+
+    Parameters:
+    N {int} : total number of proteins
+    K {np.ndarray} : number of annotated proteins
+    n {np.ndarray} : number of draws
+    k {np.ndarray} : number of annotated proteins drawn
+    log_factorial {np.ndarray} : table of log(i!) up to N, see log_comb
+
+    Returns:
+    log_pmf {np.ndarray}
+    """
+    N, K, n, k = np.broadcast_arrays(
+        *[np.asarray(x, dtype=np.int64) for x in (N, K, n, k)]
+    )
+    support = (
+        (k >= 0) & (k <= K) & (k <= n) & (n - k <= N - K) & (K <= N) & (n <= N)
+    )
+
+    # evaluate the support only, everything else is replaced by a harmless placeholder first
+    N = np.where(support, N, 0)
+    K, n, k = _canonical_parameters(
+        N, np.where(support, K, 0), np.where(support, n, 0), np.where(support, k, 0)
+    )
+    log_pmf = (
+        log_comb(K, k, log_factorial)
+        + log_comb(N - K, n - k, log_factorial)
+        - log_comb(N, n, log_factorial)
+    )
+    return np.where(support, log_pmf, -np.inf)
+
+
+def hypergeometric_log_sf(N, K, n, k):
+    """
+    Log of the upper tail p-value, the probability of drawing k or more annotated proteins in n draws from N
+    proteins, K of which are annotated.
+    """
+    from scipy.stats import hypergeom
+
+    N, K, n, k = np.broadcast_arrays(
+        *[np.asarray(x, dtype=np.int64) for x in (N, K, n, k)]
+    )
+    # scipy names the population size M, the number of annotated proteins n and the number of draws N
+    return hypergeom.logsf(k - 1, N, K, n)
+
+
+def hypergeometric_score(N, K, n, k, mode="pmf", log_factorial=None):
+    """
+    Confidence score of the hypergeometric algorithms, one minus the probability of the observed overlap
+
+    Parameters:
+    N {int} : total number of proteins
+    K {np.ndarray} : number of proteins annotated with the go term
+    n {np.ndarray} : number of protein neighbors of the protein of interest
+    k {np.ndarray} : number of protein neighbors annotated with the go term
+    mode {str} : "pmf" to use the probability of exactly k (point mass), "sf" to use the probability of k or
+        more (upper tail p-value)
+    log_factorial {np.ndarray} : table of log(i!) up to N the pmf is computed with, see log_comb
+
+    Returns:
+    score {np.ndarray}
+    """
+    if mode == "pmf":
+        log_probability = hypergeometric_log_pmf(N, K, n, k, log_factorial)
+    elif mode == "sf":
+        log_probability = hypergeometric_log_sf(N, K, n, k)
+    else:
+        raise ValueError(
+            f"unknown hypergeometric mode {mode}, expected one of {HYPERGEOMETRIC_MODES}"
+        )
+    return 1 - np.exp(_merge_ties(log_probability))
+
+
+def _merge_ties(log_probability, tolerance=TIE_TOLERANCE):
+    # combinations with exactly the same probability that are not symmetric, e.g. k = 1 and k = 2 for N = 1394,
+    # K = 348, n = 7, come out of the log space sums a few ulps apart. Log probabilities that are chained by gaps
+    # of at most the tolerance are merged into the smallest of them, so they stay tied when ranked. Chaining
+    # instead of rounding to a grid means ties never straddle a rounding boundary.
+    log_probability = np.asarray(log_probability, dtype=float)
+    flat = log_probability.ravel()
+    finite = np.flatnonzero(np.isfinite(flat))
+    order = finite[np.argsort(flat[finite], kind="stable")]
+    values = flat[order]
+    starts = np.ones(values.size, dtype=bool)
+    starts[1:] = np.diff(values) > tolerance
+    merged = flat.copy()
+    merged[order] = values[starts][np.cumsum(starts) - 1]
+    return merged.reshape(log_probability.shape)
+
+
+def _canonical_parameters(N, K, n, k):
+    # the probability of (N, K, n, k) is the same as that of (N, N - K, n, n - k), (N, K, N - n, K - k) and
+    # (N, n, K, k). Mapping every combination to one representative makes combinations with exactly the same
+    # probability also get exactly the same floating point value, so they stay tied when ranked.
+    flip = (N - K < K) | ((N - K == K) & (n - k < k))
+    K = np.where(flip, N - K, K)
+    k = np.where(flip, n - k, k)
+
+    flip = (N - n < n) | ((N - n == n) & (K - k < k))
+    n = np.where(flip, N - n, n)
+    k = np.where(flip, K - k, k)
+
+    swap = n < K
+    return np.where(swap, n, K), np.where(swap, K, n), k
@@ -0,0 +1,213 @@
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+from pathlib import Path
+import sys
+import time
+
+STAGE_TIMINGS_FILE = "stage_timings.csv"
+STAGE_TIMING_COLUMNS = [
+    "replicate",
+    "algorithm",
+    "stage",
+    "calls",
+    "seconds",
+    "count",
+    "peak_rss_increase_mb",
+    "peak_rss_mb",
+]
+
+# registry of the running workflow, None while instrumentation is disabled
+_registry = None
+# shared no-op context returned by stage while instrumentation is disabled
+_disabled = nullcontext()
+
+
+class StageRegistry:
+    """
+    Timers and counters of one instrumented run. Every measurement is keyed by the replicate and algorithm of the
+    scope it was taken in and by its stage name. A stage that is entered several times in the same scope adds up
+    its calls and seconds.
+    """
+
+    def __init__(self):
+        self.records = {}
+        self.counters = {}
+        self._scope = {"replicate": None, "algorithm": None}
+
+    @contextmanager
+    def scope(self, replicate=None, algorithm=None):
+        previous = dict(self._scope)
+        if replicate is not None:
+            self._scope["replicate"] = replicate
+        if algorithm is not None:
+            self._scope["algorithm"] = algorithm
+        try:
+            yield
+        finally:
+            self._scope = previous
+
+    @contextmanager
+    def stage(self, name):
+        rss_before = _peak_rss_mb()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            rss_after = _peak_rss_mb()
+            key = (self._scope["replicate"], self._scope["algorithm"], name)
+            record = self.records.setdefault(
+                key, {"calls": 0, "seconds": 0.0, "peak_rss_increase_mb": 0.0}
+            )
+            record["calls"] += 1
+            record["seconds"] += seconds
+            if rss_after is None:
+                record["peak_rss_increase_mb"] = None
+            else:
+                record["peak_rss_increase_mb"] += rss_after - rss_before
+            record["peak_rss_mb"] = rss_after
+
+    def count(self, name, value=1):
+        key = (self._scope["replicate"], self._scope["algorithm"], name)
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def merge(self, state):
+        """
+        Add the records and counters of another registry, as returned by its get_state, e.g. of a process pool worker
+        """
+        records, counters = state
+        for key, record in records.items():
+            own = self.records.setdefault(
+                key, {"calls": 0, "seconds": 0.0, "peak_rss_increase_mb": 0.0}
+            )
+            own["calls"] += record["calls"]
+            own["seconds"] += record["seconds"]
+            if record["peak_rss_mb"] is None:
+                own["peak_rss_increase_mb"] = None
+                own["peak_rss_mb"] = None
+            else:
+                own["peak_rss_increase_mb"] += record["peak_rss_increase_mb"]
+                own["peak_rss_mb"] = max(own.get("peak_rss_mb", 0.0), record["peak_rss_mb"])
+        for key, value in counters.items():
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def get_state(self):
+        return self.records, self.counters
+
+    def to_frame(self):
+        """
+        Timing table with one row per replicate, algorithm and stage. Counters are rows of their own with the
+        counter's name as stage and its value in the count column. peak_rss_increase_mb is how much the peak resident
+        memory of the process grew during the stage, the peak RSS columns are empty on platforms without the resource
+        module.
+        """
+        import pandas as pd
+
+        rows = [
+            {"replicate": replicate, "algorithm": algorithm, "stage": stage, **record}
+            for (replicate, algorithm, stage), record in self.records.items()
+        ]
+        rows.extend(
+            {"replicate": replicate, "algorithm": algorithm, "stage": name, "count": value}
+            for (replicate, algorithm, name), value in self.counters.items()
+        )
+        return pd.DataFrame(rows, columns=STAGE_TIMING_COLUMNS)
+
+
+def enable_instrumentation():
+    """
+    Start recording stages and counters, returns the new registry
+    """
+    global _registry
+    _registry = StageRegistry()
+    return _registry
+
+
+def disable_instrumentation():
+    """
+    Stop recording, returns the registry of the run that was recorded
+    """
+    global _registry
+    registry = _registry
+    _registry = None
+    return registry
+
+
+def get_registry():
+    return _registry
+
+
+def is_instrumented():
+    return _registry is not None
+
+
+def stage(name):
+    """
+    Context manager timing the code inside it as the stage name of the current replicate and algorithm, does
+    nothing while instrumentation is disabled
+    """
+    if _registry is None:
+        return _disabled
+    return _registry.stage(name)
+
+
+def timed(name):
+    """
+    Decorator timing every call of a function as the stage name, calls go straight to the function while
+    instrumentation is disabled
+    """
+
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if _registry is None:
+                return function(*args, **kwargs)
+            with _registry.stage(name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def scope(replicate=None, algorithm=None):
+    """
+    Context manager setting the replicate and algorithm the stages inside it are recorded under
+    """
+    if _registry is None:
+        return _disabled
+    return _registry.scope(replicate, algorithm)
+
+
+def count(name, value=1):
+    """
+    Add value to the counter name of the current replicate and algorithm, does nothing while instrumentation is
+    disabled
+    """
+    if _registry is not None:
+        _registry.count(name, value)
+
+
+def write_stage_timings(registry, output_data_path):
+    """
+    Write the timing table of a registry as a tab separated file in output_data_path
+
+    Returns:
+    df {pd.DataFrame} : the timing table
+    """
+    df = registry.to_frame()
+    df.to_csv(Path(output_data_path, STAGE_TIMINGS_FILE), index=False, sep="\t")
+    return df
+
+
+def _peak_rss_mb():
+    # resource is only available on unix, the peak RSS columns are left empty elsewhere
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on linux
+    if sys.platform == "darwin":
+        return peak / 2**20
+    return peak / 2**10
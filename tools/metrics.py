@@ -0,0 +1,228 @@
+import numpy as np
+
+
+def compute_metrics(y_score, y_true):
+    """
+    ROC and precision-recall curves and their areas of several score vectors over the same number of pairs, e.g.
+    of all algorithms of a replicate. Every row is sorted once and the curves of all rows are computed with array
+    operations on all rows at once. The curves, thresholds and areas are the same as those of sklearn's
+    roc_curve (with drop_intermediate), precision_recall_curve and auc.
+
+    Parameters:
+    y_score {np.ndarray} : scores of shape (rows, pairs), or a single score vector
+    y_true {np.ndarray} : 0/1 labels of the pairs, of the same shape as y_score or one label vector shared by all
+        rows
+
+    Returns:
+    metrics {list} : one dict per row with fpr, tpr, thresholds, roc_auc, precision, recall and pr_auc
+    """
+    y_score = np.atleast_2d(np.asarray(y_score, dtype=np.float64))
+    y_true = np.broadcast_to(
+        np.atleast_2d(np.asarray(y_true)) == 1, y_score.shape
+    )
+    rows, pairs = y_score.shape
+    if pairs == 0:
+        raise ValueError("cannot compute metrics without pairs")
+
+    # sort every row by decreasing score, ties keep their order like sklearn's stable sort
+    order = np.argsort(-y_score, axis=1, kind="stable")
+    sorted_score = np.take_along_axis(y_score, order, axis=1)
+    tps_all = np.cumsum(np.take_along_axis(y_true, order, axis=1), axis=1, dtype=np.float64)
+    fps_all = np.arange(1, pairs + 1, dtype=np.float64) - tps_all
+
+    # the thresholds of a row are its distinct scores, the last position of each run of equal scores
+    is_threshold = np.ones((rows, pairs), dtype=bool)
+    is_threshold[:, :-1] = np.diff(sorted_score, axis=1) != 0
+    row, position = np.nonzero(is_threshold)
+    tps = tps_all[row, position]
+    fps = fps_all[row, position]
+    thresholds = sorted_score[row, position]
+    counts = np.bincount(row, minlength=rows)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+
+    # positives and negatives of each row, the last cumulative count of the row
+    total_positive = np.repeat(tps_all[:, -1], counts)
+    total_negative = np.repeat(fps_all[:, -1], counts)
+
+    # ROC drops the thresholds that are collinear with both neighbors, the first and last one of a row stay
+    is_first = np.zeros(len(row), dtype=bool)
+    is_first[starts] = True
+    is_last = np.zeros(len(row), dtype=bool)
+    is_last[starts + counts - 1] = True
+    keep = is_first | is_last
+    inner = ~keep
+    inner_index = np.nonzero(inner)[0]
+    keep[inner_index] = (
+        (fps[inner_index + 1] - fps[inner_index]) - (fps[inner_index] - fps[inner_index - 1])
+        != 0
+    ) | (
+        (tps[inner_index + 1] - tps[inner_index]) - (tps[inner_index] - tps[inner_index - 1])
+        != 0
+    )
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fpr = np.where(total_negative > 0, fps / total_negative, np.nan)
+        tpr = np.where(total_positive > 0, tps / total_positive, np.nan)
+        precision = tps / (tps + fps)
+        recall = np.where(total_positive > 0, tps / total_positive, 1.0)
+
+    roc_counts = np.bincount(row[keep], minlength=rows)
+    roc_splits = np.cumsum(roc_counts)[:-1]
+    row_fpr = np.split(fpr[keep], roc_splits)
+    row_tpr = np.split(tpr[keep], roc_splits)
+    row_roc_thresholds = np.split(thresholds[keep], roc_splits)
+    splits = np.cumsum(counts)[:-1]
+    row_precision = np.split(precision, splits)
+    row_recall = np.split(recall, splits)
+    row_thresholds = np.split(thresholds, splits)
+
+    metrics = []
+    for i in range(rows):
+        # the ROC curve starts at (0, 0) with an infinite threshold
+        current = {
+            "fpr": np.concatenate([[0.0], row_fpr[i]]),
+            "tpr": np.concatenate([[0.0], row_tpr[i]]),
+            "thresholds": np.concatenate([[np.inf], row_roc_thresholds[i]]),
+        }
+        if total_negative[starts[i]] == 0:
+            current["fpr"][:] = np.nan
+        if total_positive[starts[i]] == 0:
+            current["tpr"][:] = np.nan
+        current["roc_auc"] = _trapezoid(current["fpr"], current["tpr"])
+        # the precision-recall curve is ordered by decreasing recall and ends at (recall 0, precision 1)
+        current["precision"] = np.concatenate([row_precision[i][::-1], [1.0]])
+        current["recall"] = np.concatenate([row_recall[i][::-1], [0.0]])
+        current["pr_thresholds"] = row_thresholds[i][::-1]
+        current["pr_auc"] = -_trapezoid(current["recall"], current["precision"])
+        metrics.append(current)
+    return metrics
+
+
+def _trapezoid(x, y):
+    # the same operations as np.trapezoid, so the areas are bit for bit those of sklearn's auc
+    return float((np.diff(x) * (y[1:] + y[:-1]) / 2.0).sum())
+
+
+def max_f1_threshold(precision, recall, pr_thresholds):
+    """
+    Threshold of the highest F1 score, from the precision-recall curve of compute_metrics. Every point of the curve
+    is the precision and recall of predicting the pairs scoring at least its threshold, so the F1 score of every
+    distinct threshold comes from the cumulative counts of the sorted scores instead of scoring the pairs again.
+
+    Parameters:
+    precision {np.ndarray} : precision of each threshold, followed by the final precision of 1
+    recall {np.ndarray} : recall of each threshold, followed by the final recall of 0
+    pr_thresholds {np.ndarray} : distinct scores in increasing order
+
+    Returns:
+    threshold {float} : the highest threshold reaching the maximum F1 score
+    f1 {float} : the maximum F1 score
+    """
+    precision = np.asarray(precision)[: len(pr_thresholds)]
+    recall = np.asarray(recall)[: len(pr_thresholds)]
+    denominator = precision + recall
+    f1 = np.divide(
+        2 * precision * recall,
+        denominator,
+        out=np.zeros(len(pr_thresholds)),
+        where=denominator > 0,
+    )
+    # the thresholds increase, the last maximum is the highest threshold like predicting from the top scores down
+    index = len(f1) - 1 - np.argmax(f1[::-1])
+    return pr_thresholds[index], float(f1[index])
+
+
+def bootstrap_auc(y_score, y_true, resamples=1000, seed=None, batch_size=None):
+    """
+    ROC and precision-recall AUCs of bootstrap resamples of scored pairs. Positive and negative pairs are resampled
+    with replacement separately, so every resample has as many positives and negatives as the original pairs. A
+    resample is the number of times it draws each pair, so every score row is sorted once and the AUCs of a batch
+    of resamples come from cumulative sums of the counts over the sorted pairs. All rows are scored on the same
+    resamples, e.g. all algorithms of a replicate.
+
+    Parameters:
+    y_score {np.ndarray} : scores of shape (rows, pairs), or a single score vector
+    y_true {np.ndarray} : 0/1 labels of the pairs, shared by all rows
+    resamples {int} : number of bootstrap resamples
+    seed {int} : seed of the resampling, the same seed gives the same resamples
+    batch_size {int} : number of resamples computed at once, bounds the memory used to about
+        batch_size * pairs * 8 bytes per array. Defaults to as many resamples as fit in about 64 MB.
+
+    Returns:
+    roc_auc {np.ndarray} : ROC AUC of each row and resample, of shape (rows, resamples)
+    pr_auc {np.ndarray} : precision-recall AUC of each row and resample, of shape (rows, resamples)
+    """
+    y_score = np.atleast_2d(np.asarray(y_score, dtype=np.float64))
+    y_true = np.asarray(y_true) == 1
+    rows, pairs = y_score.shape
+    positive = np.flatnonzero(y_true)
+    negative = np.flatnonzero(~y_true)
+    if len(positive) == 0 or len(negative) == 0:
+        raise ValueError("bootstrap needs positive and negative pairs")
+    if batch_size is None:
+        batch_size = max(2**23 // pairs, 1)
+
+    # sorted order and tie groups of each row, computed once for all resamples
+    orders = np.argsort(-y_score, axis=1, kind="stable")
+    sorted_score = np.take_along_axis(y_score, orders, axis=1)
+    group_ends = [
+        np.flatnonzero(np.append(np.diff(row) != 0, True)) for row in sorted_score
+    ]
+
+    rng = np.random.default_rng(seed)
+    roc_auc = np.empty((rows, resamples))
+    pr_auc = np.empty((rows, resamples))
+    for start in range(0, resamples, batch_size):
+        batch = min(batch_size, resamples - start)
+        # one uniform number per drawn pair, the stream and so the resamples do not depend on batch_size
+        uniform = rng.random((batch, pairs))
+        drawn = np.concatenate(
+            [
+                positive[(uniform[:, : len(positive)] * len(positive)).astype(np.int64)],
+                negative[(uniform[:, len(positive) :] * len(negative)).astype(np.int64)],
+            ],
+            axis=1,
+        )
+        # how many times each resample drew each pair
+        offset = np.arange(batch)[:, None] * pairs
+        counts = np.bincount((drawn + offset).ravel(), minlength=batch * pairs)
+        counts = counts.reshape(batch, pairs).astype(np.float64)
+        for i in range(rows):
+            sorted_counts = counts[:, orders[i]]
+            is_positive = y_true[orders[i]]
+            tps = np.cumsum(sorted_counts * is_positive, axis=1)[:, group_ends[i]]
+            fps = np.cumsum(sorted_counts * ~is_positive, axis=1)[:, group_ends[i]]
+            roc_auc[i, start : start + batch], pr_auc[i, start : start + batch] = (
+                _auc_from_counts(tps, fps, len(positive), len(negative))
+            )
+    return roc_auc, pr_auc
+
+
+def confidence_interval(values, confidence=0.95, axis=-1):
+    """
+    Percentile confidence interval of bootstrap values
+
+    Returns:
+    lower {np.ndarray} : lower bound along axis
+    upper {np.ndarray} : upper bound along axis
+    """
+    tail = (1 - confidence) / 2 * 100
+    lower, upper = np.percentile(values, [tail, 100 - tail], axis=axis)
+    return lower, upper
+
+
+def _auc_from_counts(tps, fps, positive_count, negative_count):
+    # tps and fps are the cumulative true and false positives of each resample (row) at each distinct threshold,
+    # in decreasing threshold order. Both curves start at recall 0, the ROC curve at (0, 0) and the precision-recall
+    # curve at precision 1, like those of compute_metrics.
+    tpr = np.concatenate([np.zeros((len(tps), 1)), tps / positive_count], axis=1)
+    fpr = np.concatenate([np.zeros((len(fps), 1)), fps / negative_count], axis=1)
+    roc_auc = (np.diff(fpr, axis=1) * (tpr[:, 1:] + tpr[:, :-1]) / 2.0).sum(axis=1)
+    # thresholds no pair of the resample scores at yet have no precision, they add no area to the curve
+    predicted = tps + fps
+    precision = np.divide(tps, predicted, out=np.ones_like(tps), where=predicted > 0)
+    precision = np.concatenate([np.ones((len(tps), 1)), precision], axis=1)
+    pr_auc = (np.diff(tpr, axis=1) * (precision[:, 1:] + precision[:, :-1]) / 2.0).sum(
+        axis=1
+    )
+    return roc_auc, pr_auc
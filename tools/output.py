@@ -0,0 +1,124 @@
+from pathlib import Path
+import os
+import queue
+import threading
+import numpy as np
+
+# what predict writes next to its scores: "csv" the tab separated table sorted by norm_score, "npz" the columns as
+# compressed numpy arrays in pair order, "none" nothing
+OUTPUT_POLICIES = ["none", "npz", "csv"]
+DEFAULT_OUTPUT_POLICY = "csv"
+
+# output policy of the running workflow
+_policy = DEFAULT_OUTPUT_POLICY
+# background writer of the running workflow, None while files are written by the caller
+_writer = None
+
+
+class OutputWriter:
+    """
+    Writes files on a background thread, so the algorithms do not wait for their output files. Jobs are written
+    in the order they were submitted. close waits until every file is written and raises the first error a job
+    raised.
+    """
+
+    def __init__(self):
+        self._jobs = queue.Queue()
+        self._error = None
+        # a forked process pool worker inherits the writer but not its thread
+        self.pid = os.getpid()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, function, *args):
+        self._jobs.put((function, args))
+
+    def close(self):
+        self._jobs.put(None)
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            function, args = job
+            if self._error is None:
+                try:
+                    function(*args)
+                except Exception as error:
+                    self._error = error
+
+
+def set_output_policy(policy):
+    """
+    Set what predict writes, one of OUTPUT_POLICIES
+    """
+    global _policy
+    if policy not in OUTPUT_POLICIES:
+        raise ValueError(f"unknown output policy {policy}, expected one of {OUTPUT_POLICIES}")
+    _policy = policy
+
+
+def get_output_policy():
+    return _policy
+
+
+def start_writer():
+    """
+    Write the output files of predict on a background thread from now on
+    """
+    global _writer
+    if _writer is None:
+        _writer = OutputWriter()
+
+
+def stop_writer():
+    """
+    Wait for the background thread to write every submitted file and stop it
+    """
+    global _writer
+    writer = _writer
+    _writer = None
+    if writer is not None:
+        writer.close()
+
+
+def write_scores(file_path, data):
+    """
+    Write the scores of an algorithm as set by the output policy. The file is written on the background writer
+    while one is running, otherwise before write_scores returns.
+
+    Parameters:
+    file_path {Path} : path of the csv file, the npz policy writes the same path with a .npz suffix
+    data {dict} : columns of the output, one entry per pair, with a norm_score column
+    """
+    if _policy == "none":
+        return
+    if _policy == "csv":
+        function = _write_csv
+    else:
+        function = _write_npz
+    if _writer is None or _writer.pid != os.getpid():
+        function(file_path, data)
+    else:
+        _writer.submit(function, file_path, data)
+
+
+def _write_csv(file_path, data):
+    import pandas as pd
+
+    df = pd.DataFrame(data)
+    df = df.sort_values(by="norm_score", ascending=False)
+    df.to_csv(file_path, index=False, sep="\t")
+
+
+def _write_npz(file_path, data):
+    columns = {column: np.asarray(values) for column, values in data.items()}
+    # ids are saved as strings, so the file loads without allow_pickle
+    for column, values in columns.items():
+        if values.dtype == object:
+            columns[column] = values.astype(str)
+    np.savez_compressed(Path(file_path).with_suffix(".npz"), **columns)
@@ -0,0 +1,111 @@
+import numpy as np
+from tools.features import extract_pair_features
+
+OVERLAPPING_NEIGHBORS_VERSIONS = ["v1", "v2", "v3"]
+
+
+def overlapping_neighbors_score(
+    pro_pro_neighbor, go_neighbor, go_annotated_pro_pro_neighbors, c, version="v1"
+):
+    """
+    Score equations of the overlapping neighbors algorithms, on arrays of pair statistics
+
+    Parameters:
+    pro_pro_neighbor {np.ndarray} : number of protein neighbors of the protein, a self edge counts once
+    go_neighbor {np.ndarray} : number of proteins annotated with the go term
+    go_annotated_pro_pro_neighbors {np.ndarray} : number of protein neighbors annotated with the go term, not
+        counting the protein itself
+    c {np.ndarray} : 1 for proteins with an edge to themselves, the self edge is not a real neighbor
+    version {str} : "v1", "v2" or "v3"
+
+    Returns:
+    score {np.ndarray}
+    """
+    k = go_annotated_pro_pro_neighbors
+    if version == "v1":
+        # proteins without protein neighbors get a score of 0
+        return np.where(
+            pro_pro_neighbor == 0,
+            0,
+            (1 + k) / (pro_pro_neighbor - c + go_neighbor),
+        )
+    if version == "v2":
+        return k + (1 + (pro_pro_neighbor - c) * k) / (go_neighbor / 2)
+    if version == "v3":
+        return k + (1 + k) / go_neighbor
+    raise ValueError(
+        f"unknown overlapping neighbors version {version}, expected one of {OVERLAPPING_NEIGHBORS_VERSIONS}"
+    )
+
+
+def overlapping_neighbors_feature_data(features, version="v1"):
+    """
+    Statistics and overlapping neighbors scores of pairs from their features
+
+    Parameters:
+    features {PairFeatures} : features of the pairs, see tools.features
+    version {str} : "v1", "v2" or "v3"
+
+    Returns:
+    data {dict} : pro_pro_neighbor, go_neighbor, go_annotated_pro_pro_neighbors and score arrays
+    """
+    go_annotated_pro_pro_neighbors = features.go_annotated_neighbors_excluding_self
+    return {
+        "pro_pro_neighbor": features.pro_pro_neighbor,
+        "go_neighbor": features.go_neighbor,
+        "go_annotated_pro_pro_neighbors": go_annotated_pro_pro_neighbors,
+        "score": overlapping_neighbors_score(
+            features.pro_pro_neighbor,
+            features.go_neighbor,
+            go_annotated_pro_pro_neighbors,
+            features.self_loop,
+            version,
+        ),
+    }
+
+
+def overlapping_neighbors_pair_data(graph, protein_codes, go_codes, version="v1"):
+    """
+    Statistics and overlapping neighbors scores of a batch of protein and go term code pairs. The annotated
+    neighbor counts are gathered from the graph's annotated_neighbor_matrix, computed once per graph. A column
+    of protein codes (shape (n, 1)) and a row of go term codes (shape (1, m)) score every combination.
+
+    Parameters:
+    graph {CSRGraph} : CSR index of the interactome and go term connections
+    protein_codes {np.ndarray} : protein codes of the pairs
+    go_codes {np.ndarray} : go term codes of the pairs
+    version {str} : "v1", "v2" or "v3"
+
+    Returns:
+    data {dict} : pro_pro_neighbor, go_neighbor, go_annotated_pro_pro_neighbors and score arrays
+    """
+    return overlapping_neighbors_feature_data(
+        extract_pair_features(graph, protein_codes, go_codes), version
+    )
+
+
+def overlapping_neighbors_score_matrix(
+    graph, protein_codes=None, go_codes=None, version="v1"
+):
+    """
+    Overlapping neighbors scores of every protein against every go term
+
+    Parameters:
+    graph {CSRGraph} : CSR index of the interactome and go term connections
+    protein_codes {np.ndarray} : protein codes of the rows, all proteins of the graph if None
+    go_codes {np.ndarray} : go term codes of the columns, all go terms of the graph if None
+    version {str} : "v1", "v2" or "v3"
+
+    Returns:
+    scores {np.ndarray} : matrix of shape (len(protein_codes), len(go_codes))
+    """
+    if protein_codes is None:
+        protein_codes = np.arange(graph.protein_count)
+    if go_codes is None:
+        go_codes = np.arange(graph.go_count)
+    return overlapping_neighbors_pair_data(
+        graph,
+        np.asarray(protein_codes).reshape(-1, 1),
+        np.asarray(go_codes).reshape(1, -1),
+        version,
+    )["score"]
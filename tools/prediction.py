@@ -0,0 +1,120 @@
+import numpy as np
+
+DEFAULT_BLOCK_SIZE = 64
+
+
+def rank_proteins(
+    algorithm,
+    graph,
+    go_terms,
+    top_k=10,
+    exclude_annotated=True,
+    block_size=DEFAULT_BLOCK_SIZE,
+):
+    """
+    Rank every protein of the graph for each of the given go terms and keep the top k candidates. The go terms are
+    scored in blocks, each block is one score matrix of all proteins against the block's go terms.
+
+    Parameters:
+    algorithm {BaseAlgorithm} : instance of the algorithm to score with
+    graph {CSRGraph} : CSR index of the interactome and go term connections
+    go_terms {list} : go term ids to rank proteins for
+    top_k {int} : number of candidates kept per go term
+    exclude_annotated {bool} : True to leave out proteins already annotated with the go term
+    block_size {int} : number of go terms scored at once
+
+    Returns:
+    predictions {pd.DataFrame} : columns go_term, rank, protein and score, ordered by go term and rank
+    """
+    go_terms = list(go_terms)
+    frames = []
+    for start in range(0, len(go_terms), block_size):
+        block = go_terms[start : start + block_size]
+        scores = algorithm.score_matrix(graph, graph.protein_ids, block).T
+        annotated = None
+        if exclude_annotated:
+            annotated = graph.has_annotations(
+                np.arange(graph.protein_count).reshape(-1, 1),
+                graph.get_go_codes(block).reshape(1, -1),
+            ).T
+        frames.append(
+            _top_k_frame(
+                scores, annotated, block, graph.protein_ids, top_k, "go_term", "protein"
+            )
+        )
+    return _concat(frames, ["go_term", "rank", "protein", "score"])
+
+
+def rank_go_terms(
+    algorithm,
+    graph,
+    proteins,
+    top_k=10,
+    exclude_annotated=True,
+    block_size=DEFAULT_BLOCK_SIZE,
+):
+    """
+    Rank every go term of the graph for each of the given proteins and keep the top k candidates
+
+    Parameters:
+    algorithm {BaseAlgorithm} : instance of the algorithm to score with
+    graph {CSRGraph} : CSR index of the interactome and go term connections
+    proteins {list} : protein ids to rank go terms for
+    top_k {int} : number of candidates kept per protein
+    exclude_annotated {bool} : True to leave out go terms the protein is already annotated with
+    block_size {int} : number of proteins scored at once
+
+    Returns:
+    predictions {pd.DataFrame} : columns protein, rank, go_term and score, ordered by protein and rank
+    """
+    proteins = list(proteins)
+    frames = []
+    for start in range(0, len(proteins), block_size):
+        block = proteins[start : start + block_size]
+        scores = algorithm.score_matrix(graph, block, graph.go_ids)
+        annotated = None
+        if exclude_annotated:
+            annotated = graph.has_annotations(
+                graph.get_protein_codes(block).reshape(-1, 1),
+                np.arange(graph.go_count).reshape(1, -1),
+            )
+        frames.append(
+            _top_k_frame(
+                scores, annotated, block, graph.go_ids, top_k, "protein", "go_term"
+            )
+        )
+    return _concat(frames, ["protein", "rank", "go_term", "score"])
+
+
+def _top_k_frame(
+    scores, excluded, queries, candidate_ids, top_k, query_column, candidate_column
+):
+    import pandas as pd
+
+    # one row of scores per query, candidates are ordered by score and then by code so ties are deterministic.
+    # excluded candidates and undefined (nan) scores are moved to the end and left out
+    scores = np.array(scores, dtype=float)
+    scores[np.isnan(scores)] = -np.inf
+    if excluded is not None:
+        scores[excluded] = -np.inf
+    order = np.argsort(-scores, axis=1, kind="stable")[:, :top_k]
+    top_scores = np.take_along_axis(scores, order, axis=1)
+    keep = top_scores > -np.inf
+
+    query_index, rank = np.nonzero(keep)
+    return pd.DataFrame(
+        {
+            query_column: np.asarray(queries, dtype=object)[query_index],
+            "rank": rank + 1,
+            candidate_column: np.asarray(candidate_ids, dtype=object)[order[keep]],
+            "score": top_scores[keep],
+        }
+    )
+
+
+def _concat(frames, columns):
+    import pandas as pd
+
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(frames, ignore_index=True)[columns]
@@ -0,0 +1,141 @@
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+import cProfile
+import sys
+import threading
+
+DEFAULT_SAMPLE_INTERVAL = 0.001
+
+# profiling settings of the running workflow, None while no algorithm is profiled
+_settings = None
+
+
+class ProfileSettings:
+    """
+    Which algorithms are profiled and where their profiles are written
+
+    algorithm_names {list} : names of the algorithms to profile, as in algorithm_classes
+    output_path {Path} : directory the profiles are written to
+    sample_interval {float} : seconds between two stack samples of the sampling profiler
+    """
+
+    def __init__(self, algorithm_names, output_path, sample_interval=DEFAULT_SAMPLE_INTERVAL):
+        self.algorithm_names = list(algorithm_names)
+        self.output_path = Path(output_path)
+        self.sample_interval = sample_interval
+
+
+class StackSampler:
+    """
+    Sampling profiler of one thread. A background thread records the call stack of the profiled thread every
+    interval seconds, counting how often each stack was seen. Only the frames below the given frame are kept.
+    """
+
+    def __init__(self, interval=DEFAULT_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.counts = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self, frame=None):
+        """
+        Start sampling the calling thread. frame and the frames above it are the same in every sample and are left
+        out, it defaults to the caller's frame.
+        """
+        if frame is None:
+            frame = sys._getframe(1)
+        self._thread_id = threading.get_ident()
+        self._depth = len(_frame_names(frame))
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is None:
+                continue
+            stack = _frame_names(frame)[self._depth :]
+            if stack:
+                self.counts[";".join(stack)] += 1
+
+    def write_collapsed(self, path):
+        """
+        Write the samples as collapsed stacks, one "outermost;...;innermost count" line per stack, the input
+        format of flamegraph.pl and speedscope
+        """
+        with open(path, "w") as f:
+            for stack, count in self.counts.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def enable_profiling(algorithm_names, output_path, sample_interval=DEFAULT_SAMPLE_INTERVAL):
+    """
+    Profile every run of the given algorithms from now on, returns the settings
+    """
+    global _settings
+    _settings = ProfileSettings(algorithm_names, output_path, sample_interval)
+    return _settings
+
+
+def set_profiling(settings):
+    """
+    Use settings returned by get_profiling, e.g. in a process pool worker
+    """
+    global _settings
+    _settings = settings
+
+
+def disable_profiling():
+    global _settings
+    _settings = None
+
+
+def get_profiling():
+    return _settings
+
+
+def profiled(algorithm_name, rep_num):
+    """
+    Context manager profiling the code inside it if algorithm_name is one of the profiled algorithms. It writes
+    <algorithm_name>_rep_<rep_num>.prof, readable with pstats or snakeviz, and
+    <algorithm_name>_rep_<rep_num>_collapsed.txt with the sampled call stacks.
+    """
+    if _settings is None or algorithm_name not in _settings.algorithm_names:
+        return nullcontext()
+    return _profile(
+        Path(_settings.output_path, f"{algorithm_name}_rep_{rep_num}"),
+        _settings.sample_interval,
+    )
+
+
+@contextmanager
+def _profile(path, sample_interval):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    sampler = StackSampler(sample_interval)
+    profiler = cProfile.Profile()
+    # the frame of the code in the with block, the one that called contextmanager's __enter__
+    sampler.start(sys._getframe(2))
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        sampler.stop()
+        profiler.dump_stats(str(path) + ".prof")
+        sampler.write_collapsed(str(path) + "_collapsed.txt")
+
+
+def _frame_names(frame):
+    # outermost frame first, each frame as function (file:line)
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+        frame = frame.f_back
+    names.reverse()
+    return names
@@ -0,0 +1,141 @@
+import csv
+import sys
+import numpy as np
+
+DEFAULT_CHUNK_SIZE = 100000
+
+
+class IdCodebook:
+    """
+    Incrementally assigns integer codes to string ids, in order of first appearance. One codebook can be shared
+    by several columns and chunks so that the same id always gets the same code.
+    """
+
+    def __init__(self):
+        self._codes = {}
+        self._ids = []
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, id):
+        return id in self._codes
+
+    @property
+    def ids(self):
+        return np.array(self._ids, dtype=object)
+
+    def encode(self, values):
+        """
+        Map ids to their codes, ids that have not been seen before are added to the codebook
+
+        Parameters:
+        values {array} : string ids
+
+        Returns:
+        codes {np.ndarray} : int64 code of each id
+        """
+        import pandas as pd
+
+        codes, uniques = pd.factorize(np.asarray(values, dtype=object))
+        mapping = np.empty(len(uniques), dtype=np.int64)
+        for i, id in enumerate(uniques):
+            code = self._codes.get(id)
+            if code is None:
+                code = len(self._ids)
+                self._codes[id] = code
+                self._ids.append(id)
+            mapping[i] = code
+        return mapping[codes]
+
+
+def iter_column_chunks(
+    file_path,
+    columns,
+    delimit=",",
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    namespace_column=None,
+    namespace=None,
+    codebooks=None,
+):
+    """
+    Stream selected columns of a delimited file with a header line, a chunk of rows at a time. Quoted fields are
+    parsed the csv way (a quoted field may contain the delimiter), rows that are too short raise a ValueError
+    instead of being skipped. Only one chunk of rows is held in memory at once.
+
+    Parameters:
+    file_path {Path} : path of the file
+    columns {list} : indices of the columns to return
+    delimit {str} : field delimiter
+    chunk_size {int} : number of rows read per chunk
+    namespace_column {int} : index of the column to filter on, rows whose value is not in namespace are dropped
+        while scanning
+    namespace {list} : values of namespace_column to keep
+    codebooks {list} : one IdCodebook or None per column, columns with a codebook are returned as int64 codes,
+        the others as arrays of interned strings
+
+    Returns:
+    generator of lists of np.ndarray, one array per column
+    """
+    if codebooks is None:
+        codebooks = [None] * len(columns)
+    if len(codebooks) != len(columns):
+        raise ValueError("codebooks needs one entry per column")
+    keep = None
+    if namespace is not None:
+        if namespace_column is None:
+            raise ValueError("namespace_column is required to filter on a namespace")
+        keep = set(namespace)
+    required_columns = max(list(columns) + [namespace_column or 0]) + 1
+
+    with open(file_path, "r", newline="") as file:
+        reader = csv.reader(file, delimiter=delimit)
+        next(reader, None)
+        selected = [[] for _ in columns]
+        for row in reader:
+            if len(row) < required_columns:
+                if not row:
+                    continue
+                raise ValueError(
+                    f"{file_path}, line {reader.line_num}: expected at least {required_columns} columns, "
+                    f"found {len(row)}"
+                )
+            if keep is not None and row[namespace_column] not in keep:
+                continue
+            for values, col in zip(selected, columns):
+                values.append(sys.intern(row[col]))
+            if len(selected[0]) == chunk_size:
+                yield _to_chunk(selected, codebooks)
+                selected = [[] for _ in columns]
+        if selected[0]:
+            yield _to_chunk(selected, codebooks)
+
+
+def read_columns(file_path, columns, delimit=",", **kwargs):
+    """
+    Read selected columns of a delimited file into one array per column, accepts the same keyword arguments as
+    iter_column_chunks
+    """
+    chunks = list(iter_column_chunks(file_path, columns, delimit, **kwargs))
+    codebooks = kwargs.get("codebooks") or [None] * len(columns)
+    result = []
+    for i, codebook in enumerate(codebooks):
+        dtype = object if codebook is None else np.int64
+        result.append(
+            np.concatenate([chunk[i] for chunk in chunks])
+            if chunks
+            else np.empty(0, dtype=dtype)
+        )
+    return result
+
+
+def _to_chunk(selected, codebooks):
+    chunk = []
+    for values, codebook in zip(selected, codebooks):
+        if codebook is None:
+            array = np.empty(len(values), dtype=object)
+            array[:] = values
+            chunk.append(array)
+        else:
+            chunk.append(codebook.encode(values))
+    return chunk
@@ -0,0 +1,135 @@
+from pathlib import Path
+import os
+import numpy as np
+
+# version of the store layout, bump it whenever the set or meaning of the arrays changes
+REPLICATE_STORE_VERSION = 1
+
+
+def replicate_store_path(input_directory_path, name):
+    """
+    Path of the replicate store of an experiment, e.g. output/dataset/replicates_mol_bio_cel.npz
+    """
+    return Path(input_directory_path, "replicates" + name + ".npz")
+
+
+def current_replicate_store(input_directory_path, name):
+    """
+    Path of the replicate store of an experiment if it exists and is up to date, None otherwise. A store is out of
+    date once a csv file of the experiment's replicates was written after it, e.g. by write_datasets, sample_data or
+    by hand, the csv files are read instead then.
+
+    Parameters:
+    input_directory_path {Path} : path of the directory containing the datasets
+    name {str} : namespaces of the experiment, the suffix of its csv file names
+
+    Returns:
+    store_path {Path or None}
+    """
+    store_path = replicate_store_path(input_directory_path, name)
+    if not store_path.exists():
+        return None
+    store_time = os.path.getmtime(store_path)
+    suffix = "_protein_go_term_pairs" + name + ".csv"
+    for file_name in os.listdir(input_directory_path):
+        if (
+            file_name.startswith("rep_")
+            and file_name.endswith(suffix)
+            and os.path.getmtime(Path(input_directory_path, file_name)) > store_time
+        ):
+            return None
+    return store_path
+
+
+def write_replicate_store(file_path, protein_ids, go_ids, replicates):
+    """
+    Write the positive and negative datasets of all replicates of an experiment into one file. Pairs are stored as
+    integer codes into the protein and go term id tables, one array per replicate and dataset, so a single replicate
+    can be read without reading the others.
+
+    Parameters:
+    file_path {Path} : path of the store, see replicate_store_path
+    protein_ids {array} : protein id of each protein code
+    go_ids {array} : go term id of each go term code
+    replicates {list} : (positive_codes, negative_codes) of each replicate, each an array of shape (2, sample size)
+        holding protein codes in row 0 and go term codes in row 1
+
+    Returns:
+    Null
+    """
+    arrays = {
+        "version": np.array(REPLICATE_STORE_VERSION),
+        "protein_ids": np.asarray(protein_ids, dtype=str),
+        "go_ids": np.asarray(go_ids, dtype=str),
+    }
+    for rep_num, (positive_codes, negative_codes) in enumerate(replicates):
+        arrays["positive_" + str(rep_num)] = np.asarray(positive_codes, dtype=np.int32)
+        arrays["negative_" + str(rep_num)] = np.asarray(negative_codes, dtype=np.int32)
+
+    # written under a temporary name first, a store that exists is always complete
+    file_path = Path(file_path)
+    temporary_path = file_path.with_name(file_path.name + ".tmp")
+    with open(temporary_path, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(temporary_path, file_path)
+
+
+class ReplicateStore:
+    """
+    Read access to a file written by write_replicate_store. The file is an uncompressed zip of .npy arrays and
+    only the arrays of the replicates that are asked for are read.
+
+    Parameters:
+    file_path {Path} : path of the store
+    """
+
+    def __init__(self, file_path):
+        self.file_path = Path(file_path)
+        with np.load(self.file_path, allow_pickle=False) as archive:
+            version = int(archive["version"]) if "version" in archive.files else None
+            if version != REPLICATE_STORE_VERSION:
+                raise ValueError(
+                    f"{self.file_path} has replicate store version {version}, expected {REPLICATE_STORE_VERSION}"
+                )
+            self.protein_ids = archive["protein_ids"].astype(object)
+            self.go_ids = archive["go_ids"].astype(object)
+            self.replicates = sum(
+                array_name.startswith("positive_") for array_name in archive.files
+            )
+
+    def __len__(self):
+        return self.replicates
+
+    def get_codes(self, rep_num):
+        """
+        Integer coded datasets of a replicate
+
+        Parameters:
+        rep_num {int} : replicate number
+
+        Returns:
+        positive_codes {np.ndarray}, negative_codes {np.ndarray} : arrays of shape (2, sample size), protein codes
+            in row 0 and go term codes in row 1
+        """
+        if not 0 <= rep_num < self.replicates:
+            raise KeyError(f"{self.file_path} has no replicate {rep_num}")
+        with np.load(self.file_path, allow_pickle=False) as archive:
+            return archive["positive_" + str(rep_num)], archive["negative_" + str(rep_num)]
+
+    def get_datasets(self, rep_num):
+        """
+        Datasets of a replicate in the format returned by get_datasets
+
+        Parameters:
+        rep_num {int} : replicate number
+
+        Returns:
+        positive_dataset, negative_dataset
+        """
+        return tuple(
+            {
+                "protein": self.protein_ids[codes[0]].tolist(),
+                "go": self.go_ids[codes[1]].tolist(),
+            }
+            for codes in self.get_codes(rep_num)
+        )
@@ -0,0 +1,167 @@
+import numpy as np
+
+
+def replicate_rng(seed, rep_num):
+    """
+    Random generator of one replicate. Every replicate gets its own stream derived from the run's seed, the same
+    stream np.random.SeedSequence(seed).spawn(n)[rep_num] would give, so a replicate can be reproduced on its own.
+
+    Parameters:
+    seed {int} : seed of the run
+    rep_num {int} : replicate number
+
+    Returns:
+    np.random.Generator
+    """
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(rep_num,)))
+
+
+def new_seed():
+    """
+    Seed for a run that was not given one, print it to be able to reproduce the run
+    """
+    return np.random.SeedSequence().entropy
+
+
+class PairSampler:
+    """
+    Samples positive and negative protein-go term datasets. Positive pairs are drawn without replacement from the
+    annotations. The negative pair of a positive pair keeps its go term and gets a protein drawn uniformly from the
+    proteins not annotated with that go term. The annotated proteins of every go term are precomputed as sorted
+    index arrays, so a negative is drawn directly from the complement instead of retrying until an unannotated
+    protein comes up.
+
+    Parameters:
+    go_protein_pairs {list} : a list containing the edge between a protein and a go-term e.g. [[protein1, go_term1], [protein2, go_term2], ...]
+    protein_list {list} : a list of all proteins in the graph, negatives are drawn from these
+    """
+
+    def __init__(self, go_protein_pairs, protein_list):
+        import pandas as pd
+
+        self.protein_ids = np.array([protein["id"] for protein in protein_list], dtype=object)
+        pair_proteins = np.array([pair[0] for pair in go_protein_pairs], dtype=object)
+        pair_go_terms = np.array([pair[1] for pair in go_protein_pairs], dtype=object)
+
+        self.pair_protein_codes = pd.Index(self.protein_ids).get_indexer(pair_proteins)
+        if np.any(self.pair_protein_codes < 0):
+            raise ValueError("go_protein_pairs contains proteins that are not in protein_list")
+        self.pair_go_codes, self.go_ids = pd.factorize(pair_go_terms)
+        protein_count = len(self.protein_ids)
+
+        # sorted protein codes annotated with each go term, the rows of a go term -> protein CSR index
+        keys = np.unique(self.pair_go_codes * protein_count + self.pair_protein_codes)
+        annotated_go, annotated_protein = np.divmod(keys, protein_count)
+        self.annotated_indptr = np.zeros(len(self.go_ids) + 1, dtype=np.int64)
+        np.cumsum(
+            np.bincount(annotated_go, minlength=len(self.go_ids)),
+            out=self.annotated_indptr[1:],
+        )
+        self.complement_size = protein_count - np.diff(self.annotated_indptr)
+
+        # the j-th annotated protein of a go term minus j is the number of unannotated proteins with a smaller
+        # code, it does not decrease within a go term. Offsetting every go term by its code times (protein_count + 1)
+        # makes the whole array sorted, so the complement of every go term can be searched at once.
+        rank = np.arange(len(keys)) - np.repeat(
+            self.annotated_indptr[:-1], np.diff(self.annotated_indptr)
+        )
+        self._complement_keys = annotated_go * (protein_count + 1) + (
+            annotated_protein - rank
+        )
+
+    def sample(self, sample_size, seed, rep_nums):
+        """
+        Sample the positive and negative datasets of several replicates, replicate i uses the stream
+        replicate_rng(seed, i), so its datasets do not depend on which other replicates are sampled with it
+
+        Parameters:
+        sample_size {int} : the size of a positive/negative dataset to be sampled
+        seed {int} : seed of the run
+        rep_nums {list} : replicate numbers to sample
+
+        Returns:
+        datasets {list} : (positive_dataset, negative_dataset) of each replicate
+        """
+        return [
+            self.decode(replicate)
+            for replicate in self.sample_codes(sample_size, seed, rep_nums)
+        ]
+
+    def decode(self, replicate):
+        """
+        The datasets of a replicate returned by sample_codes in the format returned by sample
+
+        Parameters:
+        replicate {tuple} : (positive_codes, negative_codes) of the replicate
+
+        Returns:
+        positive_dataset, negative_dataset
+        """
+        return tuple(
+            {
+                "protein": self.protein_ids[codes[0]].tolist(),
+                "go": self.go_ids[codes[1]].tolist(),
+            }
+            for codes in replicate
+        )
+
+    def sample_codes(self, sample_size, seed, rep_nums):
+        """
+        Same as sample, but the datasets are returned as integer codes into protein_ids and go_ids
+
+        Returns:
+        replicates {list} : (positive_codes, negative_codes) of each replicate, arrays of shape (2, sample_size)
+            with protein codes in row 0 and go term codes in row 1
+        """
+        rep_nums = list(rep_nums)
+        if len(rep_nums) == 0:
+            return []
+        pair_index = np.empty((len(rep_nums), sample_size), dtype=np.int64)
+        uniform = np.empty((len(rep_nums), sample_size))
+        for i, rep_num in enumerate(rep_nums):
+            rng = replicate_rng(seed, rep_num)
+            pair_index[i] = rng.choice(
+                len(self.pair_go_codes), sample_size, replace=False
+            )
+            uniform[i] = rng.random(sample_size)
+        # the negatives of all replicates are mapped in one pass
+        go_codes = self.pair_go_codes[pair_index]
+        negative_codes = self.sample_negatives(go_codes, uniform)
+
+        return [
+            (
+                np.stack([self.pair_protein_codes[pair_index[i]], go_codes[i]]),
+                np.stack([negative_codes[i], go_codes[i]]),
+            )
+            for i in range(len(rep_nums))
+        ]
+
+    def sample_negatives(self, go_codes, uniform):
+        """
+        Map uniform draws to proteins not annotated with the respective go terms
+
+        Parameters:
+        go_codes {np.ndarray} : go term code of each negative pair
+        uniform {np.ndarray} : a number in [0, 1) for each negative pair
+
+        Returns:
+        protein_codes {np.ndarray}
+        """
+        complement_size = self.complement_size[go_codes]
+        if np.any(complement_size == 0):
+            raise ValueError(
+                "a go term is annotated to every protein, no negative pair exists for it"
+            )
+        # rank of the drawn protein among the unannotated proteins of its go term
+        rank = np.minimum(
+            (uniform * complement_size).astype(np.int64), complement_size - 1
+        )
+        # the protein is rank plus the number of annotated proteins that come before it
+        protein_count = len(self.protein_ids)
+        preceding = (
+            np.searchsorted(
+                self._complement_keys, go_codes * (protein_count + 1) + rank, side="right"
+            )
+            - self.annotated_indptr[go_codes]
+        )
+        return rank + preceding
@@ -1,22 +1,67 @@
-from sklearn.metrics import roc_curve, auc, precision_recall_curve
 from tools.helper import print_progress
-from sklearn.metrics import f1_score
-from colorama import Fore, Style
 import numpy as np
 from tools.helper import (
     add_print_statements,
     generate_random_colors,
-    import_graph_from_pickle,
 )
+from classes.registry import algorithm_requirements
+from tools.graph import (
+    GraphContext,
+    csr_export_path,
+    export_csr_graph,
+    import_csr_graph,
+    same_csr_graph,
+)
+from tools.dataset import (
+    ReplicateDataset,
+    get_datasets,
+    get_replicate_dataset,
+    interleave_datasets,
+)
+from tools.metrics import (
+    bootstrap_auc,
+    compute_metrics,
+    confidence_interval,
+    max_f1_threshold,
+)
+from tools.sampling import PairSampler, new_seed
+from tools.instrumentation import (
+    count,
+    disable_instrumentation,
+    enable_instrumentation,
+    get_registry,
+    scope,
+    stage,
+    timed,
+    write_stage_timings,
+)
+from tools.output import (
+    get_output_policy,
+    set_output_policy,
+    start_writer,
+    stop_writer,
+)
+from tools.profiling import (
+    disable_profiling,
+    enable_profiling,
+    get_profiling,
+    profiled,
+    set_profiling,
+)
+from tools.replicate_store import (
+    ReplicateStore,
+    current_replicate_store,
+    replicate_store_path,
+    write_replicate_store,
+)
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-import matplotlib.pyplot as plt
 import random
-from random import sample
 import pandas as pd
 from operator import itemgetter
 import statistics as stat
 import os
-import sys
+import tempfile
 
 
 def run_workflow(
@@ -32,6 +77,15 @@ def run_workflow(
     new_random_lists,
     name,
     figure,
+    graph=None,
+    workers=1,
+    seed=None,
+    export_csv=False,
+    instrument=False,
+    profile=None,
+    bootstrap=0,
+    confidence=0.95,
+    output="csv",
 ):
     """
     With a given set of algorithms, test the algorithms ability to prediction protein function on a given number of
@@ -50,128 +104,262 @@ def run_workflow(
     new_random_list {bool} : flag True to generate completely new pos/neg lists, False to use pre-existing ones 
     name {str} : a string of namespaces chosen to be used in the sample
     figure {bool} : true if graphs should be printed (any), false if not
+    graph {CSRGraph or nx.Graph} : the already built graph, graph_file_path is only read if this is not given
+    workers {int} : number of processes the (replicate, algorithm) runs are spread over, 1 runs everything in
+        this process, None uses all cores. Results are identical to a serial run.
+    seed {int} : seed the replicate datasets are sampled with, the same seed gives the same datasets. A new seed
+        is drawn and printed if None.
+    export_csv {bool} : True to also write every sampled replicate as tab separated positive and negative files,
+        the replicates are always saved in one replicate store file in dataset_directory_path
+    instrument {bool} : True to time every stage of every algorithm and replicate, the timings are written to
+        stage_timings.csv in output_data_path
+    profile {list} : names of algorithms in algorithm_classes to profile, every run of them writes a cProfile .prof
+        file and a collapsed stack summary to the profiles directory in output_data_path
+    bootstrap {int} : number of bootstrap resamples of the scored pairs of every replicate, 0 for none. With more
+        than one replicate, the confidence interval of the mean AUC over replicates is added to the repeated auc
+        values file, with one replicate the interval of its AUC is added to the roc and pr auc results files.
+    confidence {float} : confidence level of the bootstrap intervals
+    output {str} : output files of every algorithm and replicate, "csv" the tab separated scores sorted by
+        norm_score, "npz" the scores as compressed numpy arrays or "none". The files are written by a background
+        thread while the algorithms run.
 
     Returns:
     Null
     """
-    G = import_graph_from_pickle(graph_file_path)
-    x = repeats  # Number of replicates
-    print_graphs = figure
-    if x > 1:
-        print_graphs = False
-    auc = {}
-    # index 0 is ROC, index 1 is Precision Recall
-    for i in algorithm_classes.keys():
-        auc[i] = [[], []]
-
-    #Sorts through replicates in directory and returns number of dataset pairs, needs to be formatted and ordered corectly
-    if new_random_lists == False:
-        x = use_existing_samples(dataset_directory_path)
-
-    #Generates completely new positive and negative lists for every replicate, regardless of if the file already exists or not
-    else:
-        remove_samples(x, dataset_directory_path)
-        for i in range(x):
-            positive_dataset, negative_dataset = sample_data(
-                go_protein_pairs, sample_size, protein_list, G, dataset_directory_path, i, name
-            )
-
-    
-    for i in range(
-        x
-    ):  # Creates a pos/neg list each replicate then runs workflow like normal
+    # the output policy of the caller is restored and every output file is written before run_workflow returns,
+    # also when a replicate fails
+    previous_policy = get_output_policy()
+    try:
+        set_output_policy(output)
+        if instrument:
+            enable_instrumentation()
+        if profile:
+            unknown = set(profile) - set(algorithm_classes)
+            if unknown:
+                raise ValueError(f"cannot profile {sorted(unknown)}, they are not in algorithm_classes")
+            enable_profiling(profile, Path(output_data_path, "profiles"))
+        # the graph is loaded at most once and shared by the sampling step and all algorithms of all replicates
+        graph_context = GraphContext(graph_file_path, graph)
+        start_writer()
+        x = repeats  # Number of replicates
+        print_graphs = figure
         if x > 1:
-            print("\n\nReplicate: " + str(i) + "\n")
-
-        # positive_dataset, negative_dataset = sample_data(
-        #     go_protein_pairs, sample_size, protein_list, G, dataset_directory_path
-        # )
-
-        results = run_experiement(
-            algorithm_classes,
-            dataset_directory_path,
-            graph_file_path,
-            output_data_path,
-            output_image_path,
-            True,
-            print_graphs,
-            i,
-            name,
-        )
-        
-        # each loop adds the roc and pr values, index 0 for roc and 1 for pr, for each algorithm
+            print_graphs = False
+        auc = {}
+        # index 0 is ROC, index 1 is Precision Recall
         for i in algorithm_classes.keys():
-            auc[i][0].append(results[i]["roc_auc"]) #round(results[i]["roc_auc"],5))
-            auc[i][1].append(results[i]["pr_auc"]) #round(results[i]["pr_auc"],5))
+            auc[i] = [[], []]
+        # bootstrap AUCs of each replicate, one (algorithms, resamples) array per replicate, index 0 is ROC, index 1 is
+        # Precision Recall
+        bootstrap_aucs = [[], []]
+
+        #Sorts through replicates in directory and returns number of dataset pairs, needs to be formatted and ordered corectly
+        if new_random_lists == False:
+            x = use_existing_samples(dataset_directory_path, name)
+
+        #Generates completely new positive and negative lists for every replicate, regardless of if the file already exists or not
+        else:
+            remove_samples(x, dataset_directory_path)
+            if seed is None:
+                seed = new_seed()
+            print("Sampling datasets with seed " + str(seed))
+            with stage("sampling"):
+                sampler = PairSampler(go_protein_pairs, protein_list)
+                replicates = sampler.sample_codes(sample_size, seed, range(x))
+                if export_csv:
+                    # the csv files are written before the replicate store, it is only read while none of them is
+                    # newer
+                    for i, codes in enumerate(replicates):
+                        positive_dataset, negative_dataset = sampler.decode(codes)
+                        write_datasets(
+                            positive_dataset, negative_dataset, dataset_directory_path, i, name
+                        )
+                write_replicate_store(
+                    replicate_store_path(dataset_directory_path, name),
+                    sampler.protein_ids,
+                    sampler.go_ids,
+                    replicates,
+                )
+
+        # every replicate is resampled with its own seed, derived from the sampling seed
+        bootstrap_seeds = np.random.SeedSequence(seed).spawn(x)
+
+        replicate_results = None
+        if workers != 1:
+            replicate_results = run_replicates_parallel(
+                algorithm_classes,
+                dataset_directory_path,
+                graph_file_path,
+                output_data_path,
+                x,
+                name,
+                graph_context,
+                workers,
+            )
 
-    #Creates a dictionary for all pr values and all roc values 
-    roc = {}
-    pr = {}
+        for i in range(
+            x
+        ):  # Creates a pos/neg list each replicate then runs workflow like normal
+            if x > 1:
+                print("\n\nReplicate: " + str(i) + "\n")
+
+            # positive_dataset, negative_dataset = sample_data(
+            #     go_protein_pairs, sample_size, protein_list, G, dataset_directory_path
+            # )
+
+            if replicate_results is None:
+                results = run_experiement(
+                    algorithm_classes,
+                    dataset_directory_path,
+                    graph_file_path,
+                    output_data_path,
+                    output_image_path,
+                    True,
+                    print_graphs,
+                    i,
+                    name,
+                    graph_context,
+                )
+            else:
+                # the algorithms already ran in the process pool, only the per replicate reports are left
+                results = replicate_results[i]
+                with scope(replicate=i):
+                    run_thresholds(results, algorithm_classes, output_data_path)
+                    if print_graphs:
+                        generate_figures(
+                            algorithm_classes, results, output_image_path, output_data_path
+                        )
+        
+            if bootstrap:
+                with scope(replicate=i), stage("bootstrap"):
+                    roc_boot, pr_boot = run_bootstrap(
+                        results, algorithm_classes, bootstrap, bootstrap_seeds[i]
+                    )
+                bootstrap_aucs[0].append(roc_boot)
+                bootstrap_aucs[1].append(pr_boot)
+
+            # each loop adds the roc and pr values, index 0 for roc and 1 for pr, for each algorithm
+            for i in algorithm_classes.keys():
+                auc[i][0].append(results[i]["roc_auc"]) #round(results[i]["roc_auc"],5))
+                auc[i][1].append(results[i]["pr_auc"]) #round(results[i]["pr_auc"],5))
+
+        #Creates a dictionary for all pr values and all roc values 
+        roc = {}
+        pr = {}
 
-    for i in algorithm_classes.keys():
-        roc[i] = auc[i][0]
-        pr[i] = auc[i][1]
+        for i in algorithm_classes.keys():
+            roc[i] = auc[i][0]
+            pr[i] = auc[i][1]
+
+        if bootstrap:
+            # confidence interval of the mean over replicates, the mean of each resample across the replicates. With
+            # one replicate it is the interval of that replicate's AUC.
+            roc_lower, roc_upper = confidence_interval(
+                np.mean(bootstrap_aucs[0], axis=0), confidence
+            )
+            pr_lower, pr_upper = confidence_interval(
+                np.mean(bootstrap_aucs[1], axis=0), confidence
+            )
+            percent = f"{confidence:.0%}"
     
-    if x > 1:
-        cols = []
-        for i in range(x):
-            cols.append("Replicate " + str(i))
+        if x > 1:
+            cols = []
+            for i in range(x):
+                cols.append("Replicate " + str(i))
         
-        # Finds mean and sd of values, ROC mean index 0, ROC sd index 1, PR mean index 2, and PR sd index 3
-        for i in auc.keys():
-            meanROC = round(stat.mean(auc[i][0]), 5)
-            auc[i].append(round(stat.mean(auc[i][1]), 5))
-            auc[i].append(round(stat.stdev(auc[i][1]), 5))
-            auc[i][1] = round(stat.stdev(auc[i][0]), 5)
-            auc[i][0] = meanROC
-
-        # Prints the roc and pr table, then saves to .csv file
-        df = pd.DataFrame.from_dict(
-            auc,
-            orient="index",
-            columns=[
+            # Finds mean and sd of values, ROC mean index 0, ROC sd index 1, PR mean index 2, and PR sd index 3
+            for i in auc.keys():
+                meanROC = round(stat.mean(auc[i][0]), 5)
+                auc[i].append(round(stat.mean(auc[i][1]), 5))
+                auc[i].append(round(stat.stdev(auc[i][1]), 5))
+                auc[i][1] = round(stat.stdev(auc[i][0]), 5)
+                auc[i][0] = meanROC
+            columns = [
                 "ROC mean",
                 "ROC sd",
                 "Precision/Recall mean",
                 "Precision/Recall sd",
-            ],
-        )
-        print()
-        print(df)
-        df.to_csv(
-            Path(output_data_path, str(x) + "_repeated_auc_values.csv"),
-            index=True,
-            sep="\t",
-        )
-    else:
-        cols = ["AUC"]
+            ]
+
+            if bootstrap:
+                for j, i in enumerate(auc.keys()):
+                    auc[i].extend(
+                        [
+                            round(roc_lower[j], 5),
+                            round(roc_upper[j], 5),
+                            round(pr_lower[j], 5),
+                            round(pr_upper[j], 5),
+                        ]
+                    )
+                columns.extend(
+                    [
+                        f"ROC {percent} CI lower",
+                        f"ROC {percent} CI upper",
+                        f"Precision/Recall {percent} CI lower",
+                        f"Precision/Recall {percent} CI upper",
+                    ]
+                )
+
+            # Prints the roc and pr table, then saves to .csv file
+            df = pd.DataFrame.from_dict(
+                auc,
+                orient="index",
+                columns=columns,
+            )
+            print()
+            print(df)
+            df.to_csv(
+                Path(output_data_path, str(x) + "_repeated_auc_values.csv"),
+                index=True,
+                sep="\t",
+            )
+        else:
+            cols = ["AUC"]
+            if bootstrap:
+                # the interval is written next to the AUC of the single replicate
+                for j, i in enumerate(algorithm_classes.keys()):
+                    roc[i] = roc[i] + [round(roc_lower[j], 5), round(roc_upper[j], 5)]
+                    pr[i] = pr[i] + [round(pr_lower[j], 5), round(pr_upper[j], 5)]
+                cols.extend([f"{percent} CI lower", f"{percent} CI upper"])
         
-    dfr = pd.DataFrame.from_dict(
-        roc,
-        orient = 'index',
-        columns = cols
-    )
+        dfr = pd.DataFrame.from_dict(
+            roc,
+            orient = 'index',
+            columns = cols
+        )
 
-    dfp = pd.DataFrame.from_dict(
-        pr,
-        orient = 'index',
-        columns = cols
-    )
+        dfp = pd.DataFrame.from_dict(
+            pr,
+            orient = 'index',
+            columns = cols
+        )
         
-    dfr.to_csv(
-        Path(output_data_path, "roc_auc_results.csv"),
-        index = True,
-        sep = "\t"
-    )
+        dfr.to_csv(
+            Path(output_data_path, "roc_auc_results.csv"),
+            index = True,
+            sep = "\t"
+        )
     
-    dfp.to_csv(
-        Path(output_data_path, "pr_auc_results.csv"),
-        index = True,
-        sep = "\t"
-    )
-    if x > 1 & figure == True:
-        replicate_boxplot(roc, output_image_path, True)
-        replicate_boxplot(pr, output_image_path, False)
+        dfp.to_csv(
+            Path(output_data_path, "pr_auc_results.csv"),
+            index = True,
+            sep = "\t"
+        )
+        if x > 1 & figure == True:
+            replicate_boxplot(roc, output_image_path, True)
+            replicate_boxplot(pr, output_image_path, False)
+        # every output file is written before the timings are
+        stop_writer()
+        if instrument:
+            # the timing table is written next to roc_auc_results.csv
+            write_stage_timings(get_registry(), output_data_path)
+    finally:
+        stop_writer()
+        set_output_policy(previous_policy)
+        if instrument:
+            disable_instrumentation()
+        if profile:
+            disable_profiling()
 
 def run_experiement(
     algorithm_classes,
@@ -183,6 +371,7 @@ def run_experiement(
     figures,
     rep_num,
     name,
+    graph=None,
 ):
     """
     Run an iteration with a sample dataset on all the algorithms, calculating their protein prediction scores
@@ -195,6 +384,7 @@ def run_experiement(
     output_image_path {Path} : path of the output image
     rep_num {int} : replicate number to use associated pos/neg dataset
     name {str} : namespaces used to create the sample datasets
+    graph {GraphContext} : the graph shared between algorithms, loaded from graph_file_path if not given
 
     Returns:
     Results {dictionary} : contains a key value pair where each association algorithms is a key and their values are the metrics and threshold results
@@ -202,28 +392,202 @@ def run_experiement(
     print("")
     print("-" * 65)
     print("Calculating Protein Prediction")
-    results = {}
-    i = 1
-    for algorithm_name, algorithm_class in algorithm_classes.items():
+    if graph is None:
+        graph = GraphContext(graph_file_path)
+    with scope(replicate=rep_num):
+        # the replicate's pairs are read once and shared by all algorithms
+        with stage("read_datasets"):
+            dataset = get_replicate_dataset(None, input_directory_path, rep_num, name)
+        # the structures the algorithms declared are computed once and shared, later replicates reuse them
+        with stage("prepare_graph"):
+            graph.csr_graph.prepare(algorithm_requirements(algorithm_classes))
+        results = {}
+        i = 1
+        for algorithm_name, algorithm_class in algorithm_classes.items():
+            print("")
+            print(f"{i} / {len(algorithm_classes)}: {algorithm_name} Algorithm")
+            with scope(algorithm=algorithm_name):
+                with profiled(algorithm_name, rep_num):
+                    current = run_algorithm(
+                        algorithm_class,
+                        input_directory_path,
+                        graph_file_path,
+                        output_data_path,
+                        rep_num,
+                        name,
+                        graph,
+                        dataset,
+                    )
+            results[algorithm_name] = current
+            i += 1
+        # every algorithm scored the same pairs, their curves are computed together
+        results = run_metrics_batch(results)
+
+        if threshold:
+            run_thresholds(results, algorithm_classes, output_data_path)
+            if figures:
+                generate_figures(
+                    algorithm_classes, results, output_image_path, output_data_path
+                )
+
+    return results
+
+
+def run_replicates_parallel(
+    algorithm_classes,
+    input_directory_path,
+    graph_file_path,
+    output_data_path,
+    replicates,
+    name,
+    graph,
+    workers,
+):
+    """
+    Run every algorithm on every replicate in a process pool, one task per (replicate, algorithm) pair. The
+    workers memory map the same CSR export of the graph, so it is shared read-only instead of copied into every
+    process. Results are collected in task order and the algorithms' output files are moved into
+    output_data_path replicate by replicate, leaving the same results and files as a serial run.
+
+    Parameters:
+    algorithm_classes {dict} : a dictionary with keys as algorithm names and values as those algorithms' respective classes
+    input_directory_path {Path} : path of positive and negative datasets
+    graph_file_path {Path} : path of the exported nx graph
+    output_data_path {Path} : path of the output data
+    replicates {int} : number of replicates
+    name {str} : namespaces used to create the sample datasets
+    graph {GraphContext} : the graph of the workflow
+    workers {int} : number of processes, None uses all cores
+
+    Returns:
+    results {list} : the results of each replicate as returned by run_experiement, without threshold results
+    """
+    print("")
+    print("-" * 65)
+    print("Calculating Protein Prediction")
+    tasks = [
+        (rep_num, algorithm_name)
+        for rep_num in range(replicates)
+        for algorithm_name in algorithm_classes.keys()
+    ]
+    results = [{} for _ in range(replicates)]
+    with tempfile.TemporaryDirectory(dir=output_data_path) as scratch_path:
+        # the workers memory map the CSR export of graph_file_path, e.g. the one build_graph wrote. An in-memory
+        # graph only uses it if it is the graph that was exported.
+        graph_source = csr_export_path(graph_file_path)
+        if (
+            graph_source is not None
+            and graph.in_memory
+            and not same_csr_graph(graph.csr_graph, import_csr_graph(graph_source))
+        ):
+            graph_source = None
+        if graph_source is None:
+            # an in-memory graph without an export, or a pickle without a fresh CSR export next to it, is indexed
+            # once here and exported so the workers can memory map it instead of each reading the pickle
+            graph_source = Path(scratch_path, "graph")
+            export_csr_graph(graph.csr_graph, graph_source)
+
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_initialize_worker,
+            initargs=(graph_source, algorithm_requirements(algorithm_classes)),
+        ) as executor:
+            futures = []
+            for rep_num in range(replicates):
+                # the replicate's pairs are read once and sent with each of its tasks
+                dataset = get_replicate_dataset(
+                    None, input_directory_path, rep_num, name
+                )
+                for algorithm_name in algorithm_classes.keys():
+                    futures.append(
+                        executor.submit(
+                            _run_task,
+                            algorithm_classes[algorithm_name],
+                            algorithm_name,
+                            input_directory_path,
+                            graph_file_path,
+                            Path(scratch_path, "rep_" + str(rep_num)),
+                            rep_num,
+                            name,
+                            dataset,
+                            get_registry() is not None,
+                            get_profiling(),
+                            get_output_policy(),
+                        )
+                    )
+            i = 1
+            for (rep_num, algorithm_name), future in zip(tasks, futures):
+                current, timings = future.result()
+                results[rep_num][algorithm_name] = current
+                if timings is not None:
+                    # the stages timed in the worker
+                    get_registry().merge(timings)
+                print_progress(i, len(tasks))
+                i += 1
         print("")
-        print(f"{i} / {len(algorithm_classes)}: {algorithm_name} Algorithm")
-        current = run_algorithm(
-            algorithm_class, input_directory_path, graph_file_path, output_data_path, rep_num, name,
-        )
-        current = run_metrics(current)
-        results[algorithm_name] = current
-        i += 1
 
-    if threshold:
-        run_thresholds(results, algorithm_classes, output_data_path)
-        if figures:
-            generate_figures(
-                algorithm_classes, results, output_image_path, output_data_path
-            )
+        for rep_num in range(replicates):
+            rep_output_path = Path(scratch_path, "rep_" + str(rep_num))
+            for file_name in sorted(os.listdir(rep_output_path)):
+                os.replace(
+                    Path(rep_output_path, file_name), Path(output_data_path, file_name)
+                )
 
     return results
 
 
+# graph of a process pool worker, opened once per worker by _initialize_worker
+_worker_graph = None
+
+
+def _initialize_worker(graph_source, requirements=()):
+    global _worker_graph
+    _worker_graph = GraphContext(graph_source)
+    # every worker computes the structures its algorithms share once, not once per task
+    _worker_graph.csr_graph.prepare(requirements)
+    # forked workers inherit the parent's random state, reseed so they do not all draw the same numbers
+    np.random.seed()
+    random.seed()
+
+
+def _run_task(
+    algorithm_class,
+    algorithm_name,
+    input_directory_path,
+    graph_file_path,
+    output_data_path,
+    rep_num,
+    name,
+    dataset,
+    instrument=False,
+    profile_settings=None,
+    output_policy="csv",
+):
+    os.makedirs(output_data_path, exist_ok=True)
+    # the worker writes its files before returning, the parent moves them once the replicate's tasks are done
+    set_output_policy(output_policy)
+    # a worker records the stages of one task and sends them back with its result
+    registry = enable_instrumentation() if instrument else None
+    set_profiling(profile_settings)
+    with scope(replicate=rep_num, algorithm=algorithm_name):
+        with profiled(algorithm_name, rep_num):
+            current = run_algorithm(
+                algorithm_class,
+                input_directory_path,
+                graph_file_path,
+                output_data_path,
+                rep_num,
+                name,
+                _worker_graph,
+                dataset,
+            )
+        current = run_metrics(current)
+    if registry is None:
+        return current, None
+    disable_instrumentation()
+    return current, registry.get_state()
+
+
 def run_algorithm(
     algorithm_class,
     input_directory_path,
@@ -231,6 +595,8 @@ def run_algorithm(
     output_data_path,
     rep_num,
     name,
+    graph=None,
+    dataset=None,
 ):
     """
     With a given dataset, run an algorithm's predict method.
@@ -242,7 +608,9 @@ def run_algorithm(
     output_data_path {Path} : path of the output data
     rep_num {int} : replicate number to use associated pos/neg dataset
     name {str} : namespaces used to create the sample datasets
-    
+    graph {GraphContext} : the in-memory graph passed to the algorithm, it reads graph_file_path itself if None
+    dataset {ReplicateDataset} : the replicate's pairs passed to the algorithm, it reads input_directory_path
+        itself if None
 
     Returns:
     Result {dict} : a dictionary that stores the y_true and y_score values of the algorithm
@@ -251,9 +619,17 @@ def run_algorithm(
     algorithm = algorithm_class()
 
     # Predict using the algorithm
-    y_score, y_true = algorithm.predict(
-        input_directory_path, graph_file_path, output_data_path, rep_num, name,
-    )
+    with stage("predict"):
+        y_score, y_true = algorithm.predict(
+            input_directory_path,
+            graph_file_path,
+            output_data_path,
+            rep_num,
+            name,
+            graph=graph,
+            dataset=dataset,
+        )
+    count("pairs", len(y_true))
 
     # Access y_true and y_score attributes for evaluation
     algorithm.set_y_score(y_score)
@@ -264,6 +640,7 @@ def run_algorithm(
     return results
 
 
+@timed("metrics")
 def run_metrics(current):
     """
     Add more keys to the current {dict} that contains metrics and stats
@@ -274,21 +651,75 @@ def run_metrics(current):
     Returns:
     current {dict} : a dictionary that stores the y_true, y_score, and metrics of a given algorithm.
     """
-    # Compute ROC curve and ROC area for a classifier
-    current["fpr"], current["tpr"], current["thresholds"] = roc_curve(
-        current["y_true"], current["y_score"]
-    )
-    current["roc_auc"] = auc(current["fpr"], current["tpr"])
-
-    # Compute precision-recall curve and area under the curve for a classifier
-    current["precision"], current["recall"], _ = precision_recall_curve(
-        current["y_true"], current["y_score"]
-    )
-    current["pr_auc"] = auc(current["recall"], current["precision"])
+    # ROC curve, precision-recall curve and the area under each of them
+    current.update(compute_metrics(current["y_score"], current["y_true"])[0])
 
     return current
 
 
+def run_bootstrap(results, algorithm_classes, resamples, seed):
+    """
+    Bootstrap AUCs of the algorithms of a replicate, see tools.metrics.bootstrap_auc. Every algorithm is resampled
+    against its own y_true. Algorithms with the same y_true, normally all of them since they scored the same pairs,
+    are resampled together on the same resamples.
+
+    Parameters:
+    results {dict} : the results of the replicate as returned by run_experiement
+    algorithm_classes {dict} : a dictionary with keys as algorithm names and values as those algorithms' respective classes
+    resamples {int} : number of bootstrap resamples
+    seed {np.random.SeedSequence} : seed of the replicate's resamples
+
+    Returns:
+    roc_auc {np.ndarray} : ROC AUC of each algorithm and resample, of shape (algorithms, resamples)
+    pr_auc {np.ndarray} : precision-recall AUC of each algorithm and resample, of shape (algorithms, resamples)
+    """
+    algorithm_names = list(algorithm_classes.keys())
+    groups = []
+    for index, algorithm_name in enumerate(algorithm_names):
+        y_true = results[algorithm_name]["y_true"]
+        for group_y_true, indices in groups:
+            if np.array_equal(group_y_true, y_true):
+                indices.append(index)
+                break
+        else:
+            groups.append((y_true, [index]))
+
+    roc_auc = np.empty((len(algorithm_names), resamples))
+    pr_auc = np.empty((len(algorithm_names), resamples))
+    for y_true, indices in groups:
+        roc_auc[indices], pr_auc[indices] = bootstrap_auc(
+            [results[algorithm_names[index]]["y_score"] for index in indices],
+            y_true,
+            resamples,
+            seed,
+        )
+    return roc_auc, pr_auc
+
+
+@timed("metrics")
+def run_metrics_batch(results):
+    """
+    run_metrics for several algorithms that scored the same number of pairs, the curves of all algorithms are
+    computed in one batch
+
+    Parameters:
+    results {dict}: a dictionary with algorithm names as keys and dictionaries containing the y_score and y_true
+        values of each algorithm as values
+
+    Returns:
+    results {dict} : the same dictionary, every algorithm's dictionary also stores its metrics
+    """
+    if not results:
+        return results
+    currents = list(results.values())
+    y_score = np.array([current["y_score"] for current in currents], dtype=np.float64)
+    y_true = np.array([current["y_true"] for current in currents])
+    for current, metrics in zip(currents, compute_metrics(y_score, y_true)):
+        current.update(metrics)
+    return results
+
+
+@timed("thresholds")
 def run_thresholds(results, algorithm_classes, output_data_path):
     """
     Across all the algorithms, calculate their thresholds using three threshold metrics, youden_j, max_f1, and optimal_distance
@@ -317,18 +748,11 @@ def run_thresholds(results, algorithm_classes, output_data_path):
         optimal_index_youden = np.argmax(youden_j)
         optimal_threshold_youden = metrics["thresholds"][optimal_index_youden]
 
-        # i = 1
-        # # 2. Maximize the F1 Score
-        # # For each threshold, compute the F1 score
-        # f1_scores = []
-        # for threshold in metrics["thresholds"]:
-        #     y_pred = (metrics["y_score"] >= threshold).astype(int)
-        #     f1 = f1_score(metrics["y_true"], y_pred)
-        #     f1_scores.append(f1)
-        #     print_progress(i, len(metrics["thresholds"]))
-        #     i += 1
-        # optimal_index_f1 = np.argmax(f1_scores)
-        # optimal_threshold_f1 = metrics["thresholds"][optimal_index_f1]
+        # 2. Maximize the F1 Score
+        # The precision-recall curve holds the precision and recall of every distinct threshold
+        optimal_threshold_f1, max_f1 = max_f1_threshold(
+            metrics["precision"], metrics["recall"], metrics["pr_thresholds"]
+        )
 
         # 3. Minimize the Distance to (0, 1) on the ROC Curve
         distances = np.sqrt((1 - metrics["tpr"]) ** 2 + metrics["fpr"] ** 2)
@@ -339,9 +763,9 @@ def run_thresholds(results, algorithm_classes, output_data_path):
         threshold_results.append(
             f"Optimal Threshold (Youden's J): {optimal_threshold_youden}"
         )
-        # threshold_results.append(
-        #     f"Optimal Threshold (F1 Score): {optimal_threshold_f1}"
-        # )
+        threshold_results.append(
+            f"Optimal Threshold (F1 Score): {optimal_threshold_f1} (F1: {max_f1})"
+        )
         threshold_results.append(
             f"Optimal Threshold (Min Distance to (0,1)): {optimal_threshold_distance}"
         )
@@ -353,6 +777,7 @@ def run_thresholds(results, algorithm_classes, output_data_path):
     )
 
 
+@timed("figures")
 def generate_figures(algorithm_classes, results, output_image_path, output_data_path):
     """
     Generate ROC and PR figures to compare methods
@@ -367,6 +792,8 @@ def generate_figures(algorithm_classes, results, output_image_path, output_data_
     Null
     """
     # Generate ROC and PR figures to compare methods
+    # matplotlib is only loaded by runs that draw figures
+    import matplotlib.pyplot as plt
 
     colors = generate_random_colors(len(algorithm_classes))
 
@@ -419,7 +846,16 @@ def generate_figures(algorithm_classes, results, output_image_path, output_data_
     plt.show()
 
 
-def sample_data(go_protein_pairs, sample_size, protein_list, G, input_directory_path, num, name):
+def sample_data(
+    go_protein_pairs,
+    sample_size,
+    protein_list,
+    G,
+    input_directory_path,
+    num,
+    name,
+    seed=None,
+):
     """
     Given a sample size, generate positive nad negative datasets.
 
@@ -428,92 +864,56 @@ def sample_data(go_protein_pairs, sample_size, protein_list, G, input_directory_
     go_protein_pairs {list} : a list containing the edge between a protein and a go-term e.g. [[protein1, go_term1], [protein2, go_term2], ...]
     sample_size {int} : the size of a positive/negative dataset to be sampled
     protein_list {list} : a list of all proteins in the graph
-    G {nx.Graph} : graph that represents the interactome and go term connections
+    G {nx.Graph} : graph that represents the interactome and go term connections, not read anymore, the annotated
+        proteins of each go term are taken from go_protein_pairs
     input_directory_path {Path} : Path to directory of the datasets
     num {int} : Number of positive/negative dataset
     name {str} : shorthand for all namespaces used to generate datasets, adds shorthand to .csv name
+    seed {int} : seed of the run, replicate num uses its own random stream derived from it. A new seed is drawn if
+        None.
 
     Returns:
     positive_dataset, negative_dataset
 
     """
-    positive_dataset = {"protein": [], "go": []}
-    negative_dataset = {"protein": [], "go": []}
-    # sample the data
-    for edge in sample(list(go_protein_pairs), sample_size):
-        positive_dataset["protein"].append(edge[0])
-        positive_dataset["go"].append(edge[1])
-
-    i = 1
-
-    for protein, go in zip(positive_dataset["protein"], positive_dataset["go"]):
-        sample_edge = random.choice(protein_list)
-        # removes if a protein has a corresponding edge to the GO term in the network
-        while G.has_edge(sample_edge["id"], go):
-            sample_edge = random.choice(protein_list)
-        negative_dataset["protein"].append(sample_edge["id"])
-        negative_dataset["go"].append(go)
-        print_progress(i, sample_size)
-        i += 1
-
-    positive_df = pd.DataFrame(positive_dataset)
-    negative_df = pd.DataFrame(negative_dataset)
-    
-    positive_df.to_csv(
-        Path(input_directory_path, "rep_" + str(num) + "_positive_protein_go_term_pairs" + name + ".csv"),
-        index=False,
-        sep="\t",
-    )
-    negative_df.to_csv(
-        Path(input_directory_path, "rep_" + str(num) + "_negative_protein_go_term_pairs" + name + ".csv"),
-        index=False,
-        sep="\t",
-    )
+    if seed is None:
+        seed = new_seed()
+    sampler = PairSampler(go_protein_pairs, protein_list)
+    [(positive_dataset, negative_dataset)] = sampler.sample(sample_size, seed, [num])
+    write_datasets(positive_dataset, negative_dataset, input_directory_path, num, name)
 
     return positive_dataset, negative_dataset
 
 
-def get_datasets(input_directory_path, rep_num, name):
+def write_datasets(positive_dataset, negative_dataset, input_directory_path, num, name):
     """
-    get the positive and negative datasets as lists by reading their csv files
+    Write the positive and negative datasets of a replicate as tab separated files
 
     Parameters:
 
+    positive_dataset {dict} : positive protein and go term lists
+    negative_dataset {dict} : negative protein and go term lists
     input_directory_path {Path} : Path to directory of the datasets
-    rep_num {int} : Replicate number to specify which positive and negative list to use
-    name {str} : string of namespaces contained in the .csv file name
+    num {int} : Number of positive/negative dataset
+    name {str} : shorthand for all namespaces used to generate datasets, adds shorthand to .csv name
 
     Returns:
-    positive_dataset, negative_dataset
+    Null
 
     """
-    positive_dataset = {"protein": [], "go": []}
-    negative_dataset = {"protein": [], "go": []}
-    try:
-        with open(
-            Path(input_directory_path, "rep_" + str(rep_num) + "_positive_protein_go_term_pairs" + name + ".csv"), "r"
-        ) as file:
-            next(file)
-            for line in file:
-                parts = line.strip().split("\t")
-                # print(parts[0])
-                positive_dataset["protein"].append(parts[0])
-                positive_dataset["go"].append(parts[1])
-    except:
-        print(Fore.RED + "\nFile not found: ensure given namespaces match positive and negative file namespaces\n")
-        sys.exit(1)
-
-    with open(
-        Path(input_directory_path, "rep_" + str(rep_num) + "_negative_protein_go_term_pairs" + name + ".csv"), "r"
-    ) as file:
-        next(file)
-        for line in file:
-            parts = line.strip().split("\t")
-            # print(parts[0])
-            negative_dataset["protein"].append(parts[0])
-            negative_dataset["go"].append(parts[1])
+    positive_df = pd.DataFrame(positive_dataset)
+    negative_df = pd.DataFrame(negative_dataset)
 
-    return positive_dataset, negative_dataset
+    positive_df.to_csv(
+        Path(input_directory_path, "rep_" + str(num) + "_positive_protein_go_term_pairs" + name + ".csv"),
+        index=False,
+        sep="\t",
+    )
+    negative_df.to_csv(
+        Path(input_directory_path, "rep_" + str(num) + "_negative_protein_go_term_pairs" + name + ".csv"),
+        index=False,
+        sep="\t",
+    )
 
 
 def sort_results_by(results, key, output_path):
@@ -590,19 +990,29 @@ def remove_samples(x, dataset_directory_path):
         os.remove(del_file_path_pos)
         os.remove(del_file_path_neg)
 
+    for i in data_dir:
+        if i.startswith("replicates") and i.endswith(".npz"):
+            os.remove(Path(dataset_directory_path, i))
+
 
-def use_existing_samples(dataset_directory_path):
+def use_existing_samples(dataset_directory_path, name=None):
     """
     Sorts through repititions and renames files to ensure they are 0-x with one step between
 
     Parameters:
 
     dataset_directory_path {Path}: path to the dataset directory where samples are stored
+    name {str} : namespaces of the samples, the replicates in their replicate store are used if it is up to date
     
     Returns:
     the number of repititions in the directory {int}
 
     """
+    if name is not None:
+        store_path = current_replicate_store(dataset_directory_path, name)
+        if store_path is not None:
+            return len(ReplicateStore(store_path))
+
     data_dir = sorted(os.listdir(dataset_directory_path))
     nums = [] 
     for i in data_dir:
@@ -629,6 +1039,8 @@ def replicate_boxplot(auc_list, output_image_path, curve):
     NULL
 
     """
+    import matplotlib.pyplot as plt
+
     graph = []
     col_names = ["ON", "ON2", "ON3", "PD", "PD2", "PD3", "SA", "HD", "HD2"]
     colors = ["lightcoral", "indianred", "firebrick", "peachpuff", "sandybrown", "peru", "gold", "goldenrod", "darkgoldenrod", "yellowgreen", "olivedrab", "darkolivegreen", "darkturquoise", "mediumturquoise", "darkcyan", "mediumpurple", "darkviolet", "rebeccapurple", "hotpink", "deeppink", "mediumvioletred"]